@@ -0,0 +1,95 @@
+"""
+Liste ve rapor endpoint'leri için akış (streaming) yanıtları.
+
+?format=ndjson ya da ?format=csv verildiğinde satırlar Database.stream_query
+ile okunup geldikçe istemciye yazılır; sonuç kümesinin tamamı hiçbir zaman
+bellekte tutulmaz.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Response, stream_with_context
+
+BICIMLER = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Kaç satırda bir yanıta yazılacağı (çok küçük parçalar soket yazımı maliyetini artırır)
+PARCA_SATIR = 500
+
+
+class AkisBicimiHatasi(ValueError):
+    pass
+
+
+def akis_bicimi(args):
+    """?format parametresini okur; akış istenmiyorsa None döner"""
+    bicim = args.get('format')
+    if not bicim or bicim == 'json':
+        return None
+    if bicim not in BICIMLER:
+        raise AkisBicimiHatasi(f"Desteklenmeyen format: {bicim} (ndjson, csv)")
+    return bicim
+
+
+def _deger(deger):
+    if isinstance(deger, datetime):
+        return deger.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(deger, date):
+        return deger.isoformat()
+    if isinstance(deger, Decimal):
+        return float(deger)
+    if isinstance(deger, (bytes, bytearray)):
+        return deger.decode('utf-8', errors='replace')
+    return deger
+
+
+def _ndjson(satirlar):
+    parca = []
+    for satir in satirlar:
+        parca.append(json.dumps({k: _deger(v) for k, v in satir.items()}, ensure_ascii=False))
+        if len(parca) >= PARCA_SATIR:
+            yield '\n'.join(parca) + '\n'
+            parca = []
+    if parca:
+        yield '\n'.join(parca) + '\n'
+
+
+def _csv(satirlar):
+    tampon = io.StringIO()
+    yazici = None
+    adet = 0
+    for satir in satirlar:
+        if yazici is None:
+            yazici = csv.DictWriter(tampon, fieldnames=list(satir.keys()))
+            yazici.writeheader()
+        yazici.writerow({k: _deger(v) for k, v in satir.items()})
+        adet += 1
+        if adet % PARCA_SATIR == 0:
+            yield tampon.getvalue()
+            tampon.seek(0)
+            tampon.truncate()
+    if tampon.tell():
+        yield tampon.getvalue()
+
+
+def akis_yaniti(satirlar, bicim, dosya_adi):
+    """
+    Args:
+        satirlar: dict satır üreten iterable (ör. db.stream_query(...))
+        bicim: 'ndjson' | 'csv'
+        dosya_adi: indirme için uzantısız dosya adı
+    """
+    uretec = _ndjson(satirlar) if bicim == 'ndjson' else _csv(satirlar)
+    return Response(
+        stream_with_context(uretec),
+        content_type=BICIMLER[bicim],
+        headers={
+            'Content-Disposition': f'attachment; filename={dosya_adi}.{bicim}',
+            'X-Accel-Buffering': 'no',
+        }
+    )
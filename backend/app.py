@@ -1,11 +1,28 @@
-from flask import Flask, jsonify, request, session
+from flask import Flask, jsonify, request, session, make_response, g
 from flask_cors import CORS
 from datetime import datetime, timedelta
-import random
-import string
+from functools import wraps
+import io
+import secrets
+import time
 import logging, os
 from logging.handlers import RotatingFileHandler
-from database import db
+from database import db, HavuzZamanAsimi
+import metrikler
+import sorgu_olcumu
+from koltuk_haritasi import koltuk_haritasi
+from kullanici_onbellegi import kullanici_onbellegi
+from pnr import pnr_ayirici
+from sifre import SifreHavuzuDolu, sifre_havuzu
+from akis import AkisBicimiHatasi, akis_bicimi, akis_yaniti
+from sayfalama import SayfalamaHatasi, sayfa_parametreleri, sorgu_olustur, sayfa_sonucu
+from rezervasyon_motoru import (
+    rezervasyon_olustur, otomatik_rezervasyon_olustur, RezervasyonHatasi, KoltukCakismasi
+)
+from odeme_motoru import iptal_adimlari, odeme_adimlari
+from sefer_takvimi import TakvimHatasi, istegi_coz, toplu_sefer_ekle
+from yolculuk_planlayici import yolculuk_planlayici
+from ice_aktar import AKTARICILAR, PARTI_BOYUTU as ICE_AKTAR_PARTI_BOYUTU, ice_aktar
 
 app = Flask(__name__)
 
@@ -15,7 +32,8 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['SESSION_COOKIE_SECURE'] = False  
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
 
-CORS(app, supports_credentials=True, origins=['http://localhost:3002', 'http://localhost:3000', 'http://localhost:3001'])
+CORS_ORIGINS = ['http://localhost:3002', 'http://localhost:3000', 'http://localhost:3001']
+CORS(app, supports_credentials=True, origins=CORS_ORIGINS)
 
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -40,27 +58,181 @@ logger.info("Dosya loglama etkin: %s", file_handler.baseFilename)
 
 logger.info("Veritabanı modulu yüklendi.")
 
-#PNR kodu üretme fonksiyonu
-def generate_pnr():
-    
-    max_attempts = 10
-    for _ in range(max_attempts):
-        pnr = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        check = db.execute_query(
-            "SELECT 1 FROM Rezervasyon WHERE pnr = %s LIMIT 1",
-            (pnr,),
-            fetch=True
-        )
-        if not check:
-            return pnr
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-
 def format_datetime(dt):
     """Datetime objesini string'e çevir"""
     if isinstance(dt, datetime):
         return dt.strftime('%Y-%m-%d %H:%M:%S')
     return dt
 
+# ETag'ler süreç içi versiyon sayaçlarından üretilir. Süreç tokeni yeniden
+# başlatma sonrası çakışmayı, ETAG_MAX_YAS (saniye) ise diğer worker'ların
+# yaptığı yazmalar yüzünden eskimiş bir ETag'in ne kadar geçerli kalacağını sınırlar.
+SUREC_TOKENI = secrets.token_hex(4)
+ETAG_MAX_YAS = int(os.getenv('ETAG_MAX_YAS', '30'))
+
+def etag_olustur(*parcalar):
+    if ETAG_MAX_YAS > 0:
+        parcalar += (int(time.time() // ETAG_MAX_YAS),)
+    return '-'.join(str(p) for p in (SUREC_TOKENI,) + parcalar)
+
+def kosullu_get(etag_fonksiyonu):
+    """
+    Koşullu GET: etag_fonksiyonu(**view_args) handler çalışmadan önce çağrılır.
+    If-None-Match eşleşirse sorgu ve JSON üretimi yapılmadan 304 döner.
+    etag_fonksiyonu None dönerse handler normal çalışır.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if request.args.get('format') not in (None, 'json'):
+                return f(*args, **kwargs)
+
+            etag = etag_fonksiyonu(*args, **kwargs)
+            if etag is None:
+                return f(*args, **kwargs)
+
+            if request.if_none_match.contains_weak(etag):
+                yanit = app.response_class(status=304)
+            else:
+                yanit = make_response(f(*args, **kwargs))
+                if yanit.status_code != 200:
+                    return yanit
+            yanit.set_etag(etag, weak=True)
+            yanit.headers['Cache-Control'] = 'no-cache'
+            return yanit
+        return wrapper
+    return decorator
+
+def oturum_kullanicisi():
+    """
+    Oturumdaki aktif kullanıcının önbellekli bilgileri (bkz. kullanici_onbellegi);
+    oturum yoksa ya da kullanıcı silinmiş / devre dışıysa None (oturum da
+    temizlenir). İstek içinde bir kez çözülür.
+    """
+    if 'oturum_kullanicisi' not in g:
+        kullanici = None
+        if 'user_id' in session:
+            kullanici = kullanici_onbellegi.getir(session['user_id'])
+            if kullanici is None:
+                session.clear()
+        g.oturum_kullanicisi = kullanici
+    return g.oturum_kullanicisi
+
+def hata_yaniti(e, mesaj=None):
+    """Handler'ların ortak hata yanıtı; bağlantı / şifre havuzu doluysa 503 + Retry-After döner"""
+    if isinstance(e, (HavuzZamanAsimi, SifreHavuzuDolu)):
+        yanit = jsonify({'success': False, 'error': 'Sunucu yoğun, lütfen tekrar deneyin'})
+        yanit.headers['Retry-After'] = '1'
+        return yanit, 503
+    return jsonify({'success': False, 'error': mesaj or str(e)}), 500
+
+def liste_yaniti(data, sayfa, next_cursor):
+    """Liste endpoint'lerinin ortak yanıt gövdesi (sayfalı istekte next_cursor eklenir)"""
+    yanit = {
+        'success': True,
+        'data': data,
+        'count': len(data)
+    }
+    if sayfa:
+        yanit['next_cursor'] = next_cursor
+        yanit['has_more'] = next_cursor is not None
+    return yanit
+
+
+# Bir istekte bundan fazla DB çağrısı yapılırsa uyarı loglanır (N+1 tespiti)
+ISTEK_SORGU_UYARI = int(os.getenv('DB_ISTEK_SORGU_UYARI', '50'))
+
+def route_etiketi():
+    """Metrik etiketi: URL yerine route şablonu (ör. /api/seferler/<int:sefer_id>)"""
+    return request.url_rule.rule if request.url_rule else 'eslesmeyen'
+
+@app.before_request
+def metrik_baslat():
+    g.metrik_baslangic = time.perf_counter()
+    metrikler.istek_baslangici()
+
+@app.after_request
+def metrik_kaydet(response):
+    """Tüm hook'lardan önce kayıtlı olduğu için en son çalışır"""
+    metrikler.istek_bitti(
+        route_etiketi(), request.method, response.status_code,
+        time.perf_counter() - g.metrik_baslangic
+    )
+    metrikler.durum_guncelle()
+    return response
+
+@app.teardown_request
+def metrik_bitir(exc):
+    if 'metrik_baslangic' in g:
+        metrikler.istek_sonlandi()
+
+@app.before_request
+def istek_olcumu_baslat():
+    g.istek_baslangic = time.perf_counter()
+    sorgu_olcumu.istek_olcumu_baslat()
+
+def istek_olcumu_logla(yontem, yol, route, status, baslangic, olcum):
+    """İsteğin DB çağrı sayısı / süresini route adıyla loglar; Server-Timing değerini döndürür"""
+    toplam_ms = (time.perf_counter() - baslangic) * 1000
+    db_ms = olcum.db_suresi * 1000
+    bekleme_ms = olcum.bekleme_suresi * 1000
+    seviye = logging.WARNING if olcum.sorgu_sayisi > ISTEK_SORGU_UYARI else logging.INFO
+    logger.log(
+        seviye,
+        "%s %s [%s] %s %.1f ms | db: %d çağrı, %.1f ms, bağlantı bekleme %.1f ms",
+        yontem, yol, route, status, toplam_ms, olcum.sorgu_sayisi, db_ms, bekleme_ms
+    )
+    return (
+        f'db;dur={db_ms:.1f};desc="{olcum.sorgu_sayisi} sorgu", '
+        f'db-bekleme;dur={bekleme_ms:.1f}, toplam;dur={toplam_ms:.1f}'
+    )
+
+@app.after_request
+def istek_olcumu_bitir(response):
+    """
+    İş birimi hook'larından önce kayıtlı olduğu için en son çalışır; commit
+    süresi de ölçüme dahildir.
+    """
+    olcum = sorgu_olcumu.istek_olcumu_bitir()
+    if olcum is not None:
+        response.headers['Server-Timing'] = istek_olcumu_logla(
+            request.method, request.path, request.endpoint, response.status_code,
+            g.istek_baslangic, olcum
+        )
+    return response
+
+@app.before_request
+def is_birimi_baslat():
+    """Her istek tek bir bağlantı / iş birimi kullanır"""
+    db.is_birimi_baslat()
+    # Yakın zamanda yazan oturum replikadan eski veriyi okumasın
+    if db.replikalar:
+        son_yazma = session.get('son_yazma')
+        if son_yazma and time.time() - son_yazma < db.replika_yapiskanlik:
+            db.birincilden_oku()
+
+@app.after_request
+def is_birimi_tamamla(response):
+    """Başarılı yanıtta bekleyen yazmaları commit et, hata yanıtında geri al"""
+    try:
+        db.is_birimi_bitir(commit=response.status_code < 400)
+    except Exception as e:
+        logger.error(f"İş birimi commit hatası: {str(e)}")
+        yanit, status = hata_yaniti(e)
+        yanit.status_code = status
+        return yanit
+    if db.replikalar and db.son_yazma():
+        session['son_yazma'] = db.son_yazma()
+    return response
+
+@app.teardown_request
+def is_birimi_kapat(exc):
+    """after_request çalışmadıysa (yakalanmamış hata) bağlantıyı geri al ve bırak"""
+    try:
+        db.is_birimi_bitir(commit=False)
+    except Exception as e:
+        logger.error(f"İş birimi kapatma hatası: {str(e)}")
+
 
 @app.route('/')
 def index():
@@ -73,8 +245,10 @@ def index():
             'trenler': '/api/trenler',
             'seferler': '/api/seferler',
             'sefer_ara': '/api/seferler/ara',
+            'yolculuk_planla': '/api/yolculuk/planla',
             'rezervasyonlar': '/api/rezervasyonlar',
-            'raporlar': '/api/raporlar'
+            'raporlar': '/api/raporlar',
+            'metrikler': '/metrics'
         }
     })
 
@@ -83,6 +257,7 @@ def health():
     """API sağlık kontrolü"""
     db_ok = True
     db_error = None
+    db.birincilden_oku()
     try:
         db.execute_query("SELECT 1", fetch=True)
     except Exception as e:
@@ -92,35 +267,50 @@ def health():
         'status': 'healthy' if db_ok else 'degraded',
         'db': 'ok' if db_ok else 'error',
         'error': db_error,
+        'cache': db.cache.istatistikler(),
+        'pool': db.havuz_istatistikleri(),
+        'replikalar': db.replika_durumu(),
+        'kullanicilar': kullanici_onbellegi.durum(),
+        'sifre_havuzu': sifre_havuzu.durum(),
         'timestamp': datetime.now().isoformat()
     })
 
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrikleri (text exposition format)"""
+    return app.response_class(metrikler.metin(), content_type=metrikler.ICERIK_TIPI)
+
 @app.route('/api/istasyonlar', methods=['GET'])
+@kosullu_get(lambda: etag_olustur('istasyon', db.tablo_versiyonu('Istasyon')))
 def get_istasyonlar():
     """Tüm istasyonları listele"""
     try:
-        query = "SELECT * FROM Istasyon ORDER BY sehir, ad"
-        istasyonlar = db.execute_query(query, fetch=True)
-        return jsonify({
-            'success': True,
-            'data': istasyonlar,
-            'count': len(istasyonlar)
-        })
+        siralama = [('sehir', 'sehir', False), ('ad', 'ad', False), ('istasyon_id', 'istasyon_id', False)]
+        bicim = akis_bicimi(request.args)
+        sayfa = None if bicim else sayfa_parametreleri(request.args, siralama)
+        query, params = sorgu_olustur("SELECT * FROM Istasyon", [], [], siralama, sayfa)
+        if bicim:
+            return akis_yaniti(db.stream_query(query, params), bicim, 'istasyonlar')
+        istasyonlar = db.execute_query(query, params, fetch=True, cache=True)
+        istasyonlar, next_cursor = sayfa_sonucu(istasyonlar, siralama, sayfa)
+        return jsonify(liste_yaniti(istasyonlar, sayfa, next_cursor))
+    except (SayfalamaHatasi, AkisBicimiHatasi) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/istasyonlar/<int:istasyon_id>', methods=['GET'])
 def get_istasyon(istasyon_id):
     """Tek bir istasyonun detaylarını getir"""
     try:
         query = "SELECT * FROM Istasyon WHERE istasyon_id = %s"
-        istasyon = db.execute_query(query, (istasyon_id,), fetch=True)
+        istasyon = db.execute_query(query, (istasyon_id,), fetch=True, cache=True)
         if istasyon:
             return jsonify({'success': True, 'data': istasyon[0]})
         return jsonify({'success': False, 'error': 'İstasyon bulunamadı'}), 404
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/istasyonlar', methods=['POST'])
 def create_istasyon():
@@ -136,7 +326,7 @@ def create_istasyon():
             'istasyon_id': istasyon_id
         }), 201
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/istasyonlar/<int:istasyon_id>', methods=['PUT'])
 def update_istasyon(istasyon_id):
@@ -145,11 +335,12 @@ def update_istasyon(istasyon_id):
         data = request.get_json()
         query = "UPDATE Istasyon SET ad = %s, sehir = %s WHERE istasyon_id = %s"
         rows = db.execute_query(query, (data['ad'], data['sehir'], istasyon_id))
+        db.commit_sonrasi(yolculuk_planlayici.gecersiz_kil)
         if rows > 0:
             return jsonify({'success': True, 'message': 'İstasyon güncellendi'})
         return jsonify({'success': False, 'error': 'İstasyon bulunamadı'}), 404
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/istasyonlar/<int:istasyon_id>', methods=['DELETE'])
 def delete_istasyon(istasyon_id):
@@ -161,31 +352,37 @@ def delete_istasyon(istasyon_id):
             return jsonify({'success': True, 'message': 'İstasyon silindi'})
         return jsonify({'success': False, 'error': 'İstasyon bulunamadı'}), 404
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 
 @app.route('/api/trenler', methods=['GET'])
+@kosullu_get(lambda: etag_olustur('tren', db.tablo_versiyonu('Tren')))
 def get_trenler():
     """Tüm trenleri listele"""
     try:
-        query = "SELECT * FROM Tren ORDER BY kod"
-        trenler = db.execute_query(query, fetch=True)
-        return jsonify({
-            'success': True,
-            'data': trenler,
-            'count': len(trenler)
-        })
+        siralama = [('kod', 'kod', False)]
+        bicim = akis_bicimi(request.args)
+        sayfa = None if bicim else sayfa_parametreleri(request.args, siralama)
+        query, params = sorgu_olustur("SELECT * FROM Tren", [], [], siralama, sayfa)
+        if bicim:
+            return akis_yaniti(db.stream_query(query, params), bicim, 'trenler')
+        trenler = db.execute_query(query, params, fetch=True, cache=True)
+        trenler, next_cursor = sayfa_sonucu(trenler, siralama, sayfa)
+        return jsonify(liste_yaniti(trenler, sayfa, next_cursor))
+    except (SayfalamaHatasi, AkisBicimiHatasi) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/trenler', methods=['POST'])
 def create_tren():
     """Yeni tren ekle"""
     try:
-        if 'user_id' not in session:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
             return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
 
-        if session.get('rol') != 'admin':
+        if kullanici['rol'] != 'admin':
             return jsonify({'success': False, 'error': 'Bu işlem için yetkiniz yok'}), 403
 
         data = request.get_json()
@@ -215,7 +412,7 @@ def create_tren():
             'tren_id': tren_id
         }), 201
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/trenler/<int:tren_id>', methods=['PUT'])
 def update_tren(tren_id):
@@ -224,11 +421,13 @@ def update_tren(tren_id):
         data = request.get_json()
         query = "UPDATE Tren SET kod = %s, koltuk_sayisi = %s WHERE tren_id = %s"
         rows = db.execute_query(query, (data['kod'], data['koltuk_sayisi'], tren_id))
+        db.commit_sonrasi(koltuk_haritasi.gecersiz_kil)
+        db.commit_sonrasi(yolculuk_planlayici.gecersiz_kil)
         if rows > 0:
             return jsonify({'success': True, 'message': 'Tren güncellendi'})
         return jsonify({'success': False, 'error': 'Tren bulunamadı'}), 404
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/trenler/<int:tren_id>', methods=['DELETE'])
 def delete_tren(tren_id):
@@ -236,50 +435,122 @@ def delete_tren(tren_id):
     try:
         query = "DELETE FROM Tren WHERE tren_id = %s"
         rows = db.execute_query(query, (tren_id,))
+        db.commit_sonrasi(koltuk_haritasi.gecersiz_kil)
+        db.commit_sonrasi(yolculuk_planlayici.gecersiz_kil)
         if rows > 0:
             return jsonify({'success': True, 'message': 'Tren silindi'})
         return jsonify({'success': False, 'error': 'Tren bulunamadı'}), 404
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 
 @app.route('/api/seferler', methods=['GET'])
+@kosullu_get(lambda: etag_olustur('sefer', db.tablo_versiyonu('Sefer', 'Istasyon', 'Tren')))
 def get_seferler():
     """Tüm seferleri listele (detaylı view ile)"""
     try:
-        query = "SELECT * FROM vw_sefer_detay ORDER BY kalkis_zamani"
-        seferler = db.execute_query(query, fetch=True)
+        siralama = [('kalkis_zamani', 'kalkis_zamani', False), ('sefer_id', 'sefer_id', False)]
+        bicim = akis_bicimi(request.args)
+        sayfa = None if bicim else sayfa_parametreleri(request.args, siralama)
+        query, params = sorgu_olustur("SELECT * FROM vw_sefer_detay", [], [], siralama, sayfa)
+        if bicim:
+            return akis_yaniti(db.stream_query(query, params), bicim, 'seferler')
+        seferler = db.execute_query(query, params, fetch=True)
+        seferler, next_cursor = sayfa_sonucu(seferler, siralama, sayfa)
         
         for sefer in seferler:
             sefer['kalkis_zamani'] = format_datetime(sefer['kalkis_zamani'])
             sefer['varis_zamani'] = format_datetime(sefer['varis_zamani'])
         
-        return jsonify({
-            'success': True,
-            'data': seferler,
-            'count': len(seferler)
-        })
+        return jsonify(liste_yaniti(seferler, sayfa, next_cursor))
+    except (SayfalamaHatasi, AkisBicimiHatasi) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
+
+# Sefer arama - Flask ve asyncio (asgi.py) handler'ları aynı sorguları kullanır
+ISTASYON_SEHIR_SORGUSU = """
+    SELECT istasyon_id, sehir = %s AS kalkis_mi, sehir = %s AS varis_mi
+    FROM Istasyon
+    WHERE sehir IN (%s, %s)
+"""
+
+def arama_parametreleri(args):
+    """(kalkis_sehir, varis_sehir, gun_baslangic, gun_bitis); hatalıysa ValueError"""
+    kalkis_sehir = args.get('kalkis_sehir')
+    varis_sehir = args.get('varis_sehir')
+    tarih = args.get('tarih')
+
+    if not kalkis_sehir or not varis_sehir or not tarih:
+        raise ValueError('kalkis_sehir, varis_sehir ve tarih zorunludur')
+
+    try:
+        gun_baslangic = datetime.strptime(tarih, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError('Tarih formatı geçersiz (YYYY-MM-DD)')
+    return kalkis_sehir, varis_sehir, gun_baslangic, gun_baslangic + timedelta(days=1)
+
+def sefer_arama_sorgusu(istasyonlar, gun_baslangic, gun_bitis):
+    """
+    ISTASYON_SEHIR_SORGUSU sonucundan sefer sorgusunu üretir: (sql, params);
+    şehirlerden biri için istasyon yoksa None.
+    """
+    kalkis_ids = [i['istasyon_id'] for i in istasyonlar if i['kalkis_mi']]
+    varis_ids = [i['istasyon_id'] for i in istasyonlar if i['varis_mi']]
+    if not kalkis_ids or not varis_ids:
+        return None
+
+    # idx_sefer_guzergah (kalkis_istasyon_id, varis_istasyon_id, kalkis_zamani)
+    # üzerinde aralık taraması; doluluk Sefer üzerindeki sayaçtan okunur.
+    query = f"""
+        SELECT
+            s.sefer_id,
+            s.kalkis_zamani,
+            s.varis_zamani,
+            s.durum,
+            ik.ad AS kalkis_istasyon,
+            ik.sehir AS kalkis_sehir,
+            iv.ad AS varis_istasyon,
+            iv.sehir AS varis_sehir,
+            t.kod AS tren_kodu,
+            t.koltuk_sayisi,
+            s.dolu_koltuk_sayisi,
+            (t.koltuk_sayisi - s.dolu_koltuk_sayisi) AS bos_koltuk_sayisi
+        FROM Sefer s
+        JOIN Istasyon ik ON s.kalkis_istasyon_id = ik.istasyon_id
+        JOIN Istasyon iv ON s.varis_istasyon_id = iv.istasyon_id
+        JOIN Tren t ON s.tren_id = t.tren_id
+        WHERE s.kalkis_istasyon_id IN ({', '.join(['%s'] * len(kalkis_ids))})
+        AND s.varis_istasyon_id IN ({', '.join(['%s'] * len(varis_ids))})
+        AND s.kalkis_zamani >= %s
+        AND s.kalkis_zamani < %s
+        AND s.durum = 'satisa_acik'
+        ORDER BY s.kalkis_zamani
+    """
+    return query, tuple(kalkis_ids) + tuple(varis_ids) + (gun_baslangic, gun_bitis)
 
 @app.route('/api/seferler/ara', methods=['GET'])
 def ara_sefer():
     """Sefer ara (kalkış, varış, tarih)"""
     try:
-        kalkis_sehir = request.args.get('kalkis_sehir')
-        varis_sehir = request.args.get('varis_sehir')
-        tarih = request.args.get('tarih')  
-        
-        query = """
-            SELECT * FROM vw_sefer_detay 
-            WHERE kalkis_sehir = %s 
-            AND varis_sehir = %s 
-            AND DATE(kalkis_zamani) = %s
-            AND durum = 'satisa_acik'
-            ORDER BY kalkis_zamani
-        """
-        
-        seferler = db.execute_query(query, (kalkis_sehir, varis_sehir, tarih), fetch=True)
+        try:
+            kalkis_sehir, varis_sehir, gun_baslangic, gun_bitis = arama_parametreleri(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        # Şehirler önce istasyon id'lerine çözülür (idx_sehir); karşılaştırma
+        # tablo collation'ı ile yapıldığı için İ/ı gibi harfler doğru eşleşir.
+        istasyonlar = db.execute_query(
+            ISTASYON_SEHIR_SORGUSU,
+            (kalkis_sehir, varis_sehir, kalkis_sehir, varis_sehir),
+            fetch=True,
+            cache=True
+        )
+
+        seferler = []
+        sorgu = sefer_arama_sorgusu(istasyonlar, gun_baslangic, gun_bitis)
+        if sorgu:
+            seferler = db.execute_query(*sorgu, fetch=True)
         
         for sefer in seferler:
             sefer['kalkis_zamani'] = format_datetime(sefer['kalkis_zamani'])
@@ -291,59 +562,95 @@ def ara_sefer():
             'count': len(seferler)
         })
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
+
+@app.route('/api/yolculuk/planla', methods=['GET'])
+def planla_yolculuk():
+    """
+    Aktarmalı yolculuk planla (bkz. yolculuk_planlayici)
+    Query params: kalkis_sehir, varis_sehir, tarih, yolcu (varsayılan 1),
+    max_aktarma, min_aktarma_dk, limit
+    """
+    try:
+        try:
+            kalkis_sehir, varis_sehir, gun_baslangic, gun_bitis = arama_parametreleri(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        yolcu = request.args.get('yolcu', 1, type=int)
+        max_aktarma = request.args.get('max_aktarma', type=int)
+        min_aktarma_dk = request.args.get('min_aktarma_dk', type=int)
+        limit = request.args.get('limit', 20, type=int)
+        if yolcu < 1 or (max_aktarma is not None and max_aktarma < 0) \
+                or (min_aktarma_dk is not None and min_aktarma_dk < 0) or not 0 < limit <= 100:
+            return jsonify({'success': False, 'error': 'Geçersiz planlama parametresi'}), 400
+
+        istasyonlar = db.execute_query(
+            ISTASYON_SEHIR_SORGUSU,
+            (kalkis_sehir, varis_sehir, kalkis_sehir, varis_sehir),
+            fetch=True,
+            cache=True
+        )
+        yolculuklar = yolculuk_planlayici.planla(
+            [i['istasyon_id'] for i in istasyonlar if i['kalkis_mi']],
+            [i['istasyon_id'] for i in istasyonlar if i['varis_mi']],
+            gun_baslangic, gun_bitis,
+            yolcu=yolcu,
+            max_bacak=None if max_aktarma is None else max_aktarma + 1,
+            min_aktarma_dk=min_aktarma_dk,
+            limit=limit
+        )
+
+        for yolculuk in yolculuklar:
+            yolculuk['kalkis_zamani'] = format_datetime(yolculuk['kalkis_zamani'])
+            yolculuk['varis_zamani'] = format_datetime(yolculuk['varis_zamani'])
+            for bacak in yolculuk['bacaklar']:
+                bacak['kalkis_zamani'] = format_datetime(bacak['kalkis_zamani'])
+                bacak['varis_zamani'] = format_datetime(bacak['varis_zamani'])
+
+        return jsonify({
+            'success': True,
+            'data': yolculuklar,
+            'count': len(yolculuklar)
+        })
+    except Exception as e:
+        return hata_yaniti(e)
+
+def koltuk_haritasi_etag(sefer_id):
+    harita = koltuk_haritasi.getir(sefer_id)
+    if harita is None:
+        return None
+    return etag_olustur('koltuk', sefer_id, harita.versiyon)
 
 @app.route('/api/seferler/<int:sefer_id>/koltuklar', methods=['GET'])
+@kosullu_get(koltuk_haritasi_etag)
 def get_sefer_koltuklar(sefer_id):
     """Seferdeki dolu ve boş koltukları getir"""
     try:
-        query1 = """
-            SELECT t.koltuk_sayisi 
-            FROM Sefer s 
-            JOIN Tren t ON s.tren_id = t.tren_id 
-            WHERE s.sefer_id = %s
-        """
-        result = db.execute_query(query1, (sefer_id,), fetch=True)
-        
-        if not result:
+        harita = koltuk_haritasi.getir(sefer_id)
+        if harita is None:
             return jsonify({'success': False, 'error': 'Sefer bulunamadı'}), 404
-        
-        toplam_koltuk = result[0]['koltuk_sayisi']
-        
-        query2 = """
-            SELECT koltuk_no, durum 
-            FROM Bilet 
-            WHERE sefer_id = %s AND durum != 'iade'
-        """
-        dolu_koltuklar = db.execute_query(query2, (sefer_id,), fetch=True)
-        dolu_koltuk_nolar = [k['koltuk_no'] for k in dolu_koltuklar]
-        
-        koltuklar = []
-        for i in range(1, toplam_koltuk + 1):
-            koltuklar.append({
-                'koltuk_no': i,
-                'durum': 'dolu' if i in dolu_koltuk_nolar else 'bos'
-            })
-        
+
         return jsonify({
             'success': True,
             'sefer_id': sefer_id,
-            'toplam_koltuk': toplam_koltuk,
-            'dolu_koltuk_sayisi': len(dolu_koltuk_nolar),
-            'bos_koltuk_sayisi': toplam_koltuk - len(dolu_koltuk_nolar),
-            'koltuklar': koltuklar
+            'toplam_koltuk': harita.toplam_koltuk,
+            'dolu_koltuk_sayisi': harita.dolu_sayisi,
+            'bos_koltuk_sayisi': harita.toplam_koltuk - harita.dolu_sayisi,
+            'koltuklar': harita.koltuk_listesi()
         })
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/seferler', methods=['POST'])
 def create_sefer():
     """Yeni sefer oluştur"""
     try:
-        if 'user_id' not in session:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
             return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
-        
-        if session.get('rol') != 'admin':
+
+        if kullanici['rol'] != 'admin':
             return jsonify({'success': False, 'error': 'Bu işlem için yetkiniz yok'}), 403
 
         data = request.get_json()
@@ -399,13 +706,138 @@ def create_sefer():
             data.get('durum', 'satisa_acik')
         ))
         sefer_id = db.get_last_insert_id()
+        db.commit_sonrasi(lambda: yolculuk_planlayici.sefer_degisti(sefer_id))
         return jsonify({
             'success': True,
             'message': 'Sefer başarıyla oluşturuldu',
             'sefer_id': sefer_id
         }), 201
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
+
+@app.route('/api/seferler/toplu', methods=['POST'])
+def create_sefer_toplu():
+    """
+    Tekrar kurallarından toplu sefer oluştur (bkz. sefer_takvimi)
+    Body: {"kurallar": [{...}, ...], "onizleme": false}
+    onizleme=true ise doğrulama ve çakışma kontrolü yapılır, sefer eklenmez.
+    """
+    try:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
+            return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
+
+        if kullanici['rol'] != 'admin':
+            return jsonify({'success': False, 'error': 'Bu işlem için yetkiniz yok'}), 403
+
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'success': False, 'error': 'Geçersiz istek verisi'}), 400
+
+        onizleme = bool(data.get('onizleme'))
+        try:
+            seferler = istegi_coz(data)
+            adet = toplu_sefer_ekle(db, seferler, onizleme=onizleme)
+        except TakvimHatasi as e:
+            yanit = {'success': False, 'error': str(e)}
+            if e.detay:
+                yanit['conflicts'] = e.detay
+            return jsonify(yanit), e.status
+
+        ozet = {
+            'ilk_kalkis': format_datetime(min(s[3] for s in seferler)),
+            'son_kalkis': format_datetime(max(s[3] for s in seferler)),
+        }
+        if onizleme:
+            return jsonify({'success': True, 'olusturulacak': adet, **ozet})
+        db.commit_sonrasi(yolculuk_planlayici.gecersiz_kil)
+        return jsonify({
+            'success': True,
+            'message': f'{adet} sefer oluşturuldu',
+            'eklenen': adet,
+            **ozet
+        }), 201
+    except Exception as e:
+        return hata_yaniti(e)
+
+@app.route('/api/ice-aktar/<tur>', methods=['POST'])
+def ice_aktar_endpoint(tur):
+    """
+    CSV / NDJSON gövdesini parti parti içe aktar (admin, bkz. ice_aktar)
+    Query params: format (csv | ndjson, varsayılan csv), ad, parti, bastan
+    Gövde belleğe alınmadan okunur; her parti ayrı transaction'da commit
+    edilir. Aynı ad ile tekrar gönderilen dosya kaldığı satırdan devam eder.
+    """
+    try:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
+            return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
+
+        if kullanici['rol'] != 'admin':
+            return jsonify({'success': False, 'error': 'Bu işlem için yetkiniz yok'}), 403
+
+        if tur not in AKTARICILAR:
+            return jsonify({'success': False, 'error': 'Bilinmeyen veri türü'}), 404
+
+        bicim = akis_bicimi(request.args) or 'csv'
+        parti = request.args.get('parti', ICE_AKTAR_PARTI_BOYUTU, type=int)
+        if not 0 < parti <= 50000:
+            return jsonify({'success': False, 'error': 'parti 1-50000 arasında olmalıdır'}), 400
+
+        def ilerleme(ozet):
+            logger.info(
+                f"İçe aktarım {ozet['ad']}: satır {ozet['son_satir']}, {ozet['eklenen']} eklendi, "
+                f"{ozet['hatali']} hatalı ({ozet['sure_sn']} sn)"
+            )
+
+        akis = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+        ozet = ice_aktar(
+            db, tur, akis, bicim,
+            ad=request.args.get('ad'),
+            parti_boyutu=parti,
+            bastan=request.args.get('bastan') in ('1', 'true'),
+            ilerleme=ilerleme
+        )
+        if tur == 'bilet':
+            koltuk_haritasi.gecersiz_kil()
+        return jsonify({'success': True, **ozet})
+    except AkisBicimiHatasi as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'error': 'Gövde UTF-8 olmalıdır'}), 400
+    except Exception as e:
+        return hata_yaniti(e)
+
+SEFER_DURUMLARI = ('planli', 'satisa_acik', 'iptal', 'tamamlandi')
+
+@app.route('/api/seferler/<int:sefer_id>/durum', methods=['PUT'])
+def update_sefer_durum(sefer_id):
+    """
+    Sefer durumunu değiştir (admin)
+    Body: {"durum": "planli" | "satisa_acik" | "iptal" | "tamamlandi"}
+    """
+    try:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
+            return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
+
+        if kullanici['rol'] != 'admin':
+            return jsonify({'success': False, 'error': 'Bu işlem için yetkiniz yok'}), 403
+
+        data = request.get_json(silent=True) or {}
+        durum = data.get('durum')
+        if durum not in SEFER_DURUMLARI:
+            return jsonify({'success': False, 'error': f'durum {" / ".join(SEFER_DURUMLARI)} olmalıdır'}), 400
+
+        rows = db.execute_query("UPDATE Sefer SET durum = %s WHERE sefer_id = %s", (durum, sefer_id))
+        if rows == 0:
+            found = db.execute_query("SELECT 1 FROM Sefer WHERE sefer_id = %s", (sefer_id,), fetch=True)
+            if not found:
+                return jsonify({'success': False, 'error': 'Sefer bulunamadı'}), 404
+        db.commit_sonrasi(lambda: yolculuk_planlayici.sefer_degisti(sefer_id))
+        return jsonify({'success': True, 'message': 'Sefer durumu güncellendi', 'durum': durum})
+    except Exception as e:
+        return hata_yaniti(e)
 
 @app.route('/api/seferler/<int:sefer_id>', methods=['DELETE'])
 def delete_sefer(sefer_id):
@@ -413,26 +845,32 @@ def delete_sefer(sefer_id):
     try:
         query = "DELETE FROM Sefer WHERE sefer_id = %s"
         rows = db.execute_query(query, (sefer_id,))
+        db.commit_sonrasi(lambda: koltuk_haritasi.gecersiz_kil(sefer_id))
+        db.commit_sonrasi(lambda: yolculuk_planlayici.sefer_degisti(sefer_id))
         if rows > 0:
             return jsonify({'success': True, 'message': 'Sefer silindi'})
         return jsonify({'success': False, 'error': 'Sefer bulunamadı'}), 404
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 
 @app.route('/api/yolcular', methods=['GET'])
 def get_yolcular():
     """Tüm yolcuları listele"""
     try:
-        query = "SELECT * FROM Yolcu ORDER BY ad_soyad"
-        yolcular = db.execute_query(query, fetch=True)
-        return jsonify({
-            'success': True,
-            'data': yolcular,
-            'count': len(yolcular)
-        })
+        siralama = [('ad_soyad', 'ad_soyad', False), ('yolcu_id', 'yolcu_id', False)]
+        bicim = akis_bicimi(request.args)
+        sayfa = None if bicim else sayfa_parametreleri(request.args, siralama)
+        query, params = sorgu_olustur("SELECT * FROM Yolcu", [], [], siralama, sayfa)
+        if bicim:
+            return akis_yaniti(db.stream_query(query, params), bicim, 'yolcular')
+        yolcular = db.execute_query(query, params, fetch=True)
+        yolcular, next_cursor = sayfa_sonucu(yolcular, siralama, sayfa)
+        return jsonify(liste_yaniti(yolcular, sayfa, next_cursor))
+    except (SayfalamaHatasi, AkisBicimiHatasi) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/yolcular', methods=['POST'])
 def create_yolcu():
@@ -465,48 +903,70 @@ def create_yolcu():
             }
         }), 201
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 
 @app.route('/api/rezervasyonlar', methods=['GET'])
 def get_rezervasyonlar():
     """Tüm rezervasyonları listele"""
     try:
-        if 'user_id' not in session:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
             return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
 
-        user_id = session['user_id']
-        is_admin = session.get('rol') == 'admin'
-
-        query = "SELECT * FROM vw_rezervasyon_ozet"
-        params = ()
+        user_id = kullanici['kullanici_id']
+        is_admin = kullanici['rol'] == 'admin'
+
+        # vw_rezervasyon_ozet ile aynı kolonlar; view GROUP BY içerdiği için
+        # keyset koşulu ve LIMIT doğrudan Rezervasyon tablosuna uygulanır.
+        select_from = """
+            SELECT
+                r.rezervasyon_id,
+                r.kullanici_id,
+                r.pnr,
+                r.olusturulma_zamani,
+                r.toplam_tutar,
+                r.durum AS rezervasyon_durum,
+                (SELECT COUNT(*) FROM Bilet b WHERE b.rezervasyon_id = r.rezervasyon_id) AS bilet_sayisi,
+                o.durum AS odeme_durum,
+                o.yontem AS odeme_yontem
+            FROM Rezervasyon r
+            LEFT JOIN Odeme o ON r.rezervasyon_id = o.rezervasyon_id
+        """
+        kosullar, params = [], []
         if not is_admin:
-            query += " WHERE kullanici_id = %s"
-            params = (user_id,)
-        query += " ORDER BY olusturulma_zamani DESC"
+            kosullar.append("r.kullanici_id = %s")
+            params.append(user_id)
 
+        siralama = [('r.olusturulma_zamani', 'olusturulma_zamani', True), ('r.rezervasyon_id', 'rezervasyon_id', True)]
+        bicim = akis_bicimi(request.args)
+        sayfa = None if bicim else sayfa_parametreleri(request.args, siralama)
+        query, params = sorgu_olustur(select_from, kosullar, params, siralama, sayfa)
+
+        if bicim:
+            return akis_yaniti(db.stream_query(query, params), bicim, 'rezervasyonlar')
         rezervasyonlar = db.execute_query(query, params, fetch=True)
+        rezervasyonlar, next_cursor = sayfa_sonucu(rezervasyonlar, siralama, sayfa)
         
         for r in rezervasyonlar:
             r['olusturulma_zamani'] = format_datetime(r['olusturulma_zamani'])
         
-        return jsonify({
-            'success': True,
-            'data': rezervasyonlar,
-            'count': len(rezervasyonlar)
-        })
+        return jsonify(liste_yaniti(rezervasyonlar, sayfa, next_cursor))
+    except (SayfalamaHatasi, AkisBicimiHatasi) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/rezervasyonlar/<pnr>', methods=['GET'])
 def get_rezervasyon_by_pnr(pnr):
     """PNR koduyla rezervasyon sorgula"""
     try:
-        if 'user_id' not in session:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
             return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
 
-        user_id = session['user_id']
-        is_admin = session.get('rol') == 'admin'
+        user_id = kullanici['kullanici_id']
+        is_admin = kullanici['rol'] == 'admin'
 
         query1 = """
             SELECT r.*, o.yontem as odeme_yontem, o.durum as odeme_durum
@@ -554,7 +1014,7 @@ def get_rezervasyon_by_pnr(pnr):
             }
         })
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/rezervasyonlar', methods=['POST'])
 def create_rezervasyon():
@@ -570,179 +1030,131 @@ def create_rezervasyon():
     }
     """
     try:
-        if 'user_id' not in session:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
             return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
 
-        user_id = session['user_id']
+        user_id = kullanici['kullanici_id']
         data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'error': 'Geçersiz istek verisi'}), 400
 
-        conflicts = []
-        for bilet in data.get('biletler', []):
-            check = db.execute_query(
-                "SELECT 1 FROM Bilet WHERE sefer_id = %s AND koltuk_no = %s AND durum != 'iade' LIMIT 1",
-                (bilet['sefer_id'], bilet['koltuk_no']),
-                fetch=True
+        try:
+            pnr_ayirici.hazirla()
+            sonuc = rezervasyon_olustur(
+                db, user_id, data.get('yolcular') or [], data.get('biletler') or [], pnr_ayirici.sonraki
             )
-            if check:
-                conflicts.append({
-                    'sefer_id': bilet['sefer_id'],
-                    'koltuk_no': bilet['koltuk_no']
-                })
-        if conflicts:
+        except KoltukCakismasi as e:
+            metrikler.rezervasyon_sonucu('cakisma')
             return jsonify({
                 'success': False,
-                'error': 'Seçilen koltuklardan bazıları dolu.',
-                'conflicts': conflicts
-            }), 409
+                'error': str(e),
+                'conflicts': e.conflicts
+            }), e.status
+        except RezervasyonHatasi as e:
+            metrikler.rezervasyon_sonucu('gecersiz')
+            return jsonify({'success': False, 'error': str(e)}), e.status
 
-        yolcu_ids = []
-        for yolcu_data in data['yolcular']:
-            query_check = "SELECT yolcu_id FROM Yolcu WHERE eposta = %s"
-            existing = db.execute_query(query_check, (yolcu_data['eposta'],), fetch=True)
+        metrikler.rezervasyon_sonucu('basarili')
+        koltuk_haritasi.isaretle_dolu(sonuc['koltuklar'])
 
-            if existing:
-                yolcu_ids.append(existing[0]['yolcu_id'])
-            else:
-                query_yolcu = "INSERT INTO Yolcu (ad_soyad, eposta, telefon) VALUES (%s, %s, %s)"
-                db.execute_query(query_yolcu, (
-                    yolcu_data['ad_soyad'],
-                    yolcu_data['eposta'],
-                    yolcu_data.get('telefon', '')
-                ))
-                yolcu_ids.append(db.get_last_insert_id())
-
-        max_pnr_attempts = 10
-        rezervasyon_id = None
-        pnr = None
-        for attempt in range(max_pnr_attempts):
-            pnr = generate_pnr()
-            try:
-                query_rez = "INSERT INTO Rezervasyon (pnr, durum, kullanici_id) VALUES (%s, 'olusturuldu', %s)"
-                db.execute_query(query_rez, (pnr, user_id))
-                rezervasyon_id = db.get_last_insert_id()
-                break 
-            except Exception as pnr_error:
-                if 'Duplicate entry' in str(pnr_error) or 'UNIQUE' in str(pnr_error):
-                    if attempt == max_pnr_attempts - 1:
-                        raise Exception("PNR oluşturulamadı. Lütfen tekrar deneyin.")
-                    continue  
-                else:
-                    raise  
-        
-        if not rezervasyon_id:
-            raise Exception("Rezervasyon oluşturulamadı.")
-
-        eklenen_biletler = []
-        try: 
-            for bilet_data in data['biletler']:
-                yolcu_id = yolcu_ids[bilet_data['yolcu_index']]
-                
-                final_check = db.execute_query(
-                    "SELECT 1 FROM Bilet WHERE sefer_id = %s AND koltuk_no = %s AND durum != 'iade' LIMIT 1",
-                    (bilet_data['sefer_id'], bilet_data['koltuk_no']),
-                    fetch=True
-                )
-                if final_check:
-                    if eklenen_biletler:
-                        db.execute_query("UPDATE Bilet SET durum = 'iade' WHERE bilet_id IN (%s)" % 
-                                        ','.join(['%s'] * len(eklenen_biletler)), tuple(eklenen_biletler))
-                    db.execute_query("UPDATE Rezervasyon SET durum = 'iptal' WHERE rezervasyon_id = %s", (rezervasyon_id,))
-                    return jsonify({
-                        'success': False,
-                        'error': f'Koltuk {bilet_data["koltuk_no"]} artık dolu. Lütfen başka bir koltuk seçin.'
-                    }), 409
-                
-                query_bilet = """
-                    INSERT INTO Bilet 
-                    (rezervasyon_id, sefer_id, yolcu_id, koltuk_no, fiyat, durum) 
-                    VALUES (%s, %s, %s, %s, %s, 'rezerve')
-                """
-                try:
-                    db.execute_query(query_bilet, (
-                        rezervasyon_id,
-                        bilet_data['sefer_id'],
-                        yolcu_id,
-                        bilet_data['koltuk_no'],
-                        bilet_data['fiyat']
-                    ))
-                    bilet_id = db.get_last_insert_id()
-                    eklenen_biletler.append(bilet_id)
-                except Exception as insert_error:
-                    if 'Duplicate entry' in str(insert_error) or 'UNIQUE' in str(insert_error):
-                        if eklenen_biletler:
-                            db.execute_query("UPDATE Bilet SET durum = 'iade' WHERE bilet_id IN (%s)" % 
-                                            ','.join(['%s'] * len(eklenen_biletler)), tuple(eklenen_biletler))
-                        db.execute_query("UPDATE Rezervasyon SET durum = 'iptal' WHERE rezervasyon_id = %s", (rezervasyon_id,))
-                        return jsonify({
-                            'success': False,
-                            'error': f'Koltuk {bilet_data["koltuk_no"]} zaten rezerve edilmiş.'
-                        }), 409
-                    raise  
-        except Exception as bilet_error:
-            if eklenen_biletler:
-                try:
-                    db.execute_query("UPDATE Bilet SET durum = 'iade' WHERE bilet_id IN (%s)" % 
-                                    ','.join(['%s'] * len(eklenen_biletler)), tuple(eklenen_biletler))
-                    db.execute_query("UPDATE Rezervasyon SET durum = 'iptal' WHERE rezervasyon_id = %s", (rezervasyon_id,))
-                except:
-                    pass 
-            raise  
+        return jsonify({
+            'success': True,
+            'message': 'Rezervasyon başarıyla oluşturuldu',
+            'data': {
+                'rezervasyon_id': sonuc['rezervasyon_id'],
+                'pnr': sonuc['pnr'],
+                'toplam_tutar': float(sonuc['toplam_tutar']),
+                'durum': 'olusturuldu'
+            }
+        }), 201
+    except Exception as e:
+        metrikler.rezervasyon_sonucu('hata')
+        return hata_yaniti(e)
 
-       
-        query_tutar = """
-            SELECT SUM(fiyat) as toplam 
-            FROM Bilet 
-            WHERE rezervasyon_id = %s
-        """
-        tutar_result = db.execute_query(query_tutar, (rezervasyon_id,), fetch=True)
-        toplam_tutar = tutar_result[0]['toplam']
+@app.route('/api/rezervasyonlar/otomatik', methods=['POST'])
+def create_otomatik_rezervasyon():
+    """
+    Koltukları sunucunun seçtiği rezervasyon (grup rezervasyonları için)
+    Body: {
+        "sefer_id": 1,
+        "yolcular": [{"ad_soyad": "...", "eposta": "...", "telefon": "..."}],
+        "fiyat": 250.00,
+        "tercih": {"bolge": "on" | "arka", "bitisik": true}
+    }
+    """
+    try:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
+            return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'error': 'Geçersiz istek verisi'}), 400
+
+        # Süreç içi bitmap'ten boş aralıklar ipucu olarak verilir; motor
+        # seçilen bloğu kilit altında doğrular, eskiyse veritabanından seçer
+        araliklar = None
+        sefer_id = data.get('sefer_id')
+        if isinstance(sefer_id, int):
+            harita = koltuk_haritasi.getir(sefer_id)
+            if harita is not None:
+                araliklar = harita.bos_araliklar()
+
+        try:
+            pnr_ayirici.hazirla()
+            sonuc = otomatik_rezervasyon_olustur(
+                db, kullanici['kullanici_id'], sefer_id, data.get('yolcular') or [],
+                data.get('fiyat'), data.get('tercih'), pnr_ayirici.sonraki, araliklar
+            )
+        except RezervasyonHatasi as e:
+            metrikler.rezervasyon_sonucu('cakisma' if e.status == 409 else 'gecersiz')
+            return jsonify({'success': False, 'error': str(e)}), e.status
+
+        metrikler.rezervasyon_sonucu('basarili')
+        koltuk_haritasi.isaretle_dolu(sonuc['koltuklar'])
 
         return jsonify({
             'success': True,
             'message': 'Rezervasyon başarıyla oluşturuldu',
             'data': {
-                'rezervasyon_id': rezervasyon_id,
-                'pnr': pnr,
-                'toplam_tutar': float(toplam_tutar),
-                'durum': 'olusturuldu'
+                'rezervasyon_id': sonuc['rezervasyon_id'],
+                'pnr': sonuc['pnr'],
+                'toplam_tutar': float(sonuc['toplam_tutar']),
+                'durum': 'olusturuldu',
+                'koltuklar': [koltuk_no for _, koltuk_no in sonuc['koltuklar']]
             }
         }), 201
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        metrikler.rezervasyon_sonucu('hata')
+        return hata_yaniti(e)
 
 @app.route('/api/rezervasyonlar/<int:rezervasyon_id>/iptal', methods=['POST'])
 def iptal_rezervasyon(rezervasyon_id):
     """Rezervasyonu iptal et"""
     try:
-        if 'user_id' not in session:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
             return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
 
-        user_id = session['user_id']
-        is_admin = session.get('rol') == 'admin'
+        user_id = kullanici['kullanici_id']
+        is_admin = kullanici['rol'] == 'admin'
 
-        kontrol = db.execute_query(
-            "SELECT kullanici_id FROM Rezervasyon WHERE rezervasyon_id = %s",
-            (rezervasyon_id,),
-            fetch=True
-        )
-        if not kontrol:
-            return jsonify({'success': False, 'error': 'Rezervasyon bulunamadı'}), 404
+        try:
+            sonuc = db.adimlari_calistir(lambda: iptal_adimlari(rezervasyon_id, user_id, is_admin))
+        except RezervasyonHatasi as e:
+            return jsonify({'success': False, 'error': str(e)}), e.status
 
-        if not is_admin and kontrol[0]['kullanici_id'] != user_id:
-            return jsonify({'success': False, 'error': 'Bu rezervasyonu iptal etme yetkiniz yok'}), 403
+        koltuk_haritasi.isaretle_bos(sonuc['iade_koltuklar'])
+        rezervasyon = sonuc['rezervasyon']
 
-        query1 = "UPDATE Rezervasyon SET durum = 'iptal' WHERE rezervasyon_id = %s"
-        db.execute_query(query1, (rezervasyon_id,))
-        
-        query2 = "UPDATE Bilet SET durum = 'iade' WHERE rezervasyon_id = %s"
-        db.execute_query(query2, (rezervasyon_id,))
-        
         return jsonify({
             'success': True,
-            'message': 'Rezervasyon iptal edildi'
+            'message': 'Rezervasyon iptal edildi',
+            'data': {**rezervasyon, 'toplam_tutar': float(rezervasyon['toplam_tutar'])}
         })
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/odemeler', methods=['POST'])
 def create_odeme():
@@ -755,71 +1167,37 @@ def create_odeme():
     }
     """
     try:
-        if 'user_id' not in session:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
             return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
 
-        user_id = session['user_id']
-        is_admin = session.get('rol') == 'admin'
+        user_id = kullanici['kullanici_id']
+        is_admin = kullanici['rol'] == 'admin'
         data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'error': 'Geçersiz istek verisi'}), 400
 
-        query_rez = "SELECT toplam_tutar, durum, kullanici_id FROM Rezervasyon WHERE rezervasyon_id = %s"
-        rez_result = db.execute_query(query_rez, (data['rezervasyon_id'],), fetch=True)
-
-        if not rez_result:
-            return jsonify({'success': False, 'error': 'Rezervasyon bulunamadı'}), 404
-
-        if not is_admin and rez_result[0]['kullanici_id'] != user_id:
-            return jsonify({'success': False, 'error': 'Bu rezervasyon için işlem yapma yetkiniz yok'}), 403
-
-        if rez_result[0]['durum'] == 'odendi':
-            return jsonify({'success': False, 'error': 'Rezervasyon zaten ödenmiş'}), 400
-
-        odeme_var_mi = db.execute_query(
-            "SELECT odeme_id FROM Odeme WHERE rezervasyon_id = %s",
-            (data['rezervasyon_id'],),
-            fetch=True
-        )
-        if odeme_var_mi:
-            return jsonify({'success': False, 'error': 'Bu rezervasyon için ödeme zaten mevcut'}), 400
-
-        toplam_tutar = float(rez_result[0]['toplam_tutar'])
-
-        if abs(float(data['tutar']) - toplam_tutar) > 0.01:
-            return jsonify({
-                'success': False,
-                'error': f'Ödeme tutarı rezervasyon tutarı ile eşleşmiyor. Beklenen: {toplam_tutar}'
-            }), 400
-
-        query_odeme = """
-            INSERT INTO Odeme 
-            (rezervasyon_id, yontem, tutar, durum) 
-            VALUES (%s, %s, %s, 'basarili')
-        """
-        db.execute_query(query_odeme, (
-            data['rezervasyon_id'],
-            data['yontem'],
-            data['tutar']
-        ))
-        odeme_id = db.get_last_insert_id()
-
-        # Rezervasyon durumunu güncelleme kısmı
-        query_update_rez = "UPDATE Rezervasyon SET durum = 'odendi' WHERE rezervasyon_id = %s"
-        db.execute_query(query_update_rez, (data['rezervasyon_id'],))
+        try:
+            sonuc = db.adimlari_calistir(lambda: odeme_adimlari(
+                data['rezervasyon_id'], user_id, is_admin, data['yontem'], data['tutar']
+            ))
+        except RezervasyonHatasi as e:
+            return jsonify({'success': False, 'error': str(e)}), e.status
 
-        
-        query_update_bilet = "UPDATE Bilet SET durum = 'kesildi' WHERE rezervasyon_id = %s"
-        db.execute_query(query_update_bilet, (data['rezervasyon_id'],))
+        koltuk_haritasi.isaretle_dolu(sonuc['koltuklar'])
+        rezervasyon = sonuc['rezervasyon']
 
         return jsonify({
             'success': True,
             'message': 'Ödeme başarıyla tamamlandı',
             'data': {
-                'odeme_id': odeme_id,
-                'durum': 'basarili'
+                'odeme_id': sonuc['odeme_id'],
+                'durum': 'basarili',
+                'rezervasyon': {**rezervasyon, 'toplam_tutar': float(rezervasyon['toplam_tutar'])}
             }
         }), 201
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 
 @app.route('/api/raporlar/sefer-doluluk', methods=['GET'])
@@ -842,6 +1220,10 @@ def rapor_sefer_doluluk():
             WHERE durum = 'satisa_acik'
             ORDER BY kalkis_zamani
         """
+
+        bicim = akis_bicimi(request.args)
+        if bicim:
+            return akis_yaniti(db.stream_query(query), bicim, 'sefer-doluluk')
         
         sonuclar = db.execute_query(query, fetch=True)
         
@@ -868,8 +1250,10 @@ def rapor_sefer_doluluk():
             'count': len(data)
         })
     except Exception as e:
+        if isinstance(e, AkisBicimiHatasi):
+            return jsonify({'success': False, 'error': str(e)}), 400
         logger.error(f"Sefer doluluk raporu hatası: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/raporlar/gelir-ozeti', methods=['GET'])
 def rapor_gelir_ozeti():
@@ -917,6 +1301,11 @@ def rapor_gelir_ozeti():
             params_hat = [baslangic, bitis]
         
         query_hat += " GROUP BY kalkis_sehir, varis_sehir ORDER BY gelir DESC"
+
+        # Akış modunda sadece hat bazlı satırlar yazılır
+        bicim = akis_bicimi(request.args)
+        if bicim:
+            return akis_yaniti(db.stream_query(query_hat, tuple(params_hat)), bicim, 'gelir-ozeti')
         
         hat_result = db.execute_query(query_hat, tuple(params_hat), fetch=True)
         
@@ -937,8 +1326,10 @@ def rapor_gelir_ozeti():
                 'en_cok_gelir_getiren_hat': hat_result[0] if hat_result else None
             }
         })
+    except AkisBicimiHatasi as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
 
 @app.route('/api/raporlar/bilet-istatistik', methods=['GET'])
 def rapor_bilet_istatistik():
@@ -952,6 +1343,11 @@ def rapor_bilet_istatistik():
             FROM Bilet
             GROUP BY durum
         """
+
+        bicim = akis_bicimi(request.args)
+        if bicim:
+            return akis_yaniti(db.stream_query(query), bicim, 'bilet-istatistik')
+
         sonuclar = db.execute_query(query, fetch=True)
         
         for s in sonuclar:
@@ -961,8 +1357,125 @@ def rapor_bilet_istatistik():
             'success': True,
             'data': sonuclar
         })
+    except AkisBicimiHatasi as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return hata_yaniti(e)
+
+
+DISA_AKTARMA_SORGULARI = {
+    'biletler': """
+        SELECT bilet_id, rezervasyon_id, sefer_id, yolcu_id, koltuk_no, fiyat, durum, created_at
+        FROM Bilet
+        ORDER BY bilet_id
+    """,
+    'rezervasyonlar': """
+        SELECT rezervasyon_id, pnr, kullanici_id, olusturulma_zamani, toplam_tutar, durum
+        FROM Rezervasyon
+        ORDER BY rezervasyon_id
+    """,
+    'odemeler': """
+        SELECT odeme_id, rezervasyon_id, yontem, tutar, durum, odeme_zamani
+        FROM Odeme
+        ORDER BY odeme_id
+    """,
+}
+
+@app.route('/api/raporlar/disa-aktar/<tablo>', methods=['GET'])
+def rapor_disa_aktar(tablo):
+    """
+    Bilet / Rezervasyon / Ödeme tablolarını akış olarak dışa aktar (admin)
+    Query params: format (ndjson | csv, varsayılan ndjson)
+    """
+    try:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
+            return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
+
+        if kullanici['rol'] != 'admin':
+            return jsonify({'success': False, 'error': 'Bu işlem için yetkiniz yok'}), 403
+
+        query = DISA_AKTARMA_SORGULARI.get(tablo)
+        if not query:
+            return jsonify({'success': False, 'error': 'Bilinmeyen tablo'}), 404
+
+        bicim = akis_bicimi(request.args) or 'ndjson'
+        return akis_yaniti(db.stream_query(query), bicim, tablo)
+    except AkisBicimiHatasi as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return hata_yaniti(e)
+
+
+@app.route('/api/raporlar/sorgu-istatistikleri', methods=['GET'])
+def rapor_sorgu_istatistikleri():
+    """
+    Bu süreçte toplam süreye göre en pahalı sorgular (admin)
+    Query params: limit (varsayılan 20)
+    """
+    try:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
+            return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
+
+        if kullanici['rol'] != 'admin':
+            return jsonify({'success': False, 'error': 'Bu işlem için yetkiniz yok'}), 403
+
+        limit = request.args.get('limit', 20, type=int)
+        data = sorgu_olcumu.sorgu_istatistikleri.ozet(limit)
+        return jsonify({'success': True, 'data': data, 'count': len(data)})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return hata_yaniti(e)
+
+
+KULLANICI_ROLLERI = ('kullanici', 'admin')
+
+@app.route('/api/kullanicilar/<int:kullanici_id>', methods=['PUT'])
+def update_kullanici(kullanici_id):
+    """
+    Kullanıcının rolünü / aktifliğini değiştir (admin)
+    Body: {"rol": "kullanici" | "admin", "aktif": true | false}
+    """
+    try:
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
+            return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
+
+        if kullanici['rol'] != 'admin':
+            return jsonify({'success': False, 'error': 'Bu işlem için yetkiniz yok'}), 403
+
+        data = request.get_json(silent=True) or {}
+        alanlar = {}
+        if 'rol' in data:
+            if data['rol'] not in KULLANICI_ROLLERI:
+                return jsonify({'success': False, 'error': f'rol {" / ".join(KULLANICI_ROLLERI)} olmalıdır'}), 400
+            alanlar['rol'] = data['rol']
+        if 'aktif' in data:
+            if not isinstance(data['aktif'], bool):
+                return jsonify({'success': False, 'error': 'aktif true / false olmalıdır'}), 400
+            alanlar['aktif'] = data['aktif']
+        if not alanlar:
+            return jsonify({'success': False, 'error': 'rol ya da aktif alanı gereklidir'}), 400
+        if kullanici_id == kullanici['kullanici_id'] and (
+            alanlar.get('rol', 'admin') != 'admin' or not alanlar.get('aktif', True)
+        ):
+            return jsonify({'success': False, 'error': 'Kendi yetkinizi kaldıramazsınız'}), 400
+
+        atamalar = ', '.join(f'{alan} = %s' for alan in alanlar)
+        rows = db.execute_query(
+            f"UPDATE Kullanici SET {atamalar} WHERE kullanici_id = %s",
+            (*alanlar.values(), kullanici_id)
+        )
+        if rows == 0:
+            found = db.execute_query("SELECT 1 FROM Kullanici WHERE kullanici_id = %s", (kullanici_id,), fetch=True)
+            if not found:
+                return jsonify({'success': False, 'error': 'Kullanıcı bulunamadı'}), 404
+        db.commit_sonrasi(lambda: kullanici_onbellegi.gecersiz_kil(kullanici_id))
+
+        logger.info(f"Kullanıcı güncellendi: {kullanici_id} {alanlar} (yapan: {kullanici['kullanici_id']})")
+        return jsonify({'success': True, 'message': 'Kullanıcı güncellendi', 'data': alanlar})
+    except Exception as e:
+        return hata_yaniti(e)
 
 
 @app.route('/api/auth/register', methods=['POST'])
@@ -980,19 +1493,23 @@ def register():
         kullanici_adi = data['kullanici_adi']
         eposta = data['eposta']
         sifre = data['sifre']
+        if not all(isinstance(data[field], str) for field in required_fields):
+            return jsonify({'success': False, 'error': 'Alanlar metin olmalıdır'}), 400
         ad_soyad = data['ad_soyad']
         telefon = data.get('telefon', '')
 
         existing_user = db.execute_query(
             "SELECT kullanici_id FROM Kullanici WHERE kullanici_adi = %s OR eposta = %s",
             (kullanici_adi, eposta),
-            fetch=True
+            fetch=True,
+            ayri_baglanti=True
         )
 
         if existing_user:
             return jsonify({'success': False, 'error': 'Bu kullanıcı adı veya eposta zaten kullanılıyor'}), 400
 
-        sifre_hash = sifre
+        # Hash süreç havuzunda hesaplanır; istek bu sırada havuzdan bağlantı tutmaz
+        sifre_hash = sifre_havuzu.hashle(sifre)
 
         db.execute_query(
             """INSERT INTO Kullanici (kullanici_adi, eposta, sifre_hash, ad_soyad, telefon, rol)
@@ -1014,7 +1531,7 @@ def register():
 
     except Exception as e:
         logger.error(f"Register hatası: {str(e)}")
-        return jsonify({'success': False, 'error': 'Kayıt sırasında bir hata oluştu'}), 500
+        return hata_yaniti(e, 'Kayıt sırasında bir hata oluştu')
 
 
 @app.route('/api/auth/login', methods=['POST'])
@@ -1028,15 +1545,21 @@ def login():
 
         if not kullanici_adi or not sifre:
             return jsonify({'success': False, 'error': 'Kullanıcı adı ve şifre gereklidir'}), 400
+        if not isinstance(kullanici_adi, str) or not isinstance(sifre, str):
+            return jsonify({'success': False, 'error': 'Kullanıcı adı ve şifre metin olmalıdır'}), 400
 
+        isaret = kullanici_onbellegi.yukleme_isareti()
         user = db.execute_query(
             """SELECT kullanici_id, kullanici_adi, eposta, sifre_hash, ad_soyad, telefon, rol, aktif
                FROM Kullanici WHERE kullanici_adi = %s""",
             (kullanici_adi,),
-            fetch=True
+            fetch=True,
+            ayri_baglanti=True
         )
 
         if not user or len(user) == 0:
+            # Bilinen kullanıcı adıyla aynı sürede dönülür
+            sifre_havuzu.sahte_dogrula(sifre)
             return jsonify({'success': False, 'error': 'Kullanıcı adı veya şifre hatalı'}), 401
 
         user_data = user[0]
@@ -1049,23 +1572,35 @@ def login():
         rol = user_data['rol']
         aktif = user_data['aktif']
 
+        # Şifre kontrolü (süreç havuzunda); eski düz metin kayıt yeni_hash ile değiştirilir
+        gecerli, yeni_hash = sifre_havuzu.dogrula(sifre, sifre_hash)
+        if not gecerli:
+            return jsonify({'success': False, 'error': 'Kullanıcı adı veya şifre hatalı'}), 401
+
         if not aktif:
             return jsonify({'success': False, 'error': 'Hesabınız devre dışı bırakılmış'}), 403
 
-        # Şifre kontrolü
-        if sifre != sifre_hash:
-            return jsonify({'success': False, 'error': 'Kullanıcı adı veya şifre hatalı'}), 401
-
         # Session oluştur
         session.permanent = True
         session['user_id'] = kullanici_id
         session['kullanici_adi'] = kul_adi
-        session['rol'] = rol
-
-        db.execute_query(
-            "UPDATE Kullanici SET last_login = NOW() WHERE kullanici_id = %s",
-            (kullanici_id,)
-        )
+        # Rol oturumda tutulmaz; her istekte kullanici_onbellegi'nden okunur.
+        # Girişten hemen sonraki /api/auth/me sorgusuz dönsün diye kayıt burada kurulur.
+        kullanici_onbellegi.yerlestir(kullanici_id, [{
+            'kullanici_id': kullanici_id, 'kullanici_adi': kul_adi, 'eposta': eposta,
+            'ad_soyad': ad_soyad, 'telefon': telefon, 'rol': rol
+        }], isaret)
+
+        if yeni_hash:
+            db.execute_query(
+                "UPDATE Kullanici SET last_login = NOW(), sifre_hash = %s WHERE kullanici_id = %s",
+                (yeni_hash, kullanici_id)
+            )
+        else:
+            db.execute_query(
+                "UPDATE Kullanici SET last_login = NOW() WHERE kullanici_id = %s",
+                (kullanici_id,)
+            )
 
         logger.info(f"Kullanıcı giriş yaptı: {kul_adi} (Rol: {rol})")
 
@@ -1084,7 +1619,7 @@ def login():
 
     except Exception as e:
         logger.error(f"Login hatası: {str(e)}", exc_info=True)
-        return jsonify({'success': False, 'error': 'Giriş sırasında bir hata oluştu'}), 500
+        return hata_yaniti(e, 'Giriş sırasında bir hata oluştu')
 
 
 @app.route('/api/auth/logout', methods=['POST'])
@@ -1097,7 +1632,7 @@ def logout():
         return jsonify({'success': True, 'message': 'Çıkış başarılı'}), 200
     except Exception as e:
         logger.error(f"Logout hatası: {str(e)}")
-        return jsonify({'success': False, 'error': 'Çıkış sırasında bir hata oluştu'}), 500
+        return hata_yaniti(e, 'Çıkış sırasında bir hata oluştu')
 
 
 @app.route('/api/auth/me', methods=['GET'])
@@ -1107,34 +1642,15 @@ def get_current_user():
         if 'user_id' not in session:
             return jsonify({'success': False, 'error': 'Oturum bulunamadı'}), 401
 
-        user = db.execute_query(
-            """SELECT kullanici_id, kullanici_adi, eposta, ad_soyad, telefon, rol
-               FROM Kullanici WHERE kullanici_id = %s AND aktif = TRUE""",
-            (session['user_id'],),
-            fetch=True
-        )
-
-        if not user or len(user) == 0:
-            session.clear()
+        kullanici = oturum_kullanicisi()
+        if kullanici is None:
             return jsonify({'success': False, 'error': 'Kullanıcı bulunamadı'}), 404
 
-        user_data = user[0]
-
-        return jsonify({
-            'success': True,
-            'data': {
-                'kullanici_id': user_data[0],
-                'kullanici_adi': user_data[1],
-                'eposta': user_data[2],
-                'ad_soyad': user_data[3],
-                'telefon': user_data[4],
-                'rol': user_data[5]
-            }
-        }), 200
+        return jsonify({'success': True, 'data': kullanici}), 200
 
     except Exception as e:
         logger.error(f"Get current user hatası: {str(e)}")
-        return jsonify({'success': False, 'error': 'Kullanıcı bilgileri alınamadı'}), 500
+        return hata_yaniti(e, 'Kullanıcı bilgileri alınamadı')
 
 
 
@@ -1147,6 +1663,18 @@ def internal_error(error):
     return jsonify({'success': False, 'error': 'Sunucu hatası'}), 500
 
 
+def create_app(config=None):
+    """
+    Uygulama fabrikası: WSGI sunucularının giriş noktası (sunucu.py,
+    gunicorn 'app:create_app()'). Route'lar modül düzeyindeki app üzerinde
+    tanımlıdır; fabrika ek ayarları uygular ve aynı uygulamayı döndürür.
+    Veritabanı havuzu burada açılmaz, her worker'da ilk istekte oluşturulur.
+    """
+    if config:
+        app.config.update(config)
+    return app
+
+
 if __name__ == '__main__':
     host = os.getenv('HOST', '127.0.0.1')
     port = int(os.getenv('PORT', 5000))
@@ -1174,7 +1702,7 @@ if __name__ == '__main__':
         "=" * 66
     )
     print(banner, flush=True)
-    logger.info("Flask sunucusu başlatılıyor (app.run)...")
+    logger.info("Flask geliştirme sunucusu başlatılıyor (app.run); üretim için: python sunucu.py")
     try:
         app.run(host=host, port=port, debug=debug, use_reloader=False)
     except Exception:
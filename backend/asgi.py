@@ -0,0 +1,336 @@
+"""
+asyncio (ASGI) sunum modu.
+
+Yoğun endpoint'ler (sefer arama, koltuk haritası, rezervasyon, iptal, ödeme)
+burada AsyncDatabase ile async olarak karşılanır; MySQL beklenirken thread
+tutulmaz. Diğer tüm route'lar aynı süreçteki Flask uygulamasına WSGI
+üzerinden düşer, oturum çerezi iki tarafta da aynıdır (giriş/çıkış Flask'ta).
+
+    uvicorn asgi:app --workers 4
+    WEB_MODU=asgi python sunucu.py
+"""
+import time
+from contextlib import asynccontextmanager
+from functools import wraps
+
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_etags, quote_etag
+
+import metrikler
+import sorgu_olcumu
+from app import (
+    CORS_ORIGINS, ISTASYON_SEHIR_SORGUSU, app as flask_app, arama_parametreleri,
+    etag_olustur, format_datetime, istek_olcumu_logla, sefer_arama_sorgusu
+)
+from async_database import adb
+from database import HavuzZamanAsimi, db
+from koltuk_haritasi import YUKLEME_SORGUSU, koltuk_haritasi
+from kullanici_onbellegi import KULLANICI_SORGUSU, YOK, kullanici_onbellegi
+from odeme_motoru import iptal_adimlari, odeme_adimlari
+from pnr import pnr_ayirici
+from rezervasyon_motoru import KoltukCakismasi, RezervasyonHatasi, rezervasyon_olustur
+
+
+def json_yaniti(veri, status=200, headers=None):
+    """Flask jsonify ile aynı serileştirme (Decimal, tarih vb.)"""
+    return Response(
+        flask_app.json.dumps(veri),
+        status_code=status,
+        headers=headers,
+        media_type='application/json'
+    )
+
+
+def hata_yaniti(e, mesaj=None):
+    if isinstance(e, HavuzZamanAsimi):
+        return json_yaniti(
+            {'success': False, 'error': 'Sunucu yoğun, lütfen tekrar deneyin'},
+            503, {'Retry-After': '1'}
+        )
+    return json_yaniti({'success': False, 'error': mesaj or str(e)}, 500)
+
+
+def route_etiketi(request):
+    """Flask ile aynı metrik etiketi için yolu Flask'ın route şablonuna eşler"""
+    try:
+        kural, _ = flask_app.url_map.bind('').match(
+            request.url.path, method=request.method, return_rule=True
+        )
+        return kural.rule
+    except Exception:
+        return 'eslesmeyen'
+
+
+def olculu(handler):
+    """Flask'taki metrik ve istek_olcumu_* hook'larının karşılığı"""
+    @wraps(handler)
+    async def wrapper(request):
+        baslangic = time.perf_counter()
+        metrikler.istek_baslangici()
+        sorgu_olcumu.istek_olcumu_baslat()
+        try:
+            yanit = await handler(request)
+        finally:
+            metrikler.istek_sonlandi()
+        yanit.headers['Server-Timing'] = istek_olcumu_logla(
+            request.method, request.url.path, handler.__name__, yanit.status_code,
+            baslangic, sorgu_olcumu.istek_olcumu_bitir()
+        )
+        metrikler.istek_bitti(
+            route_etiketi(request), request.method, yanit.status_code, time.perf_counter() - baslangic
+        )
+        return yanit
+    return wrapper
+
+
+def oturum(request):
+    """Flask'ın imzalı oturum çerezini çözer (geçersiz / yoksa boş sözlük)"""
+    cerez = request.cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    if not cerez or serializer is None:
+        return {}
+    try:
+        return serializer.loads(cerez, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return {}
+
+
+async def oturum_kullanicisi(request):
+    """Flask'taki oturum_kullanicisi karşılığı (önbellekte yoksa adb ile yükler)"""
+    kullanici_id = oturum(request).get('user_id')
+    if kullanici_id is None:
+        return None
+    kullanici = kullanici_onbellegi.hazir(kullanici_id)
+    if kullanici is YOK:
+        isaret = kullanici_onbellegi.yukleme_isareti()
+        satirlar = await adb.execute_query(KULLANICI_SORGUSU, (kullanici_id,), fetch=True)
+        kullanici = kullanici_onbellegi.yerlestir(kullanici_id, satirlar, isaret)
+    return kullanici
+
+
+def yazma_isaretle(request, yanit):
+    """
+    Replika varken yazma yapan oturumun çerezine son_yazma ekler; Flask
+    tarafı bu oturumun sonraki okumalarını birincilden yapar (is_birimi_baslat).
+    """
+    if not db.replikalar:
+        return yanit
+    kimlik = dict(oturum(request), son_yazma=time.time())
+    arayuz = flask_app.session_interface
+    yanit.set_cookie(
+        arayuz.get_cookie_name(flask_app),
+        arayuz.get_signing_serializer(flask_app).dumps(kimlik),
+        max_age=int(flask_app.permanent_session_lifetime.total_seconds()) if kimlik.get('_permanent') else None,
+        path=arayuz.get_cookie_path(flask_app),
+        domain=arayuz.get_cookie_domain(flask_app),
+        secure=arayuz.get_cookie_secure(flask_app),
+        httponly=arayuz.get_cookie_httponly(flask_app),
+        samesite=arayuz.get_cookie_samesite(flask_app)
+    )
+    return yanit
+
+
+async def istek_verisi(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+@olculu
+async def ara_sefer(request):
+    """Sefer ara (kalkış, varış, tarih)"""
+    try:
+        try:
+            kalkis_sehir, varis_sehir, gun_baslangic, gun_bitis = arama_parametreleri(request.query_params)
+        except ValueError as e:
+            return json_yaniti({'success': False, 'error': str(e)}, 400)
+
+        istasyonlar = await adb.execute_query(
+            ISTASYON_SEHIR_SORGUSU,
+            (kalkis_sehir, varis_sehir, kalkis_sehir, varis_sehir),
+            fetch=True,
+            cache=True
+        )
+
+        seferler = []
+        sorgu = sefer_arama_sorgusu(istasyonlar, gun_baslangic, gun_bitis)
+        if sorgu:
+            seferler = await adb.execute_query(*sorgu, fetch=True)
+
+        for sefer in seferler:
+            sefer['kalkis_zamani'] = format_datetime(sefer['kalkis_zamani'])
+            sefer['varis_zamani'] = format_datetime(sefer['varis_zamani'])
+
+        return json_yaniti({'success': True, 'data': seferler, 'count': len(seferler)})
+    except Exception as e:
+        return hata_yaniti(e)
+
+
+@olculu
+async def get_sefer_koltuklar(request):
+    """Seferdeki dolu ve boş koltukları getir (If-None-Match destekli)"""
+    sefer_id = request.path_params['sefer_id']
+    try:
+        harita = koltuk_haritasi.hazir(sefer_id)
+        if harita is None:
+            isaret = koltuk_haritasi.yukleme_isareti(sefer_id)
+            satirlar = await adb.execute_query(YUKLEME_SORGUSU, (sefer_id,), fetch=True)
+            harita = koltuk_haritasi.yerlestir(sefer_id, satirlar, isaret)
+        if harita is None:
+            return json_yaniti({'success': False, 'error': 'Sefer bulunamadı'}, 404)
+
+        etag = etag_olustur('koltuk', sefer_id, harita.versiyon)
+        basliklar = {'ETag': quote_etag(etag, weak=True), 'Cache-Control': 'no-cache'}
+        if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+            return Response(status_code=304, headers=basliklar)
+
+        return json_yaniti({
+            'success': True,
+            'sefer_id': sefer_id,
+            'toplam_koltuk': harita.toplam_koltuk,
+            'dolu_koltuk_sayisi': harita.dolu_sayisi,
+            'bos_koltuk_sayisi': harita.toplam_koltuk - harita.dolu_sayisi,
+            'koltuklar': harita.koltuk_listesi()
+        }, headers=basliklar)
+    except Exception as e:
+        return hata_yaniti(e)
+
+
+@olculu
+async def create_rezervasyon(request):
+    """Yeni rezervasyon oluştur (gövde Flask endpoint'i ile aynı)"""
+    try:
+        kullanici = await oturum_kullanicisi(request)
+        if kullanici is None:
+            return json_yaniti({'success': False, 'error': 'Oturum bulunamadı'}, 401)
+
+        data = await istek_verisi(request)
+        if not data:
+            return json_yaniti({'success': False, 'error': 'Geçersiz istek verisi'}, 400)
+
+        try:
+            await pnr_ayirici.ahazirla(adb)
+            sonuc = await rezervasyon_olustur(
+                adb, kullanici['kullanici_id'], data.get('yolcular') or [], data.get('biletler') or [], pnr_ayirici.sonraki
+            )
+        except KoltukCakismasi as e:
+            metrikler.rezervasyon_sonucu('cakisma')
+            return json_yaniti({'success': False, 'error': str(e), 'conflicts': e.conflicts}, e.status)
+        except RezervasyonHatasi as e:
+            metrikler.rezervasyon_sonucu('gecersiz')
+            return json_yaniti({'success': False, 'error': str(e)}, e.status)
+
+        metrikler.rezervasyon_sonucu('basarili')
+        koltuk_haritasi.isaretle_dolu(sonuc['koltuklar'])
+
+        return yazma_isaretle(request, json_yaniti({
+            'success': True,
+            'message': 'Rezervasyon başarıyla oluşturuldu',
+            'data': {
+                'rezervasyon_id': sonuc['rezervasyon_id'],
+                'pnr': sonuc['pnr'],
+                'toplam_tutar': float(sonuc['toplam_tutar']),
+                'durum': 'olusturuldu'
+            }
+        }, 201))
+    except Exception as e:
+        metrikler.rezervasyon_sonucu('hata')
+        return hata_yaniti(e)
+
+
+@olculu
+async def iptal_rezervasyon(request):
+    """Rezervasyonu iptal et"""
+    rezervasyon_id = request.path_params['rezervasyon_id']
+    try:
+        kullanici = await oturum_kullanicisi(request)
+        if kullanici is None:
+            return json_yaniti({'success': False, 'error': 'Oturum bulunamadı'}, 401)
+
+        try:
+            sonuc = await adb.adimlari_calistir(lambda: iptal_adimlari(
+                rezervasyon_id, kullanici['kullanici_id'], kullanici['rol'] == 'admin'
+            ))
+        except RezervasyonHatasi as e:
+            return json_yaniti({'success': False, 'error': str(e)}, e.status)
+
+        koltuk_haritasi.isaretle_bos(sonuc['iade_koltuklar'])
+        rezervasyon = sonuc['rezervasyon']
+        return yazma_isaretle(request, json_yaniti({
+            'success': True,
+            'message': 'Rezervasyon iptal edildi',
+            'data': {**rezervasyon, 'toplam_tutar': float(rezervasyon['toplam_tutar'])}
+        }))
+    except Exception as e:
+        return hata_yaniti(e)
+
+
+@olculu
+async def create_odeme(request):
+    """Ödeme işlemi (mock)"""
+    try:
+        kullanici = await oturum_kullanicisi(request)
+        if kullanici is None:
+            return json_yaniti({'success': False, 'error': 'Oturum bulunamadı'}, 401)
+
+        data = await istek_verisi(request)
+        if not data:
+            return json_yaniti({'success': False, 'error': 'Geçersiz istek verisi'}, 400)
+
+        try:
+            sonuc = await adb.adimlari_calistir(lambda: odeme_adimlari(
+                data['rezervasyon_id'], kullanici['kullanici_id'], kullanici['rol'] == 'admin',
+                data['yontem'], data['tutar']
+            ))
+        except RezervasyonHatasi as e:
+            return json_yaniti({'success': False, 'error': str(e)}, e.status)
+
+        koltuk_haritasi.isaretle_dolu(sonuc['koltuklar'])
+        rezervasyon = sonuc['rezervasyon']
+
+        return yazma_isaretle(request, json_yaniti({
+            'success': True,
+            'message': 'Ödeme başarıyla tamamlandı',
+            'data': {
+                'odeme_id': sonuc['odeme_id'],
+                'durum': 'basarili',
+                'rezervasyon': {**rezervasyon, 'toplam_tutar': float(rezervasyon['toplam_tutar'])}
+            }
+        }, 201))
+    except Exception as e:
+        return hata_yaniti(e)
+
+
+@asynccontextmanager
+async def yasam_dongusu(_app):
+    # Havuz worker'ın kendi event loop'unda kurulur
+    await adb.baslat()
+    try:
+        yield
+    finally:
+        await adb.kapat()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/seferler/ara', ara_sefer, methods=['GET']),
+        Route('/api/seferler/{sefer_id:int}/koltuklar', get_sefer_koltuklar, methods=['GET']),
+        Route('/api/rezervasyonlar', create_rezervasyon, methods=['POST']),
+        Route('/api/rezervasyonlar/{rezervasyon_id:int}/iptal', iptal_rezervasyon, methods=['POST']),
+        Route('/api/odemeler', create_odeme, methods=['POST']),
+        # Geri kalan her şey (GET /api/rezervasyonlar dahil) Flask'a düşer
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_credentials=True,
+                   allow_methods=['*'], allow_headers=['*']),
+    ],
+    lifespan=yasam_dongusu
+)
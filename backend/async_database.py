@@ -0,0 +1,189 @@
+"""
+Database'in asyncio karşılığı (aiomysql).
+
+asyncio modunda (asgi.py) kullanılır: sorgu beklerken thread tutulmaz, tek
+süreç binlerce eşzamanlı isteği az sayıda bağlantıyla taşıyabilir. Bağlantı
+ayarları, önbellek ve çok adımlı işlemler (sorgu_adimlari) senkron Database
+ile aynıdır.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+import aiomysql
+from pymysql.err import MySQLError
+
+import sorgu_olcumu
+from database import HavuzZamanAsimi, db, okuma_sorgusu_mu, sorgu_tablolari
+from sorgu_adimlari import MAX_TRANSACTION_DENEMESI, asurdur, tekrar_denenmeli_mi
+
+
+class AsyncDatabase:
+    """
+    aiomysql havuzu üzerinde execute_query / transaction / adimlari_calistir.
+
+    Havuz baslat() ile event loop içinde kurulur (ör. ASGI lifespan). Sorgu
+    önbelleği senkron db ile paylaşılır; iki taraftaki yazmalar aynı kayıtları
+    geçersiz kılar.
+    """
+
+    def __init__(self, senkron=db):
+        self.host = senkron.host
+        self.user = senkron.user
+        self.password = senkron.password
+        self.database = senkron.database
+        self.port = senkron.port
+        self._senkron = senkron
+        self.pool = None
+        self.boyut = int(os.getenv('DB_ASYNC_POOL_SIZE', '20'))
+        self.zaman_asimi = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+
+    @property
+    def cache(self):
+        # fork sonrası senkron db önbelleğini yeniden kurar; her seferinde oradan okunur
+        return self._senkron.cache
+
+    async def baslat(self):
+        if self.pool is None:
+            self.pool = await aiomysql.create_pool(
+                host=self.host,
+                user=self.user,
+                password=self.password,
+                db=self.database,
+                port=self.port,
+                charset='utf8mb4',
+                init_command="SET NAMES utf8mb4 COLLATE utf8mb4_turkish_ci",
+                autocommit=False,
+                minsize=1,
+                maxsize=self.boyut,
+                cursorclass=aiomysql.DictCursor
+            )
+            print(f"MySQL async havuzu oluşturuldu (maxsize={self.boyut})")
+
+    async def kapat(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+    def havuz_istatistikleri(self):
+        if self.pool is None:
+            return None
+        return {
+            'boyut': self.pool.maxsize,
+            'acik': self.pool.size,
+            'bos': self.pool.freesize,
+            'kullanimda': self.pool.size - self.pool.freesize,
+        }
+
+    @asynccontextmanager
+    async def _baglanti(self):
+        """(connection, bekleme_suresi)"""
+        if self.pool is None:
+            await self.baslat()
+        baslangic = time.perf_counter()
+        try:
+            connection = await asyncio.wait_for(self.pool.acquire(), self.zaman_asimi)
+        except asyncio.TimeoutError:
+            raise HavuzZamanAsimi(msg=f"Bağlantı havuzu dolu ({self.zaman_asimi} sn beklendi)")
+        try:
+            yield connection, time.perf_counter() - baslangic
+        finally:
+            self.pool.release(connection)
+
+    async def execute_query(self, query, params=None, fetch=False, cache=False):
+        """Database.execute_query ile aynı sözleşme (iş birimi yok, her çağrı kendi bağlantısı)"""
+        nesil_imzasi = None
+        if fetch and cache and self.cache.aktif:
+            anahtar = (query, tuple(params or ()))
+            bulundu, sonuc, nesil_imzasi = self.cache.getir(anahtar)
+            if bulundu:
+                return sonuc
+
+        async with self._baglanti() as (connection, bekleme):
+            baslangic = time.perf_counter()
+            satir = None
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(query, params or None)
+                    if fetch:
+                        result = list(await cursor.fetchall())
+                        satir = len(result)
+                        await connection.commit()
+                        if nesil_imzasi is not None:
+                            self.cache.koy(anahtar, result, nesil_imzasi)
+                        return result
+                    await connection.commit()
+                    self.cache.gecersiz_kil(sorgu_tablolari(query))
+                    satir = cursor.rowcount
+                    return cursor.rowcount
+            except MySQLError as e:
+                print(f"Sorgu hatası: {e}")
+                await connection.rollback()
+                raise
+            finally:
+                sorgu_olcumu.kaydet(query, time.perf_counter() - baslangic, satir, bekleme)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        async with adb.transaction() as cursor: ... - blok hatasız biterse
+        commit, hata olursa rollback.
+        """
+        async with self._baglanti() as (connection, bekleme):
+            cursor = await connection.cursor()
+            yazilan = set()
+            # Bağlantı bekleme süresi transaction'ın ilk sorgusuna yazılır
+            ilk_bekleme = [bekleme]
+            orijinal_execute = cursor.execute
+            orijinal_executemany = cursor.executemany
+
+            async def olc(query, calistir, args):
+                baslangic = time.perf_counter()
+                try:
+                    return await calistir(query, args)
+                finally:
+                    sorgu_olcumu.kaydet(
+                        query, time.perf_counter() - baslangic, cursor.rowcount,
+                        ilk_bekleme.pop() if ilk_bekleme else 0.0
+                    )
+
+            async def execute(query, args=None):
+                if not okuma_sorgusu_mu(query):
+                    yazilan.update(sorgu_tablolari(query))
+                return await olc(query, orijinal_execute, args)
+
+            async def executemany(query, args):
+                yazilan.update(sorgu_tablolari(query))
+                return await olc(query, orijinal_executemany, args)
+
+            cursor.execute = execute
+            cursor.executemany = executemany
+            try:
+                yield cursor
+                baslangic = time.perf_counter()
+                await connection.commit()
+                sorgu_olcumu.kaydet('COMMIT', time.perf_counter() - baslangic)
+                self.cache.gecersiz_kil(yazilan)
+            except BaseException as e:
+                if isinstance(e, MySQLError):
+                    print(f"Transaction hatası: {e}")
+                await connection.rollback()
+                raise
+            finally:
+                await cursor.close()
+
+    async def adimlari_calistir(self, adimlar, deneme_sayisi=MAX_TRANSACTION_DENEMESI):
+        """Database.adimlari_calistir'ın async karşılığı"""
+        for deneme in range(deneme_sayisi):
+            try:
+                async with self.transaction() as cursor:
+                    return await asurdur(adimlar(), cursor, MySQLError)
+            except MySQLError as e:
+                if tekrar_denenmeli_mi(e) and deneme < deneme_sayisi - 1:
+                    continue
+                raise
+
+
+adb = AsyncDatabase()
@@ -1,132 +1,955 @@
 
 import mysql.connector
-from mysql.connector import Error, pooling
+from mysql.connector import Error, errorcode, pooling
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+import itertools
 import os
+import re
+import threading
+import time
 from dotenv import load_dotenv
 
+import sorgu_olcumu
+from sorgu_adimlari import MAX_TRANSACTION_DENEMESI, hata_kodu, surdur, tekrar_denenmeli_mi
+
 load_dotenv()
 
+# Sorgunun okuduğu / yazdığı tabloları bulmak için (önbellek etiketleri)
+TABLO_REGEX = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+`?(\w+)`?', re.IGNORECASE)
+
+# Kilitli okumalar (SELECT ... FOR UPDATE) birincil sunucuda, transaction içinde kalmalı
+KILITLI_OKUMA = re.compile(r'\bFOR\s+(?:UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b', re.IGNORECASE)
+
+# View'lar altta okudukları tablolarla etiketlenir
+GORUNUM_TABLOLARI = {
+    'vw_sefer_detay': {'sefer', 'istasyon', 'tren'},
+    'vw_rezervasyon_ozet': {'rezervasyon', 'bilet', 'odeme'},
+}
+
+
+def sorgu_tablolari(query):
+    """SQL metninde geçen tablo adlarını (küçük harf, view'lar açılmış) döndürür"""
+    tablolar = set()
+    for ad in TABLO_REGEX.findall(query):
+        ad = ad.lower()
+        tablolar |= GORUNUM_TABLOLARI.get(ad, {ad})
+    return tablolar
+
+
+def okuma_sorgusu_mu(query):
+    return query.lstrip().split(None, 1)[0].upper() in ('SELECT', 'WITH', 'SHOW', 'DESCRIBE', 'EXPLAIN')
+
+
+class SorguOnbellegi:
+    """
+    fetch=True sorguları için LRU + TTL önbellek.
+
+    Anahtar (SQL metni, parametreler); her kayıt okuduğu tablolarla etiketlenir.
+    Bir tabloya yazıldığında o tabloyu okuyan kayıtlar silinir. Tablo başına
+    tutulan nesil sayacı, yazma sırasında devam eden bir okumanın eski sonucu
+    önbelleğe koymasını engeller.
+    """
+
+    def __init__(self, max_boyut=1024, ttl=60.0):
+        self.max_boyut = max_boyut
+        self.ttl = ttl
+        self._kayitlar = OrderedDict()
+        self._tablo_anahtarlari = defaultdict(set)
+        self._nesiller = defaultdict(int)
+        self._kilit = threading.Lock()
+        self.hit = 0
+        self.miss = 0
+        self.eviction = 0
+        self.invalidation = 0
+
+    @property
+    def aktif(self):
+        return self.max_boyut > 0
+
+    def getir(self, anahtar):
+        """(bulundu_mu, sonuc, nesil_imzasi) döndürür"""
+        with self._kilit:
+            kayit = self._kayitlar.get(anahtar)
+            if kayit is not None:
+                son_gecerlilik, _, sonuc = kayit
+                if son_gecerlilik > time.monotonic():
+                    self._kayitlar.move_to_end(anahtar)
+                    self.hit += 1
+                    return True, [dict(r) for r in sonuc], None
+                self._sil(anahtar)
+                self.eviction += 1
+            self.miss += 1
+            tablolar = sorgu_tablolari(anahtar[0])
+            return False, None, {t: self._nesiller[t] for t in tablolar}
+
+    def koy(self, anahtar, sonuc, nesil_imzasi):
+        with self._kilit:
+            if any(self._nesiller[t] != n for t, n in nesil_imzasi.items()):
+                return
+            self._sil(anahtar)
+            self._kayitlar[anahtar] = (time.monotonic() + self.ttl, set(nesil_imzasi), [dict(r) for r in sonuc])
+            for tablo in nesil_imzasi:
+                self._tablo_anahtarlari[tablo].add(anahtar)
+            while len(self._kayitlar) > self.max_boyut:
+                eski_anahtar = next(iter(self._kayitlar))
+                self._sil(eski_anahtar)
+                self.eviction += 1
+
+    def _sil(self, anahtar):
+        kayit = self._kayitlar.pop(anahtar, None)
+        if kayit is not None:
+            for tablo in kayit[1]:
+                self._tablo_anahtarlari[tablo].discard(anahtar)
+
+    def gecersiz_kil(self, tablolar):
+        if not tablolar:
+            return
+        with self._kilit:
+            for tablo in tablolar:
+                self._nesiller[tablo] += 1
+                for anahtar in list(self._tablo_anahtarlari.pop(tablo, ())):
+                    self._sil(anahtar)
+                    self.invalidation += 1
+
+    def nesil(self, tablolar):
+        """Tabloların toplam yazma nesli - herhangi birine yazıldığında artar"""
+        with self._kilit:
+            return sum(self._nesiller[t.lower()] for t in tablolar)
+
+    def temizle(self):
+        with self._kilit:
+            for tablo in list(self._tablo_anahtarlari):
+                self._nesiller[tablo] += 1
+            self._kayitlar.clear()
+            self._tablo_anahtarlari.clear()
+
+    def istatistikler(self):
+        with self._kilit:
+            toplam = self.hit + self.miss
+            return {
+                'boyut': len(self._kayitlar),
+                'max_boyut': self.max_boyut,
+                'ttl': self.ttl,
+                'hit': self.hit,
+                'miss': self.miss,
+                'eviction': self.eviction,
+                'invalidation': self.invalidation,
+                'hit_orani': round(self.hit / toplam, 4) if toplam else 0.0
+            }
+
+
+class _IzlenenCursor:
+    """transaction() içindeki yazmaların dokunduğu tabloları toplar ve sorguları ölçer"""
+
+    def __init__(self, cursor, bekleme=0.0):
+        self._cursor = cursor
+        self.yazilan_tablolar = set()
+        # Bağlantı bekleme süresi transaction'ın ilk sorgusuna yazılır
+        self._bekleme = bekleme
+
+    def _kaydet(self, query):
+        if not okuma_sorgusu_mu(query):
+            self.yazilan_tablolar |= sorgu_tablolari(query)
+
+    def _olc(self, query, baslangic):
+        sorgu_olcumu.kaydet(query, time.perf_counter() - baslangic, self._cursor.rowcount, self._bekleme)
+        self._bekleme = 0.0
+
+    def execute(self, query, params=None, *args, **kwargs):
+        self._kaydet(query)
+        baslangic = time.perf_counter()
+        try:
+            return self._cursor.execute(query, params, *args, **kwargs)
+        finally:
+            self._olc(query, baslangic)
+
+    def executemany(self, query, params_list):
+        self._kaydet(query)
+        baslangic = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, params_list)
+        finally:
+            self._olc(query, baslangic)
+
+    def __getattr__(self, ad):
+        return getattr(self._cursor, ad)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class HavuzZamanAsimi(Error):
+    """Havuz dolu ve DB_POOL_TIMEOUT içinde bağlantı boşalmadı"""
+
+
+# Sunucuya ulaşılamadığını gösteren hatalar (replika devre dışı bırakılır)
+BAGLANTI_HATALARI = (
+    errorcode.CR_CONNECTION_ERROR,
+    errorcode.CR_CONN_HOST_ERROR,
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+    errorcode.ER_CON_COUNT_ERROR,
+)
+
+
+def replika_adresleri(deger):
+    """'host1:3307,host2' -> [('host1', 3307), ('host2', 3306)]"""
+    adresler = []
+    for parca in (deger or '').split(','):
+        parca = parca.strip()
+        if not parca:
+            continue
+        host, _, port = parca.rpartition(':') if ':' in parca else (parca, '', '')
+        adresler.append((host.strip('[]'), int(port) if port else 3306))
+    return adresler
+
+
+# Bekleme süresi histogram sınırları (saniye)
+BEKLEME_KOVALARI = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class _HavuzBaglantisi:
+    """Havuzdan alınan bağlantı - close() bağlantıyı ve havuz yerini geri verir"""
+
+    def __init__(self, havuz, connection, overflow):
+        self._havuz = havuz
+        self._connection = connection
+        self._overflow = overflow
+        self._kapandi = False
+        self._koparildi = False
+
+    def close(self):
+        if self._kapandi:
+            return
+        self._kapandi = True
+        try:
+            self._connection.close()
+        except Error as e:
+            # Koparılmış bağlantıda oturum sıfırlama hatası beklenir
+            if not self._koparildi:
+                print(f"Bağlantı kapatma hatası: {e}")
+        finally:
+            self._havuz._birak(self._overflow)
+
+    def at(self):
+        """
+        Bağlantıyı kopararak geri verir (ör. okunmamış büyük bir sonuç
+        varken); havuz bu bağlantıyı sonraki alışta yeniden bağlar.
+        """
+        self._koparildi = True
+        try:
+            self._connection.disconnect()
+        except Error:
+            pass
+        self.close()
+
+    def is_connected(self):
+        return not self._kapandi and self._connection.is_connected()
+
+    def __getattr__(self, ad):
+        return getattr(self._connection, ad)
+
+
+class BaglantiHavuzu:
+    """
+    mysql-connector havuzunun önüne konan adil (FIFO) bekleme kuyruğu.
+
+    Havuz doluyken gelen istek hata almak yerine sıraya girer ve en fazla
+    zaman_asimi saniye bekler. overflow > 0 ise havuz dolduğunda bu kadar ek,
+    kısa ömürlü (havuz dışı) bağlantı açılabilir. Kullanım ve bekleme
+    istatistikleri istatistikler() ile okunur.
+    """
+
+    def __init__(self, boyut, overflow, zaman_asimi, baglanti_ayarlari, ad="tren_pool"):
+        self.boyut = boyut
+        self.overflow = overflow
+        self.zaman_asimi = zaman_asimi
+        self._baglanti_ayarlari = baglanti_ayarlari
+        self._pool = pooling.MySQLConnectionPool(
+            pool_name=ad,
+            pool_size=boyut,
+            pool_reset_session=True,
+            **baglanti_ayarlari
+        )
+        self._kosul = threading.Condition()
+        self._bekleyenler = deque()
+        self._kullanimda = 0
+        self._overflow_kullanimda = 0
+        self._checkout = 0
+        self._hata = 0
+        self._zaman_asimi_sayisi = 0
+        self._toplam_bekleme = 0.0
+        self._max_bekleme = 0.0
+        self._histogram = [0] * (len(BEKLEME_KOVALARI) + 1)
+
+    def _yer_var_mi(self):
+        return self._kullanimda < self.boyut or self._overflow_kullanimda < self.overflow
+
+    def _yer_al(self):
+        """Kilit altında çağrılır; overflow yeri alındıysa True döner"""
+        if self._kullanimda < self.boyut:
+            self._kullanimda += 1
+            return False
+        self._overflow_kullanimda += 1
+        return True
+
+    def _bekleme_kaydet(self, sure):
+        self._toplam_bekleme += sure
+        self._max_bekleme = max(self._max_bekleme, sure)
+        for i, sinir in enumerate(BEKLEME_KOVALARI):
+            if sure <= sinir:
+                self._histogram[i] += 1
+                return
+        self._histogram[-1] += 1
+
+    def al(self):
+        baslangic = time.monotonic()
+        with self._kosul:
+            if not self._bekleyenler and self._yer_var_mi():
+                overflow = self._yer_al()
+            else:
+                bilet = object()
+                self._bekleyenler.append(bilet)
+                son_an = baslangic + self.zaman_asimi
+                try:
+                    while not (self._bekleyenler[0] is bilet and self._yer_var_mi()):
+                        kalan = son_an - time.monotonic()
+                        if kalan <= 0:
+                            self._zaman_asimi_sayisi += 1
+                            self._hata += 1
+                            raise HavuzZamanAsimi(
+                                msg=f"Bağlantı havuzu dolu ({self.zaman_asimi} sn beklendi)"
+                            )
+                        self._kosul.wait(kalan)
+                finally:
+                    self._bekleyenler.remove(bilet)
+                    # Sıradaki bekleyen kendi durumunu yeniden kontrol etsin
+                    self._kosul.notify_all()
+                overflow = self._yer_al()
+            self._checkout += 1
+            self._bekleme_kaydet(time.monotonic() - baslangic)
+
+        try:
+            if overflow:
+                connection = mysql.connector.connect(**self._baglanti_ayarlari)
+            else:
+                connection = self._pool.get_connection()
+        except Exception:
+            with self._kosul:
+                self._hata += 1
+            self._birak(overflow)
+            raise
+        return _HavuzBaglantisi(self, connection, overflow)
+
+    def _birak(self, overflow):
+        with self._kosul:
+            if overflow:
+                self._overflow_kullanimda -= 1
+            else:
+                self._kullanimda -= 1
+            self._kosul.notify_all()
+
+    def istatistikler(self):
+        with self._kosul:
+            return {
+                'boyut': self.boyut,
+                'overflow': self.overflow,
+                'zaman_asimi': self.zaman_asimi,
+                'kullanimda': self._kullanimda,
+                'bos': self.boyut - self._kullanimda,
+                'overflow_kullanimda': self._overflow_kullanimda,
+                'bekleyen': len(self._bekleyenler),
+                'checkout': self._checkout,
+                'checkout_hatasi': self._hata,
+                'zaman_asimi_sayisi': self._zaman_asimi_sayisi,
+                'toplam_bekleme_sn': round(self._toplam_bekleme, 6),
+                'max_bekleme_sn': round(self._max_bekleme, 6),
+                'bekleme_histogrami': {
+                    **{str(sinir): adet for sinir, adet in zip(BEKLEME_KOVALARI, self._histogram)},
+                    '+Inf': self._histogram[-1]
+                }
+            }
+
+
+class _IsBirimi:
+    """Bir HTTP isteği boyunca kullanılan tek bağlantı ve bekleyen yazmalar"""
+
+    __slots__ = ('connection', 'yazilan_tablolar', 'commit_sonrasi')
+
+    def __init__(self):
+        self.connection = None
+        self.yazilan_tablolar = set()
+        self.commit_sonrasi = []
+
+
 class Database:
+    """
+    DB_REPLICA_HOSTS verilmişse fetch=True okumalar replikalara (sırayla)
+    gider; yazmalar, transaction'lar, önbellekli ve ayri_baglanti okumalar
+    her zaman birincil sunucudadır. Şu durumlarda okumalar da birincilden
+    yapılır (kendi yazdığını okuma):
+      - iş biriminde commit edilmemiş ya da bu istekte commit edilmiş yazma varsa
+      - istek birincilden_oku() ile işaretlendiyse (app.py yakın zamanda yazan
+        oturumlar için DB_REPLICA_YAPISKANLIK saniye boyunca işaretler)
+    Ulaşılamayan replika DB_REPLICA_BEKLEME saniye devre dışı kalır; sağlıklı
+    replika yoksa okuma birincile düşer.
+    """
+
     def __init__(self):
         self.host = os.getenv('DB_HOST', 'localhost')
         self.user = os.getenv('DB_USER', 'root')
         self.password = os.getenv('DB_PASSWORD', 'emre2004')
         self.database = os.getenv('DB_NAME', 'tren_rezervasyon_db')
         self.port = int(os.getenv('DB_PORT', '3306'))
+        self.replikalar = replika_adresleri(os.getenv('DB_REPLICA_HOSTS'))
+        self.replika_yapiskanlik = float(os.getenv('DB_REPLICA_YAPISKANLIK', '5'))
+        self.replika_bekleme = float(os.getenv('DB_REPLICA_BEKLEME', '30'))
+        self._surec_durumunu_kur()
+        # Havuz ilk get_connection() çağrısında oluşturulur. Çok worker'lı
+        # (pre-fork) sunucuda import ana süreçte yapılsa bile bağlantılar
+        # fork'tan sonra, her worker'ın kendi sürecinde açılır.
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._surec_durumunu_kur)
+
+    def _surec_durumunu_kur(self):
+        """
+        Süreç bazlı durumu (havuz, kilitler, önbellek) sıfırdan kurar. fork
+        sonrası çocuk süreçte de çağrılır: ebeveynden kopyalanan soketler ve
+        başka bir thread'in tuttuğu kilitler çocukta kullanılamaz.
+        """
         self.pool = None
-        self._last_insert_id = None
-        self._initialize_pool()
-        
+        self._havuz_kilidi = threading.Lock()
+        self._replika_havuzlari = {}
+        # replika indeksi -> tekrar denenebileceği an (time.monotonic)
+        self._replika_disi = {}
+        self._replika_sirasi = itertools.count()
+        # İstek (thread) bazlı durum: iş birimi ve son insert id
+        self._yerel = threading.local()
+        self.cache = SorguOnbellegi(
+            max_boyut=int(os.getenv('DB_CACHE_SIZE', '1024')),
+            ttl=float(os.getenv('DB_CACHE_TTL', '60'))
+        )
+
     def _initialize_pool(self):
-        """Connection pool oluştur"""
+        """
+        Connection pool oluştur. Ayarlar ortam değişkenlerinden okunur:
+            DB_POOL_SIZE      havuzdaki bağlantı sayısı (en fazla 32)
+            DB_POOL_TIMEOUT   havuz doluyken en fazla bekleme (saniye, 0 = beklemeden hata)
+            DB_POOL_OVERFLOW  havuz dolunca açılabilecek ek geçici bağlantı sayısı
+        """
+        boyut = self._havuz_boyutu('DB_POOL_SIZE')
         try:
-            self.pool = pooling.MySQLConnectionPool(
-                pool_name="tren_pool",
-                pool_size=10,
-                pool_reset_session=True,
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                port=self.port,
-                charset='utf8mb4',
-                collation='utf8mb4_turkish_ci'
-            )
-            print(f"MySQL Connection Pool oluşturuldu (pool_size=10)")
+            self.pool = self._havuz_olustur(self.host, self.port, boyut, 'tren_pool')
+            print(f"MySQL Connection Pool oluşturuldu (pool_size={boyut})")
         except Error as e:
             print(f"Connection Pool hatası: {e}")
             self.pool = None
-        
+
+    @staticmethod
+    def _havuz_boyutu(degisken):
+        boyut = int(os.getenv(degisken) or os.getenv('DB_POOL_SIZE', '10'))
+        if boyut > pooling.CNX_POOL_MAXSIZE:
+            print(f"{degisken}={boyut} desteklenmiyor, {pooling.CNX_POOL_MAXSIZE} kullanılacak")
+            boyut = pooling.CNX_POOL_MAXSIZE
+        return boyut
+
+    def _havuz_olustur(self, host, port, boyut, ad):
+        return BaglantiHavuzu(
+            boyut=boyut,
+            overflow=int(os.getenv('DB_POOL_OVERFLOW', '0')),
+            zaman_asimi=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+            baglanti_ayarlari={
+                'host': host,
+                'user': self.user,
+                'password': self.password,
+                'database': self.database,
+                'port': port,
+                'charset': 'utf8mb4',
+                'collation': 'utf8mb4_turkish_ci'
+            },
+            ad=ad
+        )
+
     def get_connection(self):
-        """Pool'dan bir bağlantı al"""
+        """
+        Pool'dan bir bağlantı al. Havuz oluşturulamamışsa tekrar denenir;
+        havuzsuz bağlantıya sessizce düşülmez.
+        """
         try:
-            if self.pool:
-                return self.pool.get_connection()
-            else:
-                connection = mysql.connector.connect(
-                    host=self.host,
-                    user=self.user,
-                    password=self.password,
-                    database=self.database,
-                    port=self.port,
-                    charset='utf8mb4',
-                    collation='utf8mb4_turkish_ci'
-                )
-                if connection.is_connected():
-                    return connection
+            if self.pool is None:
+                with self._havuz_kilidi:
+                    if self.pool is None:
+                        self._initialize_pool()
+                if self.pool is None:
+                    raise Error(msg="Bağlantı havuzu oluşturulamadı")
+            return self.pool.al()
         except Error as e:
             print(f"Veritabanı bağlantı hatası: {e}")
             raise e
+
+    def havuz_istatistikleri(self):
+        """Havuz kullanım / bekleme istatistikleri (havuz yoksa None)"""
+        return self.pool.istatistikler() if self.pool else None
+
+    def _replika_sec(self):
+        """Sıradaki devrede olan replikanın indeksi; hepsi devre dışıysa None"""
+        simdi = time.monotonic()
+        ilk = next(self._replika_sirasi)
+        for i in range(len(self.replikalar)):
+            indeks = (ilk + i) % len(self.replikalar)
+            if self._replika_disi.get(indeks, 0) <= simdi:
+                return indeks
+        return None
+
+    def _replikayi_devre_disi_birak(self, indeks, hata):
+        host, port = self.replikalar[indeks]
+        self._replika_disi[indeks] = time.monotonic() + self.replika_bekleme
+        # Havuz bekleme süresi sonunda yeniden kurulur
+        self._replika_havuzlari.pop(indeks, None)
+        print(f"Replika {host}:{port} {self.replika_bekleme:g} sn devre dışı: {hata}")
+
+    def _replika_baglantisi_al(self):
+        """
+        (connection, indeks) - devrede replika yoksa, bağlanılamıyorsa ya da
+        replika havuzu doluysa (None, None); okuma birincile düşer.
+        """
+        while True:
+            indeks = self._replika_sec()
+            if indeks is None:
+                return None, None
+            try:
+                havuz = self._replika_havuzlari.get(indeks)
+                if havuz is None:
+                    with self._havuz_kilidi:
+                        havuz = self._replika_havuzlari.get(indeks)
+                        if havuz is None:
+                            host, port = self.replikalar[indeks]
+                            havuz = self._replika_havuzlari[indeks] = self._havuz_olustur(
+                                host, port, self._havuz_boyutu('DB_REPLICA_POOL_SIZE'), f'tren_replika_{indeks}'
+                            )
+                return havuz.al(), indeks
+            except HavuzZamanAsimi:
+                return None, None
+            except Error as e:
+                if hata_kodu(e) not in BAGLANTI_HATALARI:
+                    raise
+                self._replikayi_devre_disi_birak(indeks, e)
+
+    def _replikadan_okunabilir_mi(self, query, cache=False, ayri_baglanti=False):
+        if not self.replikalar or cache or ayri_baglanti or KILITLI_OKUMA.search(query):
+            return False
+        if getattr(self._yerel, 'birincil', False) or getattr(self._yerel, 'yazma_zamani', None):
+            return False
+        birim = getattr(self._yerel, 'is_birimi', None)
+        return birim is None or not birim.yazilan_tablolar
+
+    def _replikadan_oku(self, query, params):
+        """Okumayı replikada çalıştırır; replika kullanılamadıysa None"""
+        for _ in range(len(self.replikalar)):
+            baslangic = time.perf_counter()
+            connection, indeks = self._replika_baglantisi_al()
+            if connection is None:
+                return None
+            bekleme = time.perf_counter() - baslangic
+            baslangic = time.perf_counter()
+            cursor = None
+            satir = None
+            try:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(query, params or ())
+                result = cursor.fetchall()
+                satir = len(result)
+                return result
+            except Error as e:
+                if hata_kodu(e) not in BAGLANTI_HATALARI:
+                    print(f"Sorgu hatası: {e}")
+                    raise
+                self._replikayi_devre_disi_birak(indeks, e)
+            finally:
+                sorgu_olcumu.kaydet(query, time.perf_counter() - baslangic, satir, bekleme)
+                if cursor:
+                    try:
+                        cursor.close()
+                    except Error:
+                        pass
+                connection.close()
+        return None
+
+    def replika_durumu(self):
+        """Replika başına adres, devrede olup olmadığı ve havuz istatistikleri"""
+        simdi = time.monotonic()
+        durum = []
+        for indeks, (host, port) in enumerate(self.replikalar):
+            kalan = self._replika_disi.get(indeks, 0) - simdi
+            havuz = self._replika_havuzlari.get(indeks)
+            durum.append({
+                'host': host,
+                'port': port,
+                'durum': 'devre_disi' if kalan > 0 else 'aktif',
+                'tekrar_deneme_sn': round(kalan, 1) if kalan > 0 else None,
+                'pool': havuz.istatistikler() if havuz else None,
+            })
+        return durum
+
+    def birincilden_oku(self):
+        """Bu istekteki (thread) tüm okumaları birincil sunucuya yönlendirir"""
+        self._yerel.birincil = True
+
+    def son_yazma(self):
+        """Bu istekte commit edilmiş son yazmanın zamanı (time.time); yazma yoksa None"""
+        return getattr(self._yerel, 'yazma_zamani', None)
+
+    def _yazma_commit_edildi(self):
+        self._yerel.yazma_zamani = time.time()
     
     def connect(self):
         """Geriye uyumluluk için - get_connection'ı çağırır"""
         return self.get_connection()
     
     def disconnect(self, connection=None):
-        """Veritabanı bağlantısını kapat"""
-        if connection and connection.is_connected():
+        """Veritabanı bağlantısını kapat (havuza geri ver)"""
+        if connection:
             connection.close()
     
-    def execute_query(self, query, params=None, fetch=False):
+    def is_birimi_baslat(self):
+        """
+        Bu thread için iş birimi açar. İş birimi açıkken execute_query,
+        execute_many ve transaction tek bir bağlantıyı paylaşır (ilk sorguda
+        havuzdan alınır); yazmalar is_birimi_bitir(commit=True) çağrılana
+        kadar commit edilmez.
+        """
+        self._yerel.is_birimi = _IsBirimi()
+        self._yerel.birincil = False
+        self._yerel.yazma_zamani = None
+
+    def is_birimi_bitir(self, commit=True):
+        """
+        İş birimini kapatır: commit=True ise bekleyen yazmalar commit edilir,
+        değilse geri alınır; bağlantı havuza döner. Açık iş birimi yoksa bir
+        şey yapmaz. Commit hatası çağırana iletilir.
+        """
+        birim = getattr(self._yerel, 'is_birimi', None)
+        if birim is None:
+            return
+        self._yerel.is_birimi = None
+        connection = birim.connection
+        if connection is None:
+            return
+        try:
+            if commit and birim.yazilan_tablolar:
+                baslangic = time.perf_counter()
+                connection.commit()
+                sorgu_olcumu.kaydet('COMMIT', time.perf_counter() - baslangic)
+                self.cache.gecersiz_kil(birim.yazilan_tablolar)
+                self._yazma_commit_edildi()
+            else:
+                connection.rollback()
+        except Error:
+            try:
+                connection.rollback()
+            except Error:
+                pass
+            raise
+        finally:
+            connection.close()
+        if commit:
+            for fonksiyon in birim.commit_sonrasi:
+                fonksiyon()
+
+    def commit_sonrasi(self, fonksiyon):
+        """
+        fonksiyon'u iş birimi commit edildikten sonra çalıştırır (iş birimi
+        yoksa yazma zaten commit edilmiştir, hemen çalışır). Süreç içi
+        önbellekleri commit'ten önce geçersiz kılıp eski veriyi yeniden
+        yüklemeyi önlemek için kullanılır.
+        """
+        birim = getattr(self._yerel, 'is_birimi', None)
+        if birim is None:
+            fonksiyon()
+        else:
+            birim.commit_sonrasi.append(fonksiyon)
+
+    @contextmanager
+    def is_birimi(self):
+        """İstek dışı kullanım (script vb.) için: with db.is_birimi(): ..."""
+        self.is_birimi_baslat()
+        try:
+            yield
+        except Exception:
+            self.is_birimi_bitir(commit=False)
+            raise
+        self.is_birimi_bitir(commit=True)
+
+    def _baglanti_al(self, ayri_baglanti=False):
+        """
+        (connection, is_birimi, bekleme) - iş birimi yoksa birim None döner;
+        bekleme havuzdan bağlantı alırken geçen süredir (saniye).
+        """
+        baslangic = time.perf_counter()
+        birim = None if ayri_baglanti else getattr(self._yerel, 'is_birimi', None)
+        if birim is None:
+            return self.get_connection(), None, time.perf_counter() - baslangic
+        if birim.connection is None:
+            birim.connection = self.get_connection()
+        return birim.connection, birim, time.perf_counter() - baslangic
+
+    def execute_query(self, query, params=None, fetch=False, cache=False, ayri_baglanti=False):
+        """
+        Args:
+            cache: True ise (sadece fetch=True için) sonuç sorgu önbelleğinden
+                   okunur / önbelleğe yazılır. Okunan tablolara yazma yapıldığında
+                   kayıt otomatik olarak geçersiz olur.
+            ayri_baglanti: True ise açık iş birimi olsa bile kendi bağlantısını
+                   kullanır (iş biriminin eski snapshot'ını görmemesi gereken
+                   okumalar için).
+        """
+        nesil_imzasi = None
+        bekleyen_birim = getattr(self._yerel, 'is_birimi', None)
+        if bekleyen_birim is not None and bekleyen_birim.yazilan_tablolar:
+            # İş biriminin commit edilmemiş yazmaları varken önbellek atlanır
+            cache = False
+        if fetch and cache and self.cache.aktif:
+            anahtar = (query, tuple(params or ()))
+            bulundu, sonuc, nesil_imzasi = self.cache.getir(anahtar)
+            if bulundu:
+                return sonuc
+
+        if fetch and self._replikadan_okunabilir_mi(query, cache, ayri_baglanti):
+            result = self._replikadan_oku(query, params)
+            if result is not None:
+                return result
+
         connection = None
+        birim = None
         cursor = None
+        baslangic = None
+        satir = None
         try:
-            connection = self.get_connection()
+            connection, birim, bekleme = self._baglanti_al(ayri_baglanti)
+            baslangic = time.perf_counter()
             cursor = connection.cursor(dictionary=True)
             cursor.execute(query, params or ())
 
             if fetch:
                 result = cursor.fetchall()
+                satir = len(result)
+                if nesil_imzasi is not None:
+                    self.cache.koy(anahtar, result, nesil_imzasi)
                 return result
             else:
-                connection.commit()
-                self._last_insert_id = cursor.lastrowid
+                if birim:
+                    birim.yazilan_tablolar |= sorgu_tablolari(query)
+                else:
+                    connection.commit()
+                    self.cache.gecersiz_kil(sorgu_tablolari(query))
+                    self._yazma_commit_edildi()
+                self._yerel.last_insert_id = cursor.lastrowid
+                satir = cursor.rowcount
                 return cursor.rowcount
 
         except Error as e:
             print(f"Sorgu hatası: {e}")
-            if connection:
+            if connection and not birim:
                 connection.rollback()
             raise e
         finally:
+            if baslangic is not None:
+                sorgu_olcumu.kaydet(query, time.perf_counter() - baslangic, satir, bekleme)
             if cursor:
                 cursor.close()
-            if connection and connection.is_connected():
+            if connection and not birim:
                 connection.close()
     
-    def execute_many(self, query, params_list):
+    def execute_many(self, query, params_list, parti_boyutu=None):
         """
-        Çoklu insert/update için - Her çağrıda yeni connection açar ve kapatır
-        
+        Çoklu insert/update için - isteğin iş birimi açıksa onun bağlantısını
+        ve transaction'ını kullanır (commit iş birimi bitince); yoksa havuzdan
+        bağlantı alıp tüm partileri tek transaction'da commit eder
+
         Args:
             query: SQL sorgusu
             params_list: Parametre listesi (list of tuples)
+            parti_boyutu: verilirse satırlar bu büyüklükte partiler halinde
+                   gönderilir (INSERT ... VALUES için her parti tek çok satırlı
+                   ifadedir); tüm partiler aynı transaction'dadır
             
         Returns:
             Etkilenen satır sayısı
         """
         connection = None
+        birim = None
         cursor = None
+        baslangic = None
         try:
-            connection = self.get_connection()
+            connection, birim, bekleme = self._baglanti_al()
             cursor = connection.cursor()
-            cursor.executemany(query, params_list)
-            connection.commit()
-            return cursor.rowcount
+            params_list = list(params_list)
+            parti_boyutu = parti_boyutu or max(len(params_list), 1)
+            toplam = 0
+            for i in range(0, len(params_list), parti_boyutu):
+                baslangic = time.perf_counter()
+                cursor.executemany(query, params_list[i:i + parti_boyutu])
+                toplam += max(cursor.rowcount, 0)
+                sorgu_olcumu.kaydet(query, time.perf_counter() - baslangic, cursor.rowcount, bekleme)
+                baslangic = None
+                bekleme = 0.0
+            if birim:
+                birim.yazilan_tablolar |= sorgu_tablolari(query)
+            else:
+                connection.commit()
+                self.cache.gecersiz_kil(sorgu_tablolari(query))
+                self._yazma_commit_edildi()
+            return toplam
             
         except Error as e:
             print(f"Çoklu sorgu hatası: {e}")
-            if connection:
+            if connection and not birim:
                 connection.rollback()
             raise e
         finally:
+            if baslangic is not None:
+                sorgu_olcumu.kaydet(
+                    query, time.perf_counter() - baslangic, cursor.rowcount if cursor else None, bekleme
+                )
             if cursor:
                 cursor.close()
-            if connection and connection.is_connected():
+            if connection and not birim:
                 connection.close()
     
+    def stream_query(self, query, params=None, chunk_size=1000):
+        """
+        Büyük sonuç kümeleri için - sonucu belleğe almadan satır satır döndürür.
+
+        Sunucu tarafı (unbuffered) cursor kullanır; satırlar chunk_size'lık
+        fetchmany çağrılarıyla okunur. Bağlantı generator tükenene ya da
+        kapatılana kadar havuza dönmez. Replika varsa akış replikadan okunur.
+
+        Yields:
+            dict satırlar
+        """
+        connection = None
+        cursor = None
+        tamamlandi = False
+        try:
+            baslangic = time.perf_counter()
+            if self._replikadan_okunabilir_mi(query):
+                connection, _ = self._replika_baglantisi_al()
+            if connection is None:
+                connection = self.get_connection()
+            bekleme = time.perf_counter() - baslangic
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            cursor.execute(query, params or ())
+            # Akışta yalnızca ilk sonuca kadar geçen süre ölçülür
+            sorgu_olcumu.kaydet(query, time.perf_counter() - baslangic - bekleme, None, bekleme)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+            tamamlandi = True
+        except Error as e:
+            print(f"Akış sorgusu hatası: {e}")
+            raise e
+        finally:
+            if connection and not tamamlandi:
+                # Akış yarıda kesildiyse (istemci koptu vb.) kalan satırları
+                # okumak milyonlarca satır sürebilir; bağlantı koparılır,
+                # sunucu da yazamadığı sorguyu sonlandırır
+                connection.at()
+            else:
+                if cursor:
+                    try:
+                        cursor.close()
+                    except Error:
+                        pass
+                if connection:
+                    connection.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Tek bağlantı üzerinde tek transaction - blok hatasız biterse commit,
+        hata olursa rollback yapılır.
+
+        Kullanım:
+            with db.transaction() as cursor:
+                cursor.execute(...)
+                cursor.executemany(...)
+
+        İş birimi açıksa onun bağlantısı kullanılır; blok sonundaki commit iş
+        biriminin o ana kadarki yazmalarını da kalıcı hale getirir.
+
+        Yields:
+            dictionary=True cursor
+        """
+        connection = None
+        birim = None
+        cursor = None
+        try:
+            connection, birim, bekleme = self._baglanti_al()
+            cursor = _IzlenenCursor(connection.cursor(dictionary=True), bekleme)
+            yield cursor
+            baslangic = time.perf_counter()
+            connection.commit()
+            sorgu_olcumu.kaydet('COMMIT', time.perf_counter() - baslangic)
+            tablolar = cursor.yazilan_tablolar
+            if birim:
+                tablolar = tablolar | birim.yazilan_tablolar
+                birim.yazilan_tablolar = set()
+            self.cache.gecersiz_kil(tablolar)
+            if tablolar:
+                self._yazma_commit_edildi()
+        except Exception as e:
+            if isinstance(e, Error):
+                print(f"Transaction hatası: {e}")
+            if connection:
+                connection.rollback()
+            if birim:
+                birim.yazilan_tablolar = set()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection and not birim:
+                connection.close()
+
+    def adimlari_calistir(self, adimlar, deneme_sayisi=MAX_TRANSACTION_DENEMESI):
+        """
+        sorgu_adimlari biçimindeki işlemi tek transaction içinde çalıştırır.
+        Deadlock / lock wait timeout olursa transaction baştan denenir.
+
+        İş birimi bu bloktan önce yazma yaptıysa tekrar denenmez: rollback o
+        yazmaları da geri almıştır, yalnızca adımları tekrarlamak isteğin
+        yarısını commit ettirir. Hata yükselir ve istek bütün olarak başarısız
+        olur.
+
+        Args:
+            adimlar: her çağrıda yeni generator döndüren fonksiyon
+        Returns:
+            generator'ın dönüş değeri
+        """
+        birim = getattr(self._yerel, 'is_birimi', None)
+        tekrar_denenebilir = birim is None or not birim.yazilan_tablolar
+        for deneme in range(deneme_sayisi):
+            try:
+                with self.transaction() as cursor:
+                    return surdur(adimlar(), cursor, Error)
+            except Error as e:
+                if tekrar_denenebilir and tekrar_denenmeli_mi(e) and deneme < deneme_sayisi - 1:
+                    continue
+                raise
+
+    def tablo_versiyonu(self, *tablolar):
+        """
+        Bu süreçte tablolara yapılan yazmalarla artan versiyon numarası
+        (execute_query / execute_many / transaction yazmaları sayılır).
+        """
+        return self.cache.nesil(tablolar)
+
     def get_last_insert_id(self):
-        """Son execute_query çağrısında oluşan AUTO_INCREMENT ID'yi döndür."""
-        return self._last_insert_id
+        """Bu thread'deki son execute_query çağrısında oluşan AUTO_INCREMENT ID'yi döndür."""
+        return getattr(self._yerel, 'last_insert_id', None)
 
 db = Database()
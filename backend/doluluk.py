@@ -0,0 +1,110 @@
+"""
+Sefer.dolu_koltuk_sayisi sayacının bakımı.
+
+Sayaç, bilet ekleyen ya da biletin 'iade' durumuna girip çıkmasına yol açan
+her işlemde aynı transaction içinde güncellenir. Bilet tablosuyla tutarlılığı
+komut satırından kontrol edilebilir / yeniden kurulabilir:
+
+    python doluluk.py            # sadece farkları raporla
+    python doluluk.py --duzelt   # farklı olan sayaçları Bilet'ten yeniden hesapla
+"""
+import argparse
+import sys
+from collections import Counter
+
+from database import db
+from sorgu_adimlari import Sorgu
+
+
+def sayac_sorgusu(degisimler):
+    """
+    Sefer sayaçlarına delta uygulayan toplu sorgu (değişiklik yoksa None).
+
+    Args:
+        degisimler: {sefer_id: delta} (pozitif = dolan, negatif = boşalan koltuk)
+    """
+    satirlar = [(delta, sefer_id) for sefer_id, delta in sorted(degisimler.items()) if delta]
+    if not satirlar:
+        return None
+    return Sorgu(
+        "UPDATE Sefer SET dolu_koltuk_sayisi = dolu_koltuk_sayisi + %s WHERE sefer_id = %s",
+        satirlar,
+        coklu=True
+    )
+
+
+def sayaclari_guncelle(cursor, degisimler):
+    """sayac_sorgusu'nu açık transaction'a ait cursor üzerinde çalıştırır"""
+    sorgu = sayac_sorgusu(degisimler)
+    if sorgu:
+        cursor.executemany(sorgu.sql, sorgu.params)
+
+
+def sefer_bazli_say(koltuklar):
+    """(sefer_id, koltuk_no) listesini {sefer_id: adet} sözlüğüne çevirir"""
+    return Counter(sefer_id for sefer_id, _ in koltuklar)
+
+
+FARK_SORGUSU = """
+    SELECT s.sefer_id, s.dolu_koltuk_sayisi AS sayac, COALESCE(b.adet, 0) AS gercek
+    FROM Sefer s
+    LEFT JOIN (
+        SELECT sefer_id, COUNT(*) AS adet
+        FROM Bilet
+        WHERE durum != 'iade'
+        GROUP BY sefer_id
+    ) b ON b.sefer_id = s.sefer_id
+    WHERE s.dolu_koltuk_sayisi != COALESCE(b.adet, 0)
+    ORDER BY s.sefer_id
+"""
+
+
+def dogrula(database=db):
+    """Sayacı Bilet tablosuyla uyuşmayan seferleri döndürür"""
+    return database.execute_query(FARK_SORGUSU, fetch=True)
+
+
+def yeniden_olustur(database=db):
+    """
+    Uyuşmayan sayaçları Bilet tablosundan yeniden hesaplar; düzeltilen satır
+    sayısını döndürür. Satış trafiği yokken çalıştırılması önerilir.
+    """
+    return database.execute_query(
+        """
+        UPDATE Sefer s
+        LEFT JOIN (
+            SELECT sefer_id, COUNT(*) AS adet
+            FROM Bilet
+            WHERE durum != 'iade'
+            GROUP BY sefer_id
+        ) b ON b.sefer_id = s.sefer_id
+        SET s.dolu_koltuk_sayisi = COALESCE(b.adet, 0)
+        WHERE s.dolu_koltuk_sayisi != COALESCE(b.adet, 0)
+        """
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sefer doluluk sayaçlarını Bilet tablosuyla karşılaştır')
+    parser.add_argument('--duzelt', action='store_true', help='Farklı olan sayaçları yeniden hesapla')
+    args = parser.parse_args(argv)
+
+    farklar = dogrula()
+    for fark in farklar:
+        print(f"Sefer {fark['sefer_id']}: sayaç={fark['sayac']} gerçek={fark['gercek']}")
+
+    if not farklar:
+        print("Tüm doluluk sayaçları tutarlı.")
+        return 0
+
+    if args.duzelt:
+        duzeltilen = yeniden_olustur()
+        print(f"{duzeltilen} sefer sayacı düzeltildi.")
+        return 0
+
+    print(f"{len(farklar)} seferde tutarsızlık var (düzeltmek için --duzelt).")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
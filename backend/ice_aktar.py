@@ -0,0 +1,490 @@
+"""
+CSV / NDJSON akışından toplu veri aktarımı: istasyon, tren, yolcu ve
+geçmiş biletler.
+
+Girdi satır satır okunur ve PARTI_BOYUTU'luk partiler halinde işlenir;
+bellekte en fazla bir parti tutulur. Her parti:
+  - handler'larla ve şemadaki CHECK kurallarıyla aynı kurallardan geçer
+    (hatalı satırlar raporlanır, aktarım durmaz),
+  - tek transaction'da çok satırlı INSERT'lerle yazılır,
+  - aynı transaction'da IceAktarimDurumu tablosuna kaçıncı satıra kadar
+    işlendiğini yazar; yarıda kalan aktarım aynı adla yeniden
+    başlatıldığında kaldığı yerden devam eder.
+
+Bilet aktarımında satır başına çalışan Bilet tetikleyicileri
+@toplu_ice_aktarim oturum değişkeniyle atlanır (migration 007); koltuk
+kapasitesi kontrolü burada yapılır, rezervasyon toplam tutarı ve sefer
+doluluk sayaçları parti sonunda küme halinde güncellenir.
+
+Bilet satırı alanları:
+    pnr, kullanici_id, sefer_id, yolcu_eposta (ya da yolcu_id), koltuk_no,
+    fiyat, durum (rezerve | kesildi | iade, varsayılan kesildi),
+    rezervasyon_durum (varsayılan bilet durumundan), olusturulma_zamani
+Ödeme kayıtları aktarılmaz.
+
+    python ice_aktar.py istasyon istasyonlar.csv
+    python ice_aktar.py bilet eski_biletler.ndjson --ad bilet-2024 --parti 5000
+    python ice_aktar.py bilet eski_biletler.ndjson --ad bilet-2024 --bastan
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from database import db
+from doluluk import sayaclari_guncelle
+
+PARTI_BOYUTU = 5000
+# Özette tutulan en fazla hata (tamamı hata_bildir ile alınabilir)
+MAX_HATA_RAPORU = 100
+
+# Şemadaki CHECK kuralları (Yolcu)
+AD_SOYAD_REGEX = re.compile(r'^[A-Za-zÇĞİÖŞÜçğıöşü ]+$')
+TELEFON_REGEX = re.compile(r'^[0-9 ]+$')
+
+BILET_DURUMLARI = {'rezerve': 'olusturuldu', 'kesildi': 'odendi', 'iade': 'iptal'}
+REZERVASYON_DURUMLARI = ('olusturuldu', 'odendi', 'iptal')
+BICIMLER = ('csv', 'ndjson')
+
+
+class SatirHatasi(ValueError):
+    """Satır doğrulanamadı; aktarım sürer, satır raporlanır"""
+
+
+def _in_listesi(degerler):
+    return ', '.join(['%s'] * len(degerler))
+
+
+def _metin(kayit, alan, uzunluk, zorunlu=True):
+    deger = kayit.get(alan)
+    deger = '' if deger is None else str(deger).strip()
+    if zorunlu and not deger:
+        raise SatirHatasi(f'{alan} zorunludur')
+    if len(deger) > uzunluk:
+        raise SatirHatasi(f'{alan} en fazla {uzunluk} karakter olabilir')
+    return deger
+
+
+def _tam_sayi(kayit, alan, pozitif=True):
+    try:
+        deger = int(kayit.get(alan))
+    except (ValueError, TypeError):
+        raise SatirHatasi(f'{alan} sayısal olmalıdır')
+    if pozitif and deger <= 0:
+        raise SatirHatasi(f'{alan} pozitif olmalıdır')
+    return deger
+
+
+class _Aktarici(ABC):
+    """dogrula: tek satırın saf kontrolü; yaz: geçerli satırları açık transaction'a yazar"""
+
+    @abstractmethod
+    def dogrula(self, kayit):
+        """Satırı doğrular; hatalıysa SatirHatasi fırlatır"""
+
+    @abstractmethod
+    def yaz(self, cursor, satirlar):
+        """
+        Args:
+            satirlar: [(satir_no, dogrula çıktısı), ...]
+        Returns:
+            (eklenen, atlanan, [(satir_no, hata), ...])
+        """
+
+
+class IstasyonAktarici(_Aktarici):
+    def dogrula(self, kayit):
+        return _metin(kayit, 'ad', 100), _metin(kayit, 'sehir', 100)
+
+    def yaz(self, cursor, satirlar):
+        cursor.executemany("INSERT INTO Istasyon (ad, sehir) VALUES (%s, %s)", [s for _, s in satirlar])
+        return len(satirlar), 0, []
+
+
+class TrenAktarici(_Aktarici):
+    def dogrula(self, kayit):
+        return _metin(kayit, 'kod', 20), _tam_sayi(kayit, 'koltuk_sayisi')
+
+    def yaz(self, cursor, satirlar):
+        # Kayıtlı kodlar olduğu gibi kalır (atlanan sayılır)
+        cursor.executemany(
+            "INSERT INTO Tren (kod, koltuk_sayisi) VALUES (%s, %s) ON DUPLICATE KEY UPDATE tren_id = tren_id",
+            [s for _, s in satirlar]
+        )
+        eklenen = max(cursor.rowcount, 0)
+        return eklenen, len(satirlar) - eklenen, []
+
+
+class YolcuAktarici(_Aktarici):
+    def dogrula(self, kayit):
+        ad_soyad = _metin(kayit, 'ad_soyad', 150)
+        if not AD_SOYAD_REGEX.match(ad_soyad):
+            raise SatirHatasi('ad_soyad yalnızca harf ve boşluk içerebilir')
+        eposta = _metin(kayit, 'eposta', 150)
+        if '@' not in eposta:
+            raise SatirHatasi('eposta geçersiz')
+        telefon = _metin(kayit, 'telefon', 20, zorunlu=False)
+        if telefon and not TELEFON_REGEX.match(telefon):
+            raise SatirHatasi('telefon yalnızca rakam ve boşluk içerebilir')
+        return ad_soyad, eposta, telefon
+
+    def yaz(self, cursor, satirlar):
+        # create_yolcu gibi: kayıtlı e-posta yeniden eklenmez
+        cursor.executemany(
+            """INSERT INTO Yolcu (ad_soyad, eposta, telefon) VALUES (%s, %s, %s)
+               ON DUPLICATE KEY UPDATE yolcu_id = yolcu_id""",
+            [s for _, s in satirlar]
+        )
+        eklenen = max(cursor.rowcount, 0)
+        return eklenen, len(satirlar) - eklenen, []
+
+
+class BiletAktarici(_Aktarici):
+    def dogrula(self, kayit):
+        durum = _metin(kayit, 'durum', 10, zorunlu=False) or 'kesildi'
+        if durum not in BILET_DURUMLARI:
+            raise SatirHatasi(f'durum {" / ".join(BILET_DURUMLARI)} olmalıdır')
+        rezervasyon_durum = _metin(kayit, 'rezervasyon_durum', 12, zorunlu=False) or BILET_DURUMLARI[durum]
+        if rezervasyon_durum not in REZERVASYON_DURUMLARI:
+            raise SatirHatasi(f'rezervasyon_durum {" / ".join(REZERVASYON_DURUMLARI)} olmalıdır')
+        try:
+            fiyat = Decimal(str(kayit.get('fiyat')))
+        except InvalidOperation:
+            raise SatirHatasi('fiyat sayısal olmalıdır')
+        if not fiyat.is_finite() or fiyat <= 0:
+            raise SatirHatasi('fiyat pozitif olmalıdır')
+
+        olusturulma = _metin(kayit, 'olusturulma_zamani', 32, zorunlu=False)
+        if olusturulma:
+            try:
+                olusturulma = datetime.fromisoformat(olusturulma.replace('Z', ''))
+            except ValueError:
+                raise SatirHatasi('olusturulma_zamani formatı geçersiz')
+        yolcu = _metin(kayit, 'yolcu_eposta', 150, zorunlu=False).lower()
+        if not yolcu:
+            yolcu = _tam_sayi(kayit, 'yolcu_id')
+
+        return {
+            'pnr': _metin(kayit, 'pnr', 10).upper(),
+            'kullanici_id': _tam_sayi(kayit, 'kullanici_id'),
+            'sefer_id': _tam_sayi(kayit, 'sefer_id'),
+            'koltuk_no': _tam_sayi(kayit, 'koltuk_no'),
+            'yolcu': yolcu,
+            'fiyat': fiyat,
+            'durum': durum,
+            'rezervasyon_durum': rezervasyon_durum,
+            'olusturulma': olusturulma or None,
+        }
+
+    def _sorgula(self, cursor, sql, degerler):
+        if not degerler:
+            return []
+        cursor.execute(sql.format(yer=_in_listesi(degerler)), tuple(degerler))
+        return cursor.fetchall()
+
+    def yaz(self, cursor, satirlar):
+        biletler = [b for _, b in satirlar]
+        sefer_ids = sorted({b['sefer_id'] for b in biletler})
+        # Canlı rezervasyonlarla aynı kilit sırası (bkz. rezervasyon_motoru._seferleri_kilitle)
+        kapasite = {
+            row['sefer_id']: row['koltuk_sayisi'] for row in self._sorgula(
+                cursor,
+                """SELECT s.sefer_id, t.koltuk_sayisi FROM Sefer s JOIN Tren t ON s.tren_id = t.tren_id
+                   WHERE s.sefer_id IN ({yer}) ORDER BY s.sefer_id FOR UPDATE OF s""",
+                sefer_ids
+            )
+        }
+        kullanicilar = {row['kullanici_id'] for row in self._sorgula(
+            cursor, "SELECT kullanici_id FROM Kullanici WHERE kullanici_id IN ({yer})",
+            sorted({b['kullanici_id'] for b in biletler})
+        )}
+        epostalar = sorted({b['yolcu'] for b in biletler if isinstance(b['yolcu'], str)})
+        yolcular = {row['eposta'].lower(): row['yolcu_id'] for row in self._sorgula(
+            cursor, "SELECT yolcu_id, eposta FROM Yolcu WHERE eposta IN ({yer})", epostalar
+        )}
+        yolcular.update({row['yolcu_id']: row['yolcu_id'] for row in self._sorgula(
+            cursor, "SELECT yolcu_id FROM Yolcu WHERE yolcu_id IN ({yer})",
+            sorted({b['yolcu'] for b in biletler if isinstance(b['yolcu'], int)})
+        )})
+        dolu = set()
+        if sefer_ids:
+            cursor.execute(
+                f"""SELECT sefer_id, koltuk_no FROM Bilet
+                    WHERE sefer_id IN ({_in_listesi(sefer_ids)})
+                    AND koltuk_no IN ({_in_listesi(sorted({b['koltuk_no'] for b in biletler}))})
+                    AND durum != 'iade'""",
+                tuple(sefer_ids) + tuple(sorted({b['koltuk_no'] for b in biletler}))
+            )
+            dolu = {(row['sefer_id'], row['koltuk_no']) for row in cursor.fetchall()}
+        pnr_sahipleri = {row['pnr']: row['kullanici_id'] for row in self._sorgula(
+            cursor, "SELECT pnr, kullanici_id FROM Rezervasyon WHERE pnr IN ({yer})",
+            sorted({b['pnr'] for b in biletler})
+        )}
+
+        hatalar = []
+        gecerli = []
+        for satir_no, bilet in satirlar:
+            koltuk = (bilet['sefer_id'], bilet['koltuk_no'])
+            if bilet['sefer_id'] not in kapasite:
+                hatalar.append((satir_no, f'Sefer bulunamadı: {bilet["sefer_id"]}'))
+            elif bilet['koltuk_no'] > kapasite[bilet['sefer_id']]:
+                hatalar.append((satir_no, 'Koltuk numarası tren kapasitesini aşıyor!'))
+            elif bilet['kullanici_id'] not in kullanicilar:
+                hatalar.append((satir_no, f'Kullanıcı bulunamadı: {bilet["kullanici_id"]}'))
+            elif bilet['yolcu'] not in yolcular:
+                hatalar.append((satir_no, f'Yolcu bulunamadı: {bilet["yolcu"]}'))
+            elif pnr_sahipleri.setdefault(bilet['pnr'], bilet['kullanici_id']) != bilet['kullanici_id']:
+                hatalar.append((satir_no, f'PNR başka bir kullanıcıya ait: {bilet["pnr"]}'))
+            elif bilet['durum'] != 'iade' and koltuk in dolu:
+                hatalar.append((satir_no, f'Koltuk dolu: sefer {koltuk[0]}, koltuk {koltuk[1]}'))
+            else:
+                if bilet['durum'] != 'iade':
+                    dolu.add(koltuk)
+                gecerli.append(bilet)
+        if not gecerli:
+            return 0, 0, hatalar
+
+        yeni_rezervasyonlar = {}
+        for bilet in gecerli:
+            yeni_rezervasyonlar.setdefault(bilet['pnr'], (
+                bilet['pnr'], bilet['kullanici_id'], bilet['rezervasyon_durum'],
+                bilet['olusturulma'] or datetime.now()
+            ))
+        cursor.execute(
+            f"SELECT pnr FROM Rezervasyon WHERE pnr IN ({_in_listesi(yeni_rezervasyonlar)})",
+            tuple(yeni_rezervasyonlar)
+        )
+        mevcut = {row['pnr'] for row in cursor.fetchall()}
+        eklenecek = [r for pnr, r in yeni_rezervasyonlar.items() if pnr not in mevcut]
+        if eklenecek:
+            cursor.executemany(
+                """INSERT INTO Rezervasyon (pnr, kullanici_id, durum, olusturulma_zamani)
+                   VALUES (%s, %s, %s, %s)""",
+                eklenecek
+            )
+        cursor.execute(
+            f"SELECT rezervasyon_id, pnr FROM Rezervasyon WHERE pnr IN ({_in_listesi(yeni_rezervasyonlar)})",
+            tuple(yeni_rezervasyonlar)
+        )
+        rezervasyon_idler = {row['pnr']: row['rezervasyon_id'] for row in cursor.fetchall()}
+
+        cursor.executemany(
+            """INSERT INTO Bilet (rezervasyon_id, sefer_id, yolcu_id, koltuk_no, fiyat, durum)
+               VALUES (%s, %s, %s, %s, %s, %s)""",
+            [
+                (rezervasyon_idler[b['pnr']], b['sefer_id'], yolcular[b['yolcu']],
+                 b['koltuk_no'], b['fiyat'], b['durum'])
+                for b in gecerli
+            ]
+        )
+
+        # Tetikleyicilerin satır başına yaptığını parti başına bir kez, küme halinde yap
+        idler = sorted(set(rezervasyon_idler.values()))
+        cursor.execute(
+            f"""
+            UPDATE Rezervasyon r
+            JOIN (
+                SELECT rezervasyon_id, SUM(fiyat) AS toplam
+                FROM Bilet
+                WHERE rezervasyon_id IN ({_in_listesi(idler)})
+                GROUP BY rezervasyon_id
+            ) b ON b.rezervasyon_id = r.rezervasyon_id
+            SET r.toplam_tutar = b.toplam
+            """,
+            tuple(idler)
+        )
+        sayaclari_guncelle(cursor, Counter(b['sefer_id'] for b in gecerli if b['durum'] != 'iade'))
+        return len(gecerli), 0, hatalar
+
+
+AKTARICILAR = {
+    'istasyon': IstasyonAktarici,
+    'tren': TrenAktarici,
+    'yolcu': YolcuAktarici,
+    'bilet': BiletAktarici,
+}
+
+
+def satirlari_oku(akis, bicim):
+    """
+    Metin akışından (satir_no, kayit) üretir; satir_no başlık hariç 1'den
+    başlar. Çözülemeyen NDJSON satırında kayit SatirHatasi olur.
+    """
+    if bicim == 'csv':
+        for satir_no, kayit in enumerate(csv.DictReader(akis), 1):
+            yield satir_no, kayit
+        return
+    satir_no = 0
+    for satir in akis:
+        if not satir.strip():
+            continue
+        satir_no += 1
+        try:
+            kayit = json.loads(satir)
+            if not isinstance(kayit, dict):
+                raise ValueError
+        except ValueError:
+            kayit = SatirHatasi('Geçersiz JSON satırı')
+        yield satir_no, kayit
+
+
+def kontrol_noktasi(database, ad):
+    """Bu adla yapılan aktarımın en son commit edilen satırı (yoksa 0)"""
+    satirlar = database.execute_query(
+        "SELECT satir FROM IceAktarimDurumu WHERE ad = %s", (ad,), fetch=True, ayri_baglanti=True
+    )
+    return satirlar[0]['satir'] if satirlar else 0
+
+
+@contextmanager
+def _tetikleyicisiz(cursor):
+    """Bilet tetikleyicilerini bu bağlantıda kapatır (bkz. migration 007)"""
+    cursor.execute("SET @toplu_ice_aktarim = 1")
+    try:
+        yield
+    finally:
+        cursor.execute("SET @toplu_ice_aktarim = NULL")
+
+
+def ice_aktar(database, tur, akis, bicim, ad=None, parti_boyutu=PARTI_BOYUTU, bastan=False,
+              ilerleme=None, hata_bildir=None):
+    """
+    Args:
+        akis: metin akışı (dosya, TextIOWrapper(request.stream) ...)
+        ad: kaldığı yerden devam için aktarım adı (varsayılan: tur)
+        bastan: kayıtlı ilerlemeyi yok say, ilk satırdan başla
+        ilerleme: her parti commit edildikten sonra özet sözlüğüyle çağrılır
+        hata_bildir: her hatalı satır için (satir_no, mesaj) ile çağrılır
+    Returns:
+        özet sözlüğü (islenen, eklenen, atlanan, hatali, son_satir, hatalar ...)
+    """
+    aktarici = AKTARICILAR[tur]()
+    ad = ad or tur
+    baslangic_satiri = 0 if bastan else kontrol_noktasi(database, ad)
+    ozet = {
+        'tur': tur,
+        'ad': ad,
+        'baslangic_satiri': baslangic_satiri,
+        'son_satir': baslangic_satiri,
+        'islenen': 0,
+        'eklenen': 0,
+        'atlanan': 0,
+        'hatali': 0,
+        'hatalar': [],
+    }
+    baslangic = time.perf_counter()
+
+    def hatalari_ekle(hatalar):
+        ozet['hatali'] += len(hatalar)
+        for satir_no, mesaj in hatalar:
+            if len(ozet['hatalar']) < MAX_HATA_RAPORU:
+                ozet['hatalar'].append({'satir': satir_no, 'hata': mesaj})
+            if hata_bildir:
+                hata_bildir(satir_no, mesaj)
+
+    def parti_yaz(parti, son_satir):
+        gecerli, hatalar = [], []
+        for satir_no, kayit in parti:
+            try:
+                if isinstance(kayit, SatirHatasi):
+                    raise kayit
+                gecerli.append((satir_no, aktarici.dogrula(kayit)))
+            except SatirHatasi as e:
+                hatalar.append((satir_no, str(e)))
+
+        with database.transaction() as cursor:
+            eklenen = atlanan = 0
+            if gecerli:
+                with _tetikleyicisiz(cursor):
+                    eklenen, atlanan, yazma_hatalari = aktarici.yaz(cursor, gecerli)
+                hatalar.extend(yazma_hatalari)
+            cursor.execute(
+                """INSERT INTO IceAktarimDurumu (ad, tur, satir) VALUES (%s, %s, %s)
+                   ON DUPLICATE KEY UPDATE tur = VALUES(tur), satir = VALUES(satir)""",
+                (ad, tur, son_satir)
+            )
+
+        ozet['islenen'] += len(parti)
+        ozet['eklenen'] += eklenen
+        ozet['atlanan'] += atlanan
+        ozet['son_satir'] = son_satir
+        hatalari_ekle(sorted(hatalar))
+        ozet['sure_sn'] = round(time.perf_counter() - baslangic, 2)
+        if ilerleme:
+            ilerleme(ozet)
+
+    parti = []
+    for satir_no, kayit in satirlari_oku(akis, bicim):
+        if satir_no <= baslangic_satiri:
+            continue
+        parti.append((satir_no, kayit))
+        if len(parti) >= parti_boyutu:
+            parti_yaz(parti, satir_no)
+            parti = []
+    if parti:
+        parti_yaz(parti, parti[-1][0])
+    ozet['sure_sn'] = round(time.perf_counter() - baslangic, 2)
+    return ozet
+
+
+def bicim_tahmin(yol):
+    return 'ndjson' if os.path.splitext(yol)[1].lower() in ('.ndjson', '.jsonl') else 'csv'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CSV / NDJSON dosyasından toplu veri aktar')
+    parser.add_argument('tur', choices=sorted(AKTARICILAR))
+    parser.add_argument('dosya', help="Girdi dosyası ('-' = stdin)")
+    parser.add_argument('--format', choices=BICIMLER, help='Varsayılan: dosya uzantısından')
+    parser.add_argument('--ad', help='Kaldığı yerden devam için aktarım adı (varsayılan: tur)')
+    parser.add_argument('--parti', type=int, default=PARTI_BOYUTU, help='Transaction başına satır')
+    parser.add_argument('--bastan', action='store_true', help='Kayıtlı ilerlemeyi yok say')
+    parser.add_argument('--hatalar', help='Hatalı satırların yazılacağı NDJSON dosyası')
+    args = parser.parse_args(argv)
+
+    bicim = args.format or bicim_tahmin(args.dosya)
+    if args.dosya == '-':
+        akis = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+    else:
+        akis = open(args.dosya, encoding='utf-8-sig', newline='')
+    hata_dosyasi = open(args.hatalar, 'a', encoding='utf-8') if args.hatalar else None
+
+    def ilerleme(ozet):
+        hiz = ozet['islenen'] / ozet['sure_sn'] if ozet['sure_sn'] else 0
+        print(
+            f"satır {ozet['son_satir']}: {ozet['eklenen']} eklendi, {ozet['atlanan']} atlandı, "
+            f"{ozet['hatali']} hatalı ({hiz:.0f} satır/sn)",
+            file=sys.stderr
+        )
+
+    def hata_bildir(satir_no, mesaj):
+        if hata_dosyasi:
+            hata_dosyasi.write(json.dumps({'satir': satir_no, 'hata': mesaj}, ensure_ascii=False) + '\n')
+
+    try:
+        ozet = ice_aktar(
+            db, args.tur, akis, bicim, ad=args.ad, parti_boyutu=args.parti, bastan=args.bastan,
+            ilerleme=ilerleme, hata_bildir=hata_bildir
+        )
+    finally:
+        akis.close()
+        if hata_dosyasi:
+            hata_dosyasi.close()
+
+    if ozet['baslangic_satiri']:
+        print(f"{ozet['baslangic_satiri']}. satırdan devam edildi.", file=sys.stderr)
+    print(json.dumps({k: v for k, v in ozet.items() if k != 'hatalar'}, ensure_ascii=False))
+    return 1 if ozet['hatali'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Grup rezervasyonları için otomatik koltuk seçimi.
+
+Koltuklar numara sırasıyla dizili kabul edilir; yan yana koltuk = ardışık
+numara. Seferin boş koltukları (baslangic, uzunluk) aralıkları olarak
+tutulur (bkz. SeferKoltuklari.bos_araliklar) ve istenen sayıda yolcuya:
+
+  - sığan en kısa boş aralık seçilir (best-fit: büyük blokları sonraki
+    gruplar için bölmez), eşitlikte bolge tercihine en yakın olan,
+  - aralık içinde bolge tarafındaki uçtan koltuk alınır,
+  - tek aralığa sığmıyorsa ve bitisik zorunlu değilse grup en az parçaya
+    bölünür (en uzun aralıklardan başlanır).
+
+Seçim sefer satırı kilitliyken yapılır (bkz. rezervasyon_motoru
+.otomatik_rezervasyon_adimlari); istemci koltuk seçmediği için eşzamanlı
+grup rezervasyonları 409 ile dönmez.
+"""
+
+BOLGELER = ('on', 'arka')
+
+
+class AtamaHatasi(ValueError):
+    """Tercih parametreleri hatalı"""
+
+
+def bos_araliklar(kapasite, dolu_mu):
+    """
+    Boş koltukların maksimal ardışık aralıkları.
+
+    Args:
+        dolu_mu: koltuk_no -> bool
+    Returns:
+        [(baslangic, uzunluk), ...] başlangıca göre sıralı
+    """
+    araliklar = []
+    baslangic = None
+    for koltuk_no in range(1, kapasite + 1):
+        if dolu_mu(koltuk_no):
+            if baslangic is not None:
+                araliklar.append((baslangic, koltuk_no - baslangic))
+                baslangic = None
+        elif baslangic is None:
+            baslangic = koltuk_no
+    if baslangic is not None:
+        araliklar.append((baslangic, kapasite + 1 - baslangic))
+    return araliklar
+
+
+def tercih_coz(veri):
+    """İstekteki tercih sözlüğünü (bolge, bitisik) ikilisine çevirir"""
+    veri = veri or {}
+    if not isinstance(veri, dict):
+        raise AtamaHatasi('tercih bir nesne olmalıdır')
+    bolge = veri.get('bolge')
+    if bolge not in (None, *BOLGELER):
+        raise AtamaHatasi(f'bolge {" / ".join(BOLGELER)} olmalıdır')
+    return bolge, bool(veri.get('bitisik', False))
+
+
+def _yakinlik(aralik, bolge):
+    """Aralığın tercih edilen bölgeye uzaklığı (küçük = daha iyi)"""
+    baslangic, uzunluk = aralik
+    return -(baslangic + uzunluk) if bolge == 'arka' else baslangic
+
+
+def _al(aralik, adet, bolge):
+    baslangic, uzunluk = aralik
+    if bolge == 'arka':
+        baslangic += uzunluk - adet
+    return list(range(baslangic, baslangic + adet))
+
+
+def blok_sec(araliklar, adet, bolge=None, bitisik=False):
+    """
+    adet koltuk seçer.
+
+    Returns:
+        artan sırada koltuk numaraları; yeterli (bitisik ise yan yana) boş
+        koltuk yoksa None
+    """
+    sigan = [a for a in araliklar if a[1] >= adet]
+    if sigan:
+        en_iyi = min(sigan, key=lambda a: (a[1], _yakinlik(a, bolge)))
+        return _al(en_iyi, adet, bolge)
+    if bitisik or sum(a[1] for a in araliklar) < adet:
+        return None
+
+    koltuklar = []
+    for aralik in sorted(araliklar, key=lambda a: (-a[1], _yakinlik(a, bolge))):
+        alinacak = min(aralik[1], adet - len(koltuklar))
+        koltuklar.extend(_al(aralik, alinacak, bolge))
+        if len(koltuklar) == adet:
+            break
+    return sorted(koltuklar)
@@ -0,0 +1,225 @@
+import itertools
+import os
+import threading
+import time
+
+from database import db
+from koltuk_atama import bos_araliklar
+
+
+class SeferKoltuklari:
+    """Tek bir seferin koltuk doluluk bitmap'i (bit i-1 -> koltuk i)"""
+
+    # Süreç genelinde artan sayaç: bitmap atılıp yeniden yüklense de versiyon
+    # tekrar etmez (ETag'ler bu değerden üretilir)
+    _versiyon_sayaci = itertools.count(1)
+
+    __slots__ = ('toplam_koltuk', 'bitler', 'dolu_sayisi', 'versiyon', 'yuklenme_zamani', '_liste', '_araliklar')
+
+    def __init__(self, toplam_koltuk, dolu_koltuklar=()):
+        self.toplam_koltuk = toplam_koltuk
+        self.bitler = bytearray((toplam_koltuk + 7) // 8)
+        self.dolu_sayisi = 0
+        self.versiyon = next(self._versiyon_sayaci)
+        self.yuklenme_zamani = time.monotonic()
+        self._liste = None
+        self._araliklar = None
+        for koltuk_no in dolu_koltuklar:
+            self._ayarla(koltuk_no, True)
+
+    def dolu_mu(self, koltuk_no):
+        i = koltuk_no - 1
+        return bool(self.bitler[i >> 3] & (1 << (i & 7)))
+
+    def _ayarla(self, koltuk_no, dolu):
+        """Bit'i değiştirir; durum gerçekten değiştiyse True döner"""
+        if not 1 <= koltuk_no <= self.toplam_koltuk:
+            return False
+        i = koltuk_no - 1
+        maske = 1 << (i & 7)
+        onceki = bool(self.bitler[i >> 3] & maske)
+        if onceki == dolu:
+            return False
+        if dolu:
+            self.bitler[i >> 3] |= maske
+            self.dolu_sayisi += 1
+        else:
+            self.bitler[i >> 3] &= ~maske
+            self.dolu_sayisi -= 1
+        return True
+
+    def guncelle(self, koltuklar, dolu):
+        degisti = False
+        for koltuk_no in koltuklar:
+            degisti = self._ayarla(koltuk_no, dolu) or degisti
+        if degisti:
+            self.versiyon = next(self._versiyon_sayaci)
+            self._liste = None
+            self._araliklar = None
+
+    def koltuk_listesi(self):
+        """Endpoint'in döndürdüğü koltuk listesi (versiyon değişene kadar yeniden kullanılır)"""
+        if self._liste is None:
+            self._liste = [
+                {'koltuk_no': i, 'durum': 'dolu' if self.dolu_mu(i) else 'bos'}
+                for i in range(1, self.toplam_koltuk + 1)
+            ]
+        return self._liste
+
+    def bos_araliklar(self):
+        """Boş koltuk aralıkları (bkz. koltuk_atama), versiyon değişene kadar yeniden kullanılır"""
+        if self._araliklar is None:
+            self._araliklar = bos_araliklar(self.toplam_koltuk, self.dolu_mu)
+        return self._araliklar
+
+
+YUKLEME_SORGUSU = """
+    SELECT t.koltuk_sayisi, b.koltuk_no
+    FROM Sefer s
+    JOIN Tren t ON s.tren_id = t.tren_id
+    LEFT JOIN Bilet b ON b.sefer_id = s.sefer_id AND b.durum != 'iade'
+    WHERE s.sefer_id = %s
+"""
+
+
+def _haritaya_cevir(satirlar):
+    """YUKLEME_SORGUSU sonucundan bitmap (sefer yoksa None)"""
+    if not satirlar:
+        return None
+    return SeferKoltuklari(
+        satirlar[0]['koltuk_sayisi'],
+        (s['koltuk_no'] for s in satirlar if s['koltuk_no'] is not None)
+    )
+
+
+class KoltukHaritasi:
+    """
+    Sefer bazlı koltuk doluluk bitmap'lerini süreç içinde tutar.
+
+    Bir seferin bitmap'i ilk istekte Bilet tablosundan tek sorguyla yüklenir;
+    sonrasında rezervasyon, iptal ve ödeme akışları isaretle_dolu / isaretle_bos
+    ile günceller. KOLTUK_HARITASI_TTL (saniye, 0 = süresiz) verilirse bitmap bu
+    süre dolunca veritabanından yeniden okunur.
+
+    asyncio modu (asgi.py) kilit tutarak await edemeyeceği için yüklemeyi
+    hazir() / yukleme_isareti() / yerlestir() ile kendisi yapar.
+    """
+
+    def __init__(self, database, ttl=None):
+        self.db = database
+        self.ttl = float(os.getenv('KOLTUK_HARITASI_TTL', '0')) if ttl is None else ttl
+        self._sifirla()
+        # fork sonrası çocuk süreç ebeveynin bitmap'lerini ve kilitlerini devralmaz
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._sifirla)
+
+    def _sifirla(self):
+        self._seferler = {}
+        self._kilitler = {}
+        self._kilit = threading.Lock()
+        # Kilitsiz (async) yüklemeler sırasında kaçırılan güncellemeleri fark
+        # etmek için: sefer bazlı ve genel değişiklik sayaçları
+        self._degisiklikler = {}
+        self._genel_degisiklik = 0
+
+    def _sefer_kilidi(self, sefer_id):
+        with self._kilit:
+            kilit = self._kilitler.get(sefer_id)
+            if kilit is None:
+                kilit = self._kilitler[sefer_id] = threading.Lock()
+            return kilit
+
+    def _suresi_doldu_mu(self, harita):
+        return self.ttl > 0 and time.monotonic() - harita.yuklenme_zamani > self.ttl
+
+    def _yukle(self, sefer_id):
+        # İsteğin iş birimi daha önce açılmış bir snapshot'ı görüyor olabilir;
+        # bitmap her zaman güncel veriden yüklenmeli
+        satirlar = self.db.execute_query(
+            YUKLEME_SORGUSU,
+            (sefer_id,),
+            fetch=True,
+            ayri_baglanti=True
+        )
+        return _haritaya_cevir(satirlar)
+
+    def hazir(self, sefer_id):
+        """Yüklü ve süresi dolmamış bitmap; yoksa None (yükleme yapmaz)"""
+        harita = self._seferler.get(sefer_id)
+        if harita is not None and not self._suresi_doldu_mu(harita):
+            return harita
+        return None
+
+    def getir(self, sefer_id):
+        """Seferin bitmap'ini döndürür; sefer yoksa None"""
+        harita = self.hazir(sefer_id)
+        if harita is not None:
+            return harita
+
+        # Yükleme sefer kilidi altında yapılır; böylece yükleme sırasında gelen
+        # isaretle_* çağrıları yüklenen bitmap'e uygulanır, kaybolmaz.
+        with self._sefer_kilidi(sefer_id):
+            harita = self._seferler.get(sefer_id)
+            if harita is None or self._suresi_doldu_mu(harita):
+                yeni = self._yukle(sefer_id)
+                if yeni is None:
+                    self._seferler.pop(sefer_id, None)
+                    return None
+                self._seferler[sefer_id] = harita = yeni
+            return harita
+
+    def yukleme_isareti(self, sefer_id):
+        """Kilitsiz yüklemeden önce alınır, yerlestir()'e verilir"""
+        with self._kilit:
+            return self._genel_degisiklik, self._degisiklikler.get(sefer_id, 0)
+
+    def yerlestir(self, sefer_id, satirlar, isaret):
+        """
+        YUKLEME_SORGUSU sonucundan bitmap kurar. Sorgu sürerken bu sefer için
+        isaretle_* / gecersiz_kil çağrıldıysa bitmap önbelleğe konmaz (bir
+        sonraki istek yeniden yükler). Sefer yoksa None döner.
+        """
+        harita = _haritaya_cevir(satirlar)
+        with self._sefer_kilidi(sefer_id):
+            if self.yukleme_isareti(sefer_id) == isaret:
+                if harita is None:
+                    self._seferler.pop(sefer_id, None)
+                else:
+                    self._seferler[sefer_id] = harita
+        return harita
+
+    def _degisti(self, sefer_id):
+        with self._kilit:
+            self._degisiklikler[sefer_id] = self._degisiklikler.get(sefer_id, 0) + 1
+
+    def _uygula(self, koltuklar, dolu):
+        sefer_bazli = {}
+        for sefer_id, koltuk_no in koltuklar:
+            sefer_bazli.setdefault(sefer_id, []).append(koltuk_no)
+        for sefer_id, nolar in sefer_bazli.items():
+            with self._sefer_kilidi(sefer_id):
+                self._degisti(sefer_id)
+                harita = self._seferler.get(sefer_id)
+                if harita is not None:
+                    harita.guncelle(nolar, dolu)
+
+    def isaretle_dolu(self, koltuklar):
+        """koltuklar: (sefer_id, koltuk_no) çiftleri"""
+        self._uygula(koltuklar, True)
+
+    def isaretle_bos(self, koltuklar):
+        """koltuklar: (sefer_id, koltuk_no) çiftleri"""
+        self._uygula(koltuklar, False)
+
+    def gecersiz_kil(self, sefer_id=None):
+        """Tek seferin (ya da sefer_id verilmezse tümünün) bitmap'ini at"""
+        with self._kilit:
+            if sefer_id is None:
+                self._seferler.clear()
+                self._genel_degisiklik += 1
+            else:
+                self._seferler.pop(sefer_id, None)
+                self._degisiklikler[sefer_id] = self._degisiklikler.get(sefer_id, 0) + 1
+
+
+koltuk_haritasi = KoltukHaritasi(db)
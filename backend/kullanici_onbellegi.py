@@ -0,0 +1,109 @@
+"""
+Oturumdaki kullanıcının (kimlik, rol) süreç içi önbelleği.
+
+Oturum çerezi yalnızca user_id taşır; rol ve aktiflik her istekte buradan
+okunur. Kayıt ilk istekte Kullanici tablosundan yüklenir ve
+KULLANICI_ONBELLEK_TTL saniye kullanılır. Bu süreçte rol / aktif değişince
+gecersiz_kil çağrılır; diğer worker'lar değişikliği en geç TTL sonunda görür.
+Silinmiş ya da devre dışı kullanıcı da (None olarak) önbelleğe alınır.
+
+asyncio modu (asgi.py) yüklemeyi hazir() / yukleme_isareti() / yerlestir()
+ile kendisi yapar.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from database import db
+
+KULLANICI_SORGUSU = """
+    SELECT kullanici_id, kullanici_adi, eposta, ad_soyad, telefon, rol
+    FROM Kullanici WHERE kullanici_id = %s AND aktif = TRUE
+"""
+
+# hazir(): önbellekte kayıt yok (None, devre dışı kullanıcı demektir)
+YOK = object()
+
+
+class KullaniciOnbellegi:
+    def __init__(self, database, ttl=None, boyut=None):
+        self.db = database
+        self.ttl = float(os.getenv('KULLANICI_ONBELLEK_TTL', '30')) if ttl is None else ttl
+        self.boyut = int(os.getenv('KULLANICI_ONBELLEK_BOYUT', '10000')) if boyut is None else boyut
+        self._sifirla()
+        # fork sonrası çocuk süreç ebeveynin kayıtlarını ve kilidini devralmaz
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._sifirla)
+
+    def _sifirla(self):
+        self._kayitlar = OrderedDict()
+        self._kilit = threading.Lock()
+        # Yükleme sürerken yapılan gecersiz_kil çağrılarını fark etmek için
+        self._degisiklik = 0
+        self.isabet = 0
+        self.iska = 0
+
+    def hazir(self, kullanici_id):
+        """Süresi dolmamış kayıt (kullanıcı sözlüğü ya da None); yoksa YOK"""
+        with self._kilit:
+            kayit = self._kayitlar.get(kullanici_id)
+            if kayit is None or time.monotonic() - kayit[1] > self.ttl:
+                self.iska += 1
+                return YOK
+            self._kayitlar.move_to_end(kullanici_id)
+            self.isabet += 1
+            return kayit[0]
+
+    def yukleme_isareti(self):
+        """Yüklemeden önce alınır, yerlestir()'e verilir"""
+        with self._kilit:
+            return self._degisiklik
+
+    def yerlestir(self, kullanici_id, satirlar, isaret):
+        """
+        KULLANICI_SORGUSU sonucundan kaydı kurar. Sorgu sürerken gecersiz_kil
+        çağrıldıysa kayıt önbelleğe konmaz (bir sonraki istek yeniden yükler).
+        """
+        kullanici = dict(satirlar[0]) if satirlar else None
+        with self._kilit:
+            if self._degisiklik == isaret and self.ttl > 0:
+                self._kayitlar[kullanici_id] = (kullanici, time.monotonic())
+                self._kayitlar.move_to_end(kullanici_id)
+                while len(self._kayitlar) > self.boyut:
+                    self._kayitlar.popitem(last=False)
+        return kullanici
+
+    def getir(self, kullanici_id):
+        """Aktif kullanıcının bilgileri; kullanıcı yoksa ya da devre dışıysa None"""
+        kullanici = self.hazir(kullanici_id)
+        if kullanici is not YOK:
+            return kullanici
+        isaret = self.yukleme_isareti()
+        # İsteğin iş birimi eski bir snapshot görüyor olabilir; rol ve
+        # aktiflik her zaman güncel veriden okunmalı
+        satirlar = self.db.execute_query(
+            KULLANICI_SORGUSU, (kullanici_id,), fetch=True, ayri_baglanti=True
+        )
+        return self.yerlestir(kullanici_id, satirlar, isaret)
+
+    def gecersiz_kil(self, kullanici_id=None):
+        """Tek kullanıcının (ya da kullanici_id verilmezse tümünün) kaydını at"""
+        with self._kilit:
+            self._degisiklik += 1
+            if kullanici_id is None:
+                self._kayitlar.clear()
+            else:
+                self._kayitlar.pop(kullanici_id, None)
+
+    def durum(self):
+        with self._kilit:
+            return {
+                'kayit': len(self._kayitlar),
+                'isabet': self.isabet,
+                'iska': self.iska,
+                'ttl': self.ttl
+            }
+
+
+kullanici_onbellegi = KullaniciOnbellegi(db)
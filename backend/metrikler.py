@@ -0,0 +1,135 @@
+"""
+Prometheus metrikleri (/metrics).
+
+Çok worker'lı çalışmada (sunucu.py) PROMETHEUS_MULTIPROC_DIR ayarlanır ve
+her worker metriklerini bu dizindeki dosyalara yazar; /metrics hangi
+worker'a düşerse düşsün tüm worker'ların toplamını döndürür. Tek süreçte
+dizin gerekmez.
+
+Havuz ve önbellek değerleri her istek sonunda ve scrape anında güncellenir;
+havuz gauge'ları sync (Flask) ve async (WEB_MODU=asgi) havuzu ayrı etiketle
+yayınlar.
+Counter'lar Prometheus kuralıyla _total sonekiyle yayınlanır.
+Önbellek hit oranı PromQL ile hesaplanır:
+    rate(db_onbellek_hit_total[5m]) / (rate(db_onbellek_hit_total[5m]) + rate(db_onbellek_miss_total[5m]))
+"""
+import os
+import threading
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+
+from async_database import adb
+from database import db
+
+COK_SUREC = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+ICERIK_TIPI = CONTENT_TYPE_LATEST
+
+SURE_KOVALARI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+istek_sayaci = Counter(
+    'http_istekleri', 'HTTP istek sayısı', ['route', 'method', 'status']
+)
+istek_suresi = Histogram(
+    'http_istek_suresi_saniye', 'HTTP istek süresi', ['route', 'method'], buckets=SURE_KOVALARI
+)
+aktif_istek = Gauge(
+    'http_aktif_istekler', 'İşlenmekte olan istek sayısı', multiprocess_mode='livesum'
+)
+rezervasyon_sonuclari = Counter(
+    'rezervasyon_sonuclari',
+    'Rezervasyon denemeleri (basarili, cakisma, gecersiz, hata)', ['sonuc']
+)
+
+# havuz etiketi: sync (mysql-connector, Flask) ya da async (aiomysql, WEB_MODU=asgi)
+havuz_boyutu = Gauge(
+    'db_havuz_boyut', 'Bağlantı havuzu boyutu', ['havuz'], multiprocess_mode='livesum'
+)
+havuz_kullanimda = Gauge(
+    'db_havuz_kullanimda', 'Kullanımdaki bağlantılar', ['havuz'], multiprocess_mode='livesum'
+)
+havuz_overflow = Gauge(
+    'db_havuz_overflow_kullanimda', 'Kullanımdaki geçici (overflow) bağlantılar', ['havuz'],
+    multiprocess_mode='livesum'
+)
+havuz_bekleyen = Gauge(
+    'db_havuz_bekleyen', 'Bağlantı için sırada bekleyenler', ['havuz'], multiprocess_mode='livesum'
+)
+
+# Havuz / önbellek kendi toplamlarını tutar; Counter'lara son görülen değerden
+# bu yana artış eklenir
+_SAYACLAR = {
+    ('havuz', 'checkout'): Counter('db_havuz_checkout', 'Havuzdan alınan bağlantı sayısı'),
+    ('havuz', 'zaman_asimi_sayisi'): Counter('db_havuz_zaman_asimi', 'Havuz bekleme zaman aşımları'),
+    ('havuz', 'checkout_hatasi'): Counter('db_havuz_hata', 'Bağlantı alma hataları'),
+    ('havuz', 'toplam_bekleme_sn'): Counter('db_havuz_bekleme_saniye', 'Havuzda toplam bekleme süresi'),
+    ('cache', 'hit'): Counter('db_onbellek_hit', 'Sorgu önbelleği isabetleri'),
+    ('cache', 'miss'): Counter('db_onbellek_miss', 'Sorgu önbelleği ıskaları'),
+    ('cache', 'eviction'): Counter('db_onbellek_eviction', 'Önbellekten atılan kayıtlar'),
+    ('cache', 'invalidation'): Counter('db_onbellek_invalidation', 'Yazma ile geçersiz olan kayıtlar'),
+}
+_son_degerler = {}
+_kilit = threading.Lock()
+
+
+def _sifirla():
+    global _kilit
+    _kilit = threading.Lock()
+    _son_degerler.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_sifirla)
+
+
+def durum_guncelle():
+    """Havuz ve önbellek istatistiklerini metriklere aktarır"""
+    kaynaklar = {'havuz': db.havuz_istatistikleri() or {}, 'cache': db.cache.istatistikler()}
+    # aiomysql havuzu overflow / bekleyen tutmaz; o gauge'lar 0 kalır
+    for etiket, havuz in (('sync', kaynaklar['havuz']), ('async', adb.havuz_istatistikleri() or {})):
+        havuz_boyutu.labels(etiket).set(havuz.get('boyut', 0))
+        havuz_kullanimda.labels(etiket).set(havuz.get('kullanimda', 0))
+        havuz_overflow.labels(etiket).set(havuz.get('overflow_kullanimda', 0))
+        havuz_bekleyen.labels(etiket).set(havuz.get('bekleyen', 0))
+
+    with _kilit:
+        for (kaynak, alan), sayac in _SAYACLAR.items():
+            deger = kaynaklar[kaynak].get(alan)
+            if deger is None:
+                continue
+            onceki = _son_degerler.get((kaynak, alan), 0)
+            if deger > onceki:
+                sayac.inc(deger - onceki)
+            _son_degerler[(kaynak, alan)] = deger
+
+
+def istek_baslangici():
+    aktif_istek.inc()
+
+
+def istek_bitti(route, method, status, sure):
+    """route: şablon biçiminde yol (ör. /api/seferler/<int:sefer_id>) - kardinalite sınırlı kalır"""
+    istek_sayaci.labels(route, method, str(status)).inc()
+    istek_suresi.labels(route, method).observe(sure)
+
+
+def istek_sonlandi():
+    """İstek nasıl biterse bitsin (hata dahil) bir kez çağrılır"""
+    aktif_istek.dec()
+
+
+def rezervasyon_sonucu(sonuc):
+    rezervasyon_sonuclari.labels(sonuc).inc()
+
+
+def metin():
+    """Prometheus text exposition çıktısı"""
+    durum_guncelle()
+    if COK_SUREC:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
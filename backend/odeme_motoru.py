@@ -0,0 +1,143 @@
+"""
+Ödeme ve iptal işlemlerinin transaction adımları (bkz. sorgu_adimlari).
+
+Flask handler'ları db.adimlari_calistir, asyncio modu adb.adimlari_calistir
+ile aynı adımları çalıştırır. Yetki / durum hataları RezervasyonHatasi
+olarak fırlatılır ve transaction geri alınır.
+"""
+from decimal import Decimal, InvalidOperation
+
+from doluluk import sayac_sorgusu, sefer_bazli_say
+from rezervasyon_motoru import RezervasyonHatasi
+from sorgu_adimlari import Sorgu
+
+
+# Rezervasyon satırı kilitlenir; biletler ve ödeme aynı sorguda okunur.
+# Aynı rezervasyonun bilet durumlarını değiştiren her işlem önce bu kilidi
+# alır, bu yüzden kontroller ve durum geçişleri yarışmaz.
+KILITLI_REZERVASYON_SORGUSU = """
+    SELECT r.rezervasyon_id, r.pnr, r.toplam_tutar, r.durum, r.kullanici_id, o.odeme_id,
+           b.sefer_id, b.koltuk_no, b.durum AS bilet_durum
+    FROM Rezervasyon r
+    LEFT JOIN Odeme o ON o.rezervasyon_id = r.rezervasyon_id
+    LEFT JOIN Bilet b ON b.rezervasyon_id = r.rezervasyon_id
+    WHERE r.rezervasyon_id = %s
+    FOR UPDATE OF r, b
+"""
+
+
+def _rezervasyonu_kilitle(rezervasyon_id, kullanici_id, is_admin, yetki_mesaji):
+    """Rezervasyonu ve biletlerini tek sorguda kilitleyip okur; yetkiyi kontrol eder"""
+    sonuc = yield Sorgu(KILITLI_REZERVASYON_SORGUSU, (rezervasyon_id,))
+    if not sonuc.satirlar:
+        raise RezervasyonHatasi('Rezervasyon bulunamadı', status=404)
+    ilk = sonuc.satirlar[0]
+    if not is_admin and ilk['kullanici_id'] != kullanici_id:
+        raise RezervasyonHatasi(yetki_mesaji, status=403)
+    rezervasyon = {
+        alan: ilk[alan]
+        for alan in ('rezervasyon_id', 'pnr', 'toplam_tutar', 'durum', 'kullanici_id', 'odeme_id')
+    }
+    rezervasyon['biletler'] = [
+        {'sefer_id': b['sefer_id'], 'koltuk_no': b['koltuk_no'], 'durum': b['bilet_durum']}
+        for b in sonuc.satirlar if b['sefer_id'] is not None
+    ]
+    return rezervasyon
+
+
+def _koltuklar(biletler):
+    return [(b['sefer_id'], b['koltuk_no']) for b in biletler]
+
+
+def iptal_adimlari(rezervasyon_id, kullanici_id, is_admin):
+    """
+    Rezervasyonu iptal eder, biletleri iade durumuna alır ve boşalan koltuk
+    kadar doluluk sayaçlarını azaltır.
+
+    Returns:
+        {'rezervasyon': yeni durum, 'iade_koltuklar': [(sefer_id, koltuk_no), ...]}
+    """
+    rezervasyon = yield from _rezervasyonu_kilitle(
+        rezervasyon_id, kullanici_id, is_admin, 'Bu rezervasyonu iptal etme yetkiniz yok'
+    )
+    if rezervasyon['durum'] == 'iptal':
+        raise RezervasyonHatasi('Rezervasyon zaten iptal edilmiş')
+
+    aktif = [b for b in rezervasyon['biletler'] if b['durum'] != 'iade']
+    yield Sorgu("UPDATE Rezervasyon SET durum = 'iptal' WHERE rezervasyon_id = %s", (rezervasyon_id,))
+    if aktif:
+        yield Sorgu(
+            "UPDATE Bilet SET durum = 'iade' WHERE rezervasyon_id = %s AND durum != 'iade'",
+            (rezervasyon_id,)
+        )
+
+    iade_koltuklar = _koltuklar(aktif)
+    sayac = sayac_sorgusu({sid: -n for sid, n in sefer_bazli_say(iade_koltuklar).items()})
+    if sayac:
+        yield sayac
+
+    rezervasyon['durum'] = 'iptal'
+    for bilet in aktif:
+        bilet['durum'] = 'iade'
+    return {'rezervasyon': rezervasyon, 'iade_koltuklar': iade_koltuklar}
+
+
+def odeme_adimlari(rezervasyon_id, kullanici_id, is_admin, yontem, tutar):
+    """
+    Ödemeyi kaydeder, rezervasyonu 'odendi', rezerve biletleri 'kesildi'
+    yapar. İade edilmiş biletler iade durumunda kalır; koltukları başka
+    rezervasyona satılmış olabileceği için yeniden açılmaz.
+
+    Returns:
+        {'odeme_id', 'rezervasyon': yeni durum, 'koltuklar': [(sefer_id, koltuk_no), ...]}
+    """
+    try:
+        tutar = Decimal(str(tutar))
+    except (InvalidOperation, ValueError):
+        raise RezervasyonHatasi('Ödeme tutarı geçersiz')
+    if not tutar.is_finite():
+        raise RezervasyonHatasi('Ödeme tutarı geçersiz')
+
+    rezervasyon = yield from _rezervasyonu_kilitle(
+        rezervasyon_id, kullanici_id, is_admin, 'Bu rezervasyon için işlem yapma yetkiniz yok'
+    )
+    if rezervasyon['durum'] == 'odendi':
+        raise RezervasyonHatasi('Rezervasyon zaten ödenmiş')
+    if rezervasyon['durum'] == 'iptal':
+        raise RezervasyonHatasi('İptal edilmiş rezervasyon için ödeme yapılamaz')
+    if rezervasyon['odeme_id'] is not None:
+        raise RezervasyonHatasi('Bu rezervasyon için ödeme zaten mevcut')
+
+    toplam_tutar = rezervasyon['toplam_tutar']
+    if abs(tutar - toplam_tutar) > Decimal('0.01'):
+        raise RezervasyonHatasi(
+            f'Ödeme tutarı rezervasyon tutarı ile eşleşmiyor. Beklenen: {float(toplam_tutar)}'
+        )
+
+    sonuc = yield Sorgu(
+        """
+        INSERT INTO Odeme
+        (rezervasyon_id, yontem, tutar, durum)
+        VALUES (%s, %s, %s, 'basarili')
+        """,
+        (rezervasyon_id, yontem, tutar)
+    )
+    odeme_id = sonuc.lastrowid
+
+    kesilecek = [b for b in rezervasyon['biletler'] if b['durum'] == 'rezerve']
+    yield Sorgu("UPDATE Rezervasyon SET durum = 'odendi' WHERE rezervasyon_id = %s", (rezervasyon_id,))
+    if kesilecek:
+        yield Sorgu(
+            "UPDATE Bilet SET durum = 'kesildi' WHERE rezervasyon_id = %s AND durum = 'rezerve'",
+            (rezervasyon_id,)
+        )
+
+    rezervasyon['durum'] = 'odendi'
+    rezervasyon['odeme_id'] = odeme_id
+    for bilet in kesilecek:
+        bilet['durum'] = 'kesildi'
+    return {
+        'odeme_id': odeme_id,
+        'rezervasyon': rezervasyon,
+        'koltuklar': _koltuklar(b for b in rezervasyon['biletler'] if b['durum'] != 'iade')
+    }
@@ -0,0 +1,152 @@
+"""
+Veritabanına sorgu atmadan çakışmasız PNR üretimi.
+
+Her süreç PnrSayac tablosundan blok halinde (PNR_BLOK_BOYUTU adet) sıra
+numarası ayırır; blok tek bir UPDATE ile alınır ve hemen commit edilir, bu
+yüzden farklı worker'lar / sunucular asla aynı numarayı almaz. Numara 36
+tabanında 5 haneye karıştırılarak (tahmin edilemesin diye) kodlanır ve sonuna
+bir kontrol karakteri eklenir: ABC12X gibi 6 karakter. 36^5 numara tükenince
+kodlar birer karakter uzar; farklı uzunluktaki kodlar çakışmaz.
+"""
+import os
+import threading
+from collections import deque
+
+from database import db
+from sorgu_adimlari import Sorgu
+
+ALFABE = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+TABAN = len(ALFABE)
+MIN_HANE = 5
+# Karıştırma: n -> (n * CARPAN + KAYDIRMA) mod 36^hane. CARPAN 2 ve 3'e
+# bölünmediği için her hane sayısında birebirdir.
+CARPAN = 31 ** 5
+KAYDIRMA = 12345678
+# Kontrol karakteri ağırlıkları 36 ile aralarında asal: tek karakter hataları yakalanır
+AGIRLIKLAR = (1, 5, 7, 11, 13, 17, 19, 23, 25)
+
+BLOK_SORGUSU = "UPDATE PnrSayac SET son_deger = LAST_INSERT_ID(son_deger + %s) WHERE ad = 'pnr'"
+
+
+def _kontrol_karakteri(govde):
+    toplam = sum(ALFABE.index(c) * AGIRLIKLAR[i % len(AGIRLIKLAR)] for i, c in enumerate(govde))
+    return ALFABE[toplam % TABAN]
+
+
+def pnr_kodla(numara):
+    """Sıra numarasını (>= 0) PNR koduna çevirir; farklı numaralar farklı kod verir"""
+    hane = MIN_HANE
+    while numara >= TABAN ** hane:
+        hane += 1
+    deger = (numara * CARPAN + KAYDIRMA) % TABAN ** hane
+    govde = []
+    for _ in range(hane):
+        deger, kalan = divmod(deger, TABAN)
+        govde.append(ALFABE[kalan])
+    govde = ''.join(reversed(govde))
+    return govde + _kontrol_karakteri(govde)
+
+
+def pnr_gecerli_mi(pnr):
+    """Kontrol karakterini doğrular (eski, rastgele üretilmiş PNR'ler genellikle geçmez)"""
+    pnr = (pnr or '').upper()
+    if len(pnr) <= MIN_HANE or any(c not in ALFABE for c in pnr):
+        return False
+    return _kontrol_karakteri(pnr[:-1]) == pnr[-1]
+
+
+def _blok_adimlari(blok_boyutu):
+    sonuc = yield Sorgu(BLOK_SORGUSU, (blok_boyutu,))
+    if not sonuc.rowcount:
+        raise RuntimeError("PnrSayac tablosunda 'pnr' satırı yok (migration 005 uygulanmalı)")
+    return sonuc.lastrowid
+
+
+class PnrAyirici:
+    """
+    Süreç içi PNR havuzu. sonraki() bloktan numara çeker. Yeni blok
+    rezervasyon transaction'ı başlamadan önce hazirla() / ahazirla() ile
+    ayrılır: transaction Sefer kilitlerini ve bağlantısını tutarken ikinci
+    bir havuz bağlantısı istemez, diğer thread'ler de bir sorgu süresince
+    beklemez.
+    """
+
+    def __init__(self, database, blok_boyutu=None):
+        self.db = database
+        self.blok_boyutu = int(os.getenv('PNR_BLOK_BOYUTU', '100')) if blok_boyutu is None else blok_boyutu
+        self._sifirla()
+        # Ebeveynden kopyalanan blok çocuk süreçlerde tekrar kullanılmamalı
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._sifirla)
+
+    def _sifirla(self):
+        self._kilit = threading.Lock()
+        # Aynı anda tek thread blok ayırır; numarası olanlar onu beklemez
+        self._yenileme = threading.Lock()
+        self._bloklar = deque()  # [ilk, son) aralıkları
+
+    def _blok_ekle(self, son_deger):
+        self._bloklar.append([son_deger - self.blok_boyutu + 1, son_deger + 1])
+
+    def _kalan(self):
+        return sum(son - ilk for ilk, son in self._bloklar)
+
+    def _blok_iste(self):
+        guncellenen = self.db.execute_query(BLOK_SORGUSU, (self.blok_boyutu,), ayri_baglanti=True)
+        if not guncellenen:
+            raise RuntimeError("PnrSayac tablosunda 'pnr' satırı yok (migration 005 uygulanmalı)")
+        return self.db.get_last_insert_id()
+
+    def hazirla(self):
+        """
+        Transaction'dan önce çağrılır: kalan numara yarım bloktan azsa yeni
+        blok ayırır. Numara kalmamışsa blok ayrılana kadar bekler, kalmışsa
+        başka thread zaten ayırıyorsa beklemeden döner.
+        """
+        with self._kilit:
+            kalan = self._kalan()
+        if kalan >= self.blok_boyutu // 2:
+            return
+        if not self._yenileme.acquire(blocking=kalan == 0):
+            return
+        try:
+            with self._kilit:
+                if self._kalan() >= self.blok_boyutu // 2:
+                    return
+            son_deger = self._blok_iste()
+            with self._kilit:
+                self._blok_ekle(son_deger)
+        finally:
+            self._yenileme.release()
+
+    def sonraki(self):
+        """
+        Yeni PNR; veritabanına gitmez. Numara kalmamışsa (hazirla'dan sonra
+        yarım bloktan fazla eşzamanlı rezervasyon) blok yine de kilit
+        dışında ayrılır.
+        """
+        while True:
+            with self._kilit:
+                if self._bloklar:
+                    blok = self._bloklar[0]
+                    numara = blok[0]
+                    blok[0] += 1
+                    if blok[0] >= blok[1]:
+                        self._bloklar.popleft()
+                    return pnr_kodla(numara)
+            self.hazirla()
+
+    async def ahazirla(self, adb):
+        """
+        asyncio modu için hazirla karşılığı; blok event loop'u bloklamadan
+        AsyncDatabase ile ayrılır.
+        """
+        with self._kilit:
+            if self._kalan() >= self.blok_boyutu // 2:
+                return
+        son_deger = await adb.adimlari_calistir(lambda: _blok_adimlari(self.blok_boyutu))
+        with self._kilit:
+            self._blok_ekle(son_deger)
+
+
+pnr_ayirici = PnrAyirici(db)
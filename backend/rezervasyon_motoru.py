@@ -0,0 +1,311 @@
+from decimal import Decimal, InvalidOperation
+
+from mysql.connector import errorcode
+
+from doluluk import sayac_sorgusu, sefer_bazli_say
+from koltuk_atama import AtamaHatasi, blok_sec, bos_araliklar, tercih_coz
+from sorgu_adimlari import Sorgu, hata_kodu
+
+
+class RezervasyonHatasi(Exception):
+    """İstek verisinden kaynaklanan, istemciye 4xx olarak dönen hata"""
+
+    def __init__(self, mesaj, status=400):
+        super().__init__(mesaj)
+        self.status = status
+
+
+class KoltukCakismasi(RezervasyonHatasi):
+    """İstenen koltuklardan en az biri dolu"""
+
+    def __init__(self, conflicts):
+        super().__init__('Seçilen koltuklardan bazıları dolu.', status=409)
+        self.conflicts = conflicts
+
+
+MAX_PNR_DENEMESI = 10
+
+
+def _in_listesi(degerler):
+    return ', '.join(['%s'] * len(degerler))
+
+
+def _yolculari_dogrula(yolcular):
+    for yolcu in yolcular:
+        if not yolcu.get('ad_soyad') or not yolcu.get('eposta'):
+            raise RezervasyonHatasi('Yolcu ad_soyad ve eposta alanları zorunludur')
+
+
+def _fiyat(deger):
+    try:
+        fiyat = Decimal(str(deger))
+    except InvalidOperation:
+        raise RezervasyonHatasi('Fiyat geçersiz')
+    if not fiyat.is_finite() or fiyat <= 0:
+        raise RezervasyonHatasi('Koltuk numarası ve fiyat pozitif olmalıdır')
+    return fiyat
+
+
+def _dogrula(yolcular, biletler):
+    """Bilet/yolcu listesini doğrular, (sefer_id, koltuk_no) ikilileriyle normalize eder"""
+    if not yolcular or not biletler:
+        raise RezervasyonHatasi('En az bir yolcu ve bir bilet gereklidir')
+
+    _yolculari_dogrula(yolcular)
+
+    normal = []
+    for bilet in biletler:
+        try:
+            sefer_id = int(bilet['sefer_id'])
+            koltuk_no = int(bilet['koltuk_no'])
+            yolcu_index = int(bilet['yolcu_index'])
+            fiyat = Decimal(str(bilet['fiyat']))
+        except (KeyError, ValueError, TypeError, InvalidOperation):
+            raise RezervasyonHatasi('Bilet bilgileri eksik veya hatalı')
+        if not 0 <= yolcu_index < len(yolcular):
+            raise RezervasyonHatasi(f'Geçersiz yolcu_index: {yolcu_index}')
+        if koltuk_no <= 0 or fiyat <= 0:
+            raise RezervasyonHatasi('Koltuk numarası ve fiyat pozitif olmalıdır')
+        normal.append({
+            'sefer_id': sefer_id,
+            'koltuk_no': koltuk_no,
+            'yolcu_index': yolcu_index,
+            'fiyat': fiyat
+        })
+    return normal
+
+
+def _seferleri_kilitle(sefer_ids):
+    """
+    Sefer satırlarını sefer_id sırasıyla FOR UPDATE kilitler, {sefer_id:
+    koltuk_sayisi} döndürür. Aynı sefere gelen eşzamanlı rezervasyonlar
+    burada sıraya girer; sabit kilit sırası deadlock'ları önler.
+    """
+    sefer_ids = sorted(set(sefer_ids))
+    sonuc = yield Sorgu(
+        f"""
+        SELECT s.sefer_id, t.koltuk_sayisi
+        FROM Sefer s
+        JOIN Tren t ON s.tren_id = t.tren_id
+        WHERE s.sefer_id IN ({_in_listesi(sefer_ids)})
+        ORDER BY s.sefer_id
+        FOR UPDATE OF s
+        """,
+        tuple(sefer_ids)
+    )
+    kapasiteler = {row['sefer_id']: row['koltuk_sayisi'] for row in sonuc.satirlar}
+
+    eksik = [sid for sid in sefer_ids if sid not in kapasiteler]
+    if eksik:
+        raise RezervasyonHatasi(f'Sefer bulunamadı: {eksik[0]}', status=404)
+    return kapasiteler
+
+
+def _cakismalari_bul(biletler):
+    """Kilit altındayken istenen koltukların tamamını tek sorguda kontrol eder"""
+    istenen = [(b['sefer_id'], b['koltuk_no']) for b in biletler]
+
+    conflicts = []
+    gorulen = set()
+    for cift in istenen:
+        if cift in gorulen:
+            conflicts.append({'sefer_id': cift[0], 'koltuk_no': cift[1]})
+        gorulen.add(cift)
+
+    sefer_ids = sorted({c[0] for c in istenen})
+    koltuk_nolar = sorted({c[1] for c in istenen})
+    sonuc = yield Sorgu(
+        f"""
+        SELECT sefer_id, koltuk_no FROM Bilet
+        WHERE sefer_id IN ({_in_listesi(sefer_ids)})
+        AND koltuk_no IN ({_in_listesi(koltuk_nolar)})
+        AND durum != 'iade'
+        """,
+        tuple(sefer_ids) + tuple(koltuk_nolar)
+    )
+    for row in sonuc.satirlar:
+        cift = (row['sefer_id'], row['koltuk_no'])
+        if cift in gorulen:
+            conflicts.append({'sefer_id': cift[0], 'koltuk_no': cift[1]})
+    return conflicts
+
+
+def _yolculari_yaz(yolcular):
+    """Yolcuları toplu ekler (kayıtlı e-postalar olduğu gibi kalır), yolcu_id listesini döndürür"""
+    yield Sorgu(
+        """
+        INSERT INTO Yolcu (ad_soyad, eposta, telefon) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE yolcu_id = yolcu_id
+        """,
+        [(y['ad_soyad'], y['eposta'], y.get('telefon', '')) for y in yolcular],
+        coklu=True
+    )
+    epostalar = list({y['eposta'] for y in yolcular})
+    sonuc = yield Sorgu(
+        f"SELECT yolcu_id, eposta FROM Yolcu WHERE eposta IN ({_in_listesi(epostalar)})",
+        tuple(epostalar)
+    )
+    idler = {row['eposta'].lower(): row['yolcu_id'] for row in sonuc.satirlar}
+    return [idler[y['eposta'].lower()] for y in yolcular]
+
+
+def _rezervasyon_ekle(kullanici_id, pnr_uret):
+    for _ in range(MAX_PNR_DENEMESI):
+        pnr = pnr_uret()
+        try:
+            sonuc = yield Sorgu(
+                "INSERT INTO Rezervasyon (pnr, durum, kullanici_id) VALUES (%s, 'olusturuldu', %s)",
+                (pnr, kullanici_id)
+            )
+            return sonuc.lastrowid, pnr
+        except Exception as e:
+            # Yalnızca bu INSERT geri alınır, transaction devam eder
+            if hata_kodu(e) != errorcode.ER_DUP_ENTRY:
+                raise
+    raise Exception("PNR oluşturulamadı. Lütfen tekrar deneyin.")
+
+
+def rezervasyon_adimlari(kullanici_id, yolcular, biletler, pnr_uret):
+    """
+    Rezervasyonu tek transaction içinde oluşturan adımlar (bkz. sorgu_adimlari).
+
+    Sefer satırları kilitlenir, koltuklar tek sorguda kontrol edilir, yolcular
+    ve biletler toplu eklenir ve sefer doluluk sayaçları artırılır. Herhangi
+    bir hata tüm yazmaları geri alır; yarım kalmış rezervasyon oluşmaz.
+    biletler _dogrula'dan geçmiş olmalıdır.
+    """
+    kapasiteler = yield from _seferleri_kilitle(b['sefer_id'] for b in biletler)
+    for bilet in biletler:
+        if bilet['koltuk_no'] > kapasiteler[bilet['sefer_id']]:
+            raise RezervasyonHatasi(f'Koltuk numarası tren kapasitesini aşıyor: {bilet["koltuk_no"]}')
+
+    conflicts = yield from _cakismalari_bul(biletler)
+    if conflicts:
+        raise KoltukCakismasi(conflicts)
+
+    return (yield from _rezervasyonu_yaz(kullanici_id, yolcular, biletler, pnr_uret))
+
+
+def _rezervasyonu_yaz(kullanici_id, yolcular, biletler, pnr_uret):
+    """Kilit ve koltuk kontrolünden sonra: yolcular, rezervasyon, biletler ve sayaçlar"""
+    yolcu_ids = yield from _yolculari_yaz(yolcular)
+    rezervasyon_id, pnr = yield from _rezervasyon_ekle(kullanici_id, pnr_uret)
+
+    yield Sorgu(
+        """
+        INSERT INTO Bilet
+        (rezervasyon_id, sefer_id, yolcu_id, koltuk_no, fiyat, durum)
+        VALUES (%s, %s, %s, %s, %s, 'rezerve')
+        """,
+        [
+            (rezervasyon_id, b['sefer_id'], yolcu_ids[b['yolcu_index']], b['koltuk_no'], b['fiyat'])
+            for b in biletler
+        ],
+        coklu=True
+    )
+    sayac = sayac_sorgusu(sefer_bazli_say((b['sefer_id'], b['koltuk_no']) for b in biletler))
+    if sayac:
+        yield sayac
+
+    return {
+        'rezervasyon_id': rezervasyon_id,
+        'pnr': pnr,
+        'toplam_tutar': sum(b['fiyat'] for b in biletler),
+        'koltuklar': [(b['sefer_id'], b['koltuk_no']) for b in biletler]
+    }
+
+
+def rezervasyon_olustur(database, kullanici_id, yolcular, biletler, pnr_uret):
+    """
+    Rezervasyonu tek bağlantı ve tek transaction içinde oluşturur; deadlock
+    durumunda transaction baştan denenir. database senkron Database ya da
+    AsyncDatabase olabilir (AsyncDatabase için dönen değer await edilir).
+
+    Returns:
+        {'rezervasyon_id', 'pnr', 'toplam_tutar', 'koltuklar'}
+    Raises:
+        RezervasyonHatasi / KoltukCakismasi
+    """
+    biletler = _dogrula(yolcular, biletler)
+    return database.adimlari_calistir(
+        lambda: rezervasyon_adimlari(kullanici_id, yolcular, biletler, pnr_uret)
+    )
+
+
+def _koltuk_sec(sefer_id, kapasite, adet, bolge, bitisik, araliklar):
+    """
+    Sefer kilitliyken koltuk seçer. araliklar (süreç içi koltuk haritasından)
+    verilmişse aday blok kilitli Tren kapasitesine ve tek sorguyla Bilet
+    tablosuna karşı doğrulanır; tutmazsa seferin dolu koltukları okunup
+    yeniden seçilir. Her iki durumda da seçim kilit altında yapıldığı için
+    çakışma olmaz.
+    """
+    if araliklar is not None:
+        aday = blok_sec(araliklar, adet, bolge, bitisik)
+        # Bitmap başka worker'ın küçülttüğü kapasiteden önce yüklenmiş olabilir
+        if aday and max(aday) <= kapasite:
+            sonuc = yield Sorgu(
+                f"""
+                SELECT koltuk_no FROM Bilet
+                WHERE sefer_id = %s AND koltuk_no IN ({_in_listesi(aday)}) AND durum != 'iade'
+                """,
+                (sefer_id, *aday)
+            )
+            if not sonuc.satirlar:
+                return aday
+
+    sonuc = yield Sorgu(
+        "SELECT koltuk_no FROM Bilet WHERE sefer_id = %s AND durum != 'iade'",
+        (sefer_id,)
+    )
+    dolu = {row['koltuk_no'] for row in sonuc.satirlar}
+    return blok_sec(bos_araliklar(kapasite, dolu.__contains__), adet, bolge, bitisik)
+
+
+def otomatik_rezervasyon_adimlari(kullanici_id, sefer_id, yolcular, fiyat, bolge, bitisik,
+                                  pnr_uret, araliklar=None):
+    """
+    Koltukları sunucu seçerek rezervasyon oluşturan adımlar (bkz. koltuk_atama).
+    Sefer satırı kilitliyken seçilip yazıldığı için koltuk çakışması olmaz;
+    yeterli boş koltuk yoksa 409 döner.
+    """
+    kapasiteler = yield from _seferleri_kilitle([sefer_id])
+    koltuklar = yield from _koltuk_sec(
+        sefer_id, kapasiteler[sefer_id], len(yolcular), bolge, bitisik, araliklar
+    )
+    if not koltuklar:
+        mesaj = 'Yan yana yeterli boş koltuk yok' if bitisik else 'Seferde yeterli boş koltuk yok'
+        raise RezervasyonHatasi(mesaj, status=409)
+
+    biletler = [
+        {'sefer_id': sefer_id, 'koltuk_no': koltuk_no, 'yolcu_index': i, 'fiyat': fiyat}
+        for i, koltuk_no in enumerate(koltuklar)
+    ]
+    return (yield from _rezervasyonu_yaz(kullanici_id, yolcular, biletler, pnr_uret))
+
+
+def otomatik_rezervasyon_olustur(database, kullanici_id, sefer_id, yolcular, fiyat, tercih,
+                                 pnr_uret, araliklar=None):
+    """
+    rezervasyon_olustur'un otomatik koltuk seçen karşılığı.
+
+    Args:
+        tercih: {'bolge': 'on' | 'arka', 'bitisik': bool} (isteğe bağlı)
+        araliklar: seferin süreç içi boş koltuk aralıkları (ipucu, isteğe bağlı)
+    Returns:
+        {'rezervasyon_id', 'pnr', 'toplam_tutar', 'koltuklar'}
+    """
+    if not yolcular:
+        raise RezervasyonHatasi('En az bir yolcu gereklidir')
+    _yolculari_dogrula(yolcular)
+    try:
+        sefer_id = int(sefer_id)
+        bolge, bitisik = tercih_coz(tercih)
+    except (ValueError, TypeError) as e:
+        raise RezervasyonHatasi(str(e) if isinstance(e, AtamaHatasi) else 'sefer_id sayısal olmalıdır')
+    fiyat = _fiyat(fiyat)
+    return database.adimlari_calistir(
+        lambda: otomatik_rezervasyon_adimlari(
+            kullanici_id, sefer_id, yolcular, fiyat, bolge, bitisik, pnr_uret, araliklar
+        )
+    )
@@ -0,0 +1,127 @@
+"""
+Liste endpoint'leri için keyset (imleç tabanlı) sayfalama.
+
+İstemci ?limit=N ile ilk sayfayı ister; yanıttaki next_cursor değeri bir sonraki
+istekte ?cursor=... olarak geri gönderilir. İmleç, son satırın ORDER BY
+anahtarlarını taşır; sonraki sayfa OFFSET yerine bu anahtarlardan sonrasını
+index üzerinden okur, bu yüzden sayfa ne kadar derin olursa olsun süre sabittir.
+"""
+import base64
+import json
+from datetime import datetime
+
+VARSAYILAN_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class SayfalamaHatasi(ValueError):
+    pass
+
+
+class Sayfa:
+    def __init__(self, limit, degerler=None):
+        self.limit = limit
+        self.degerler = degerler
+
+
+def _kodla(deger):
+    if isinstance(deger, datetime):
+        return {'$dt': deger.isoformat()}
+    return deger
+
+
+def _coz(deger):
+    if isinstance(deger, dict) and '$dt' in deger:
+        return datetime.fromisoformat(deger['$dt'])
+    return deger
+
+
+def imlec_olustur(degerler):
+    ham = json.dumps([_kodla(d) for d in degerler], separators=(',', ':'))
+    return base64.urlsafe_b64encode(ham.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def imlec_coz(imlec, anahtar_sayisi):
+    try:
+        dolgu = '=' * (-len(imlec) % 4)
+        degerler = json.loads(base64.urlsafe_b64decode(imlec + dolgu).decode('utf-8'))
+        degerler = [_coz(d) for d in degerler]
+    except (ValueError, TypeError):
+        raise SayfalamaHatasi('Geçersiz cursor')
+    if not isinstance(degerler, list) or len(degerler) != anahtar_sayisi:
+        raise SayfalamaHatasi('Geçersiz cursor')
+    return degerler
+
+
+def sayfa_parametreleri(args, siralama):
+    """
+    İstekten limit/cursor okur. İkisi de yoksa None döner (endpoint eskisi gibi
+    tüm listeyi döndürür).
+    """
+    limit = args.get('limit')
+    imlec = args.get('cursor')
+    if limit is None and imlec is None:
+        return None
+    try:
+        limit = int(limit) if limit else VARSAYILAN_LIMIT
+    except ValueError:
+        raise SayfalamaHatasi('limit sayısal olmalıdır')
+    limit = max(1, min(limit, MAX_LIMIT))
+    degerler = imlec_coz(imlec, len(siralama)) if imlec else None
+    return Sayfa(limit, degerler)
+
+
+def _keyset_kosulu(siralama, degerler):
+    """
+    (a, b, c) > (x, y, z) karşılaştırmasını index'in kullanabileceği açık
+    biçimde yazar: a >= x AND (a > x OR (a = x AND b > y) OR (...))
+    """
+    parcalar = []
+    params = []
+    for i, (ifade, _, azalan) in enumerate(siralama):
+        kosul = [f"{e} = %s" for e, _, _ in siralama[:i]]
+        kosul.append(f"{ifade} {'<' if azalan else '>'} %s")
+        parcalar.append('(' + ' AND '.join(kosul) + ')')
+        params.extend(degerler[:i + 1])
+
+    ilk_ifade, _, ilk_azalan = siralama[0]
+    sql = f"{ilk_ifade} {'<=' if ilk_azalan else '>='} %s AND ({' OR '.join(parcalar)})"
+    return sql, [degerler[0]] + params
+
+
+def sorgu_olustur(select_from, kosullar, params, siralama, sayfa):
+    """
+    Args:
+        select_from: "SELECT ... FROM ..." (WHERE/ORDER BY olmadan)
+        kosullar: WHERE'e AND ile eklenecek koşullar
+        params: koşulların parametreleri
+        siralama: [(sql_ifadesi, satir_anahtari, azalan_mi), ...] - benzersiz olmalı
+        sayfa: sayfa_parametreleri() sonucu ya da None
+    Returns:
+        (sql, params)
+    """
+    kosullar = list(kosullar)
+    params = list(params)
+    if sayfa and sayfa.degerler:
+        kosul, kosul_params = _keyset_kosulu(siralama, sayfa.degerler)
+        kosullar.append(kosul)
+        params.extend(kosul_params)
+
+    sql = select_from
+    if kosullar:
+        sql += " WHERE " + " AND ".join(kosullar)
+    sql += " ORDER BY " + ", ".join(f"{e} {'DESC' if d else 'ASC'}" for e, _, d in siralama)
+    if sayfa:
+        # Bir fazla satır okunur; varsa sonraki sayfa vardır
+        sql += " LIMIT %s"
+        params.append(sayfa.limit + 1)
+    return sql, tuple(params)
+
+
+def sayfa_sonucu(satirlar, siralama, sayfa):
+    """Fazladan okunan satırı atar ve next_cursor üretir: (satirlar, next_cursor)"""
+    if not sayfa or len(satirlar) <= sayfa.limit:
+        return satirlar, None
+    satirlar = satirlar[:sayfa.limit]
+    son = satirlar[-1]
+    return satirlar, imlec_olustur([son[anahtar] for _, anahtar, _ in siralama])
@@ -0,0 +1,292 @@
+"""
+Toplu sefer takvimi: tekrar kurallarından sefer üretimi (POST /api/seferler/toplu).
+
+Bir kural bir güzergahta bir trenin belirli hafta günlerinde, belirli
+saatte kalkan seferlerini tarif eder:
+
+    {
+        "tren_id": 3, "kalkis_istasyon_id": 1, "varis_istasyon_id": 2,
+        "kalkis_saati": "09:30", "sure_dakika": 270,      # ya da "varis_saati": "14:00"
+        "gunler": [1, 2, 3, 4, 5],                          # 1 = Pazartesi ... 7 = Pazar ya da "pzt".."paz"
+        "baslangic_tarihi": "2025-06-01", "bitis_tarihi": "2025-09-30",
+        "durum": "satisa_acik"
+    }
+
+Tüm kurallar veritabanına gitmeden doğrulanır ve açılır; ardından istekle
+aynı iş biriminde trenler kilitlenir, aynı trenin hem toplu içinde hem de
+mevcut seferlerle zaman çakışması aranır ve çakışma yoksa seferler
+parti parti çok satırlı INSERT ile eklenir (tek transaction).
+"""
+from datetime import date, datetime, time, timedelta
+
+MAX_TOPLU_SEFER = 20000
+MAX_TAKVIM_GUN = 400
+# Çok satırlı INSERT başına satır (max_allowed_packet sınırının altında kalsın)
+PARTI_BOYUTU = 1000
+# Hata yanıtında listelenecek en fazla çakışma
+MAX_CAKISMA_RAPORU = 50
+
+GUN_ADLARI = {'pzt': 1, 'sal': 2, 'car': 3, 'çar': 3, 'per': 4, 'cum': 5, 'cmt': 6, 'cts': 6, 'paz': 7}
+DURUMLAR = ('planli', 'satisa_acik')
+
+
+class TakvimHatasi(Exception):
+    """Kural / takvim hatası; istemciye status ile döner (çakışmalar detay'da)"""
+
+    def __init__(self, mesaj, status=400, detay=None):
+        super().__init__(mesaj)
+        self.status = status
+        self.detay = detay
+
+
+def _tam_sayi(kural, alan, sira):
+    try:
+        return int(kural[alan])
+    except KeyError:
+        raise TakvimHatasi(f'Kural {sira}: {alan} alanı zorunludur')
+    except (ValueError, TypeError):
+        raise TakvimHatasi(f'Kural {sira}: {alan} sayısal olmalıdır')
+
+
+def _saat(deger, alan, sira):
+    try:
+        return time.fromisoformat(str(deger))
+    except ValueError:
+        raise TakvimHatasi(f'Kural {sira}: {alan} formatı geçersiz (SS:DD)')
+
+
+def _tarih(kural, alan, sira):
+    try:
+        return date.fromisoformat(str(kural[alan]))
+    except KeyError:
+        raise TakvimHatasi(f'Kural {sira}: {alan} alanı zorunludur')
+    except ValueError:
+        raise TakvimHatasi(f'Kural {sira}: {alan} formatı geçersiz (YYYY-MM-DD)')
+
+
+def _gunler(kural, sira):
+    gunler = set()
+    for gun in kural.get('gunler') or ():
+        if isinstance(gun, str) and not gun.isdigit():
+            numara = GUN_ADLARI.get(gun.strip().lower()[:3])
+        else:
+            numara = int(gun)
+        if numara not in range(1, 8):
+            raise TakvimHatasi(f'Kural {sira}: geçersiz gün: {gun}')
+        gunler.add(numara)
+    if not gunler:
+        raise TakvimHatasi(f'Kural {sira}: en az bir gün seçilmelidir')
+    return gunler
+
+
+def kurali_coz(kural, sira=1):
+    """Tek kuralı doğrular; normalize edilmiş sözlük döndürür"""
+    if not isinstance(kural, dict):
+        raise TakvimHatasi(f'Kural {sira}: nesne olmalıdır')
+
+    tren_id = _tam_sayi(kural, 'tren_id', sira)
+    kalkis_istasyon_id = _tam_sayi(kural, 'kalkis_istasyon_id', sira)
+    varis_istasyon_id = _tam_sayi(kural, 'varis_istasyon_id', sira)
+    if kalkis_istasyon_id == varis_istasyon_id:
+        raise TakvimHatasi(f'Kural {sira}: kalkış ve varış istasyonu farklı olmalıdır')
+
+    if 'kalkis_saati' not in kural:
+        raise TakvimHatasi(f'Kural {sira}: kalkis_saati alanı zorunludur')
+    kalkis_saati = _saat(kural['kalkis_saati'], 'kalkis_saati', sira)
+
+    if kural.get('sure_dakika') not in (None, ''):
+        try:
+            sure = timedelta(minutes=int(kural['sure_dakika']))
+        except (ValueError, TypeError):
+            raise TakvimHatasi(f'Kural {sira}: sure_dakika sayısal olmalıdır')
+    elif kural.get('varis_saati') not in (None, ''):
+        varis_saati = _saat(kural['varis_saati'], 'varis_saati', sira)
+        gun = date.min
+        sure = datetime.combine(gun, varis_saati) - datetime.combine(gun, kalkis_saati)
+        if sure <= timedelta(0):
+            # Varış ertesi güne sarkıyor
+            sure += timedelta(days=1)
+    else:
+        raise TakvimHatasi(f'Kural {sira}: sure_dakika ya da varis_saati verilmelidir')
+    if sure <= timedelta(0) or sure > timedelta(days=2):
+        raise TakvimHatasi(f'Kural {sira}: sefer süresi 0 ile 48 saat arasında olmalıdır')
+
+    baslangic = _tarih(kural, 'baslangic_tarihi', sira)
+    bitis = _tarih(kural, 'bitis_tarihi', sira)
+    if bitis < baslangic:
+        raise TakvimHatasi(f'Kural {sira}: bitis_tarihi başlangıçtan önce olamaz')
+    if (bitis - baslangic).days >= MAX_TAKVIM_GUN:
+        raise TakvimHatasi(f'Kural {sira}: takvim en fazla {MAX_TAKVIM_GUN} gün olabilir')
+
+    durum = kural.get('durum', 'satisa_acik')
+    if durum not in DURUMLAR:
+        raise TakvimHatasi(f'Kural {sira}: durum {" / ".join(DURUMLAR)} olmalıdır')
+
+    return {
+        'tren_id': tren_id,
+        'kalkis_istasyon_id': kalkis_istasyon_id,
+        'varis_istasyon_id': varis_istasyon_id,
+        'kalkis_saati': kalkis_saati,
+        'sure': sure,
+        'gunler': _gunler(kural, sira),
+        'baslangic': baslangic,
+        'bitis': bitis,
+        'durum': durum,
+    }
+
+
+def seferleri_ac(kurallar, simdi=None):
+    """
+    Kuralları sefer satırlarına açar:
+    [(tren_id, kalkis_istasyon_id, varis_istasyon_id, kalkis, varis, durum), ...]
+    """
+    simdi = simdi or datetime.now()
+    seferler = []
+    for sira, kural in enumerate(kurallar, 1):
+        gun = kural['baslangic']
+        while gun <= kural['bitis']:
+            if gun.isoweekday() in kural['gunler']:
+                kalkis = datetime.combine(gun, kural['kalkis_saati'])
+                if kalkis <= simdi:
+                    raise TakvimHatasi(f'Kural {sira}: geçmiş tarihli sefer oluşturulamaz ({kalkis:%Y-%m-%d %H:%M})')
+                seferler.append((
+                    kural['tren_id'], kural['kalkis_istasyon_id'], kural['varis_istasyon_id'],
+                    kalkis, kalkis + kural['sure'], kural['durum']
+                ))
+                if len(seferler) > MAX_TOPLU_SEFER:
+                    raise TakvimHatasi(f'Tek istekte en fazla {MAX_TOPLU_SEFER} sefer oluşturulabilir')
+            gun += timedelta(days=1)
+    if not seferler:
+        raise TakvimHatasi('Kurallar hiçbir sefer üretmiyor (gün / tarih aralığını kontrol edin)')
+    return seferler
+
+
+def istegi_coz(data):
+    """İstek gövdesi: {"kurallar": [...]} ya da tek kural; sefer satırlarını döndürür"""
+    if not isinstance(data, dict):
+        raise TakvimHatasi('Geçersiz istek verisi')
+    kurallar = data['kurallar'] if 'kurallar' in data else [data]
+    if not isinstance(kurallar, list) or not kurallar:
+        raise TakvimHatasi('En az bir kural gereklidir')
+    return seferleri_ac([kurali_coz(kural, sira) for sira, kural in enumerate(kurallar, 1)])
+
+
+def _zaman(deger):
+    return deger.strftime('%Y-%m-%d %H:%M')
+
+
+def cakismalari_bul(seferler, mevcut):
+    """
+    Aynı trenin zaman aralığı kesişen seferleri (uç uca değen aralıklar çakışmaz).
+
+    Args:
+        seferler: seferleri_ac çıktısı
+        mevcut: {tren_id: [(sefer_id, kalkis, varis), ...]} kalkışa göre sıralı
+    """
+    tren_seferleri = {}
+    for sefer in seferler:
+        tren_seferleri.setdefault(sefer[0], []).append((sefer[3], sefer[4]))
+
+    cakismalar = []
+    for tren_id, araliklar in sorted(tren_seferleri.items()):
+        araliklar.sort()
+        for onceki, sonraki in zip(araliklar, araliklar[1:]):
+            if sonraki[0] < onceki[1]:
+                cakismalar.append({
+                    'tren_id': tren_id,
+                    'kalkis_zamani': _zaman(sonraki[0]),
+                    'cakisan': f'toplu içinde {_zaman(onceki[0])} kalkışlı sefer',
+                })
+
+        # Yeni ve mevcut aralıklar kalkışa göre sıralı; tek geçişte karşılaştırılır
+        eskiler = mevcut.get(tren_id, [])
+        i = 0
+        for kalkis, varis in araliklar:
+            while i < len(eskiler) and eskiler[i][2] <= kalkis:
+                i += 1
+            j = i
+            while j < len(eskiler) and eskiler[j][1] < varis:
+                # eskiler varışa göre sıralı değil: i'den sonra bu kalkıştan
+                # önce bitmiş seferler de olabilir
+                if eskiler[j][2] > kalkis:
+                    cakismalar.append({
+                        'tren_id': tren_id,
+                        'kalkis_zamani': _zaman(kalkis),
+                        'cakisan': f'sefer {eskiler[j][0]} ({_zaman(eskiler[j][1])} - {_zaman(eskiler[j][2])})',
+                    })
+                j += 1
+    return cakismalar
+
+
+def toplu_sefer_ekle(database, seferler, onizleme=False):
+    """
+    Açık iş biriminde (istek transaction'ı) trenleri kilitler, çakışmaları
+    kontrol eder ve seferleri ekler. Eklenen satır sayısını döndürür
+    (onizleme=True ise eklemeden üretilecek sayıyı).
+    """
+    # Kontroller replikadan okunursa kilit bir işe yaramaz: az önce commit
+    # edilmiş seferler / istasyonlar görülmez
+    database.birincilden_oku()
+    tren_idler = sorted({s[0] for s in seferler})
+    yer = ', '.join(['%s'] * len(tren_idler))
+    # Aynı trenlere eşzamanlı toplu yükleme sıraya girer; sabit sıra deadlock'u önler
+    bulunan = database.execute_query(
+        f"SELECT tren_id FROM Tren WHERE tren_id IN ({yer}) ORDER BY tren_id FOR UPDATE",
+        tuple(tren_idler),
+        fetch=True
+    )
+    eksik = sorted(set(tren_idler) - {row['tren_id'] for row in bulunan})
+    if eksik:
+        raise TakvimHatasi(f'Tren bulunamadı: {eksik[0]}', status=404)
+
+    istasyon_idler = sorted({s[1] for s in seferler} | {s[2] for s in seferler})
+    bulunan = database.execute_query(
+        f"SELECT istasyon_id FROM Istasyon WHERE istasyon_id IN ({', '.join(['%s'] * len(istasyon_idler))})",
+        tuple(istasyon_idler),
+        fetch=True
+    )
+    eksik = sorted(set(istasyon_idler) - {row['istasyon_id'] for row in bulunan})
+    if eksik:
+        raise TakvimHatasi(f'İstasyon bulunamadı: {eksik[0]}', status=404)
+
+    # idx_sefer_tren_zaman (tren_id, kalkis_zamani); kalkışı aralık başından
+    # en fazla 2 gün önce olan seferler (süre sınırı) aralığa sarkabilir.
+    # FOR SHARE son commit edilmiş satırları okur ve aralığa tek tek sefer
+    # eklenmesini bu transaction bitene kadar bekletir
+    mevcut = {}
+    satirlar = database.execute_query(
+        f"""
+        SELECT sefer_id, tren_id, kalkis_zamani, varis_zamani
+        FROM Sefer
+        WHERE tren_id IN ({yer})
+        AND kalkis_zamani >= %s AND kalkis_zamani < %s
+        AND durum != 'iptal'
+        ORDER BY tren_id, kalkis_zamani
+        FOR SHARE
+        """,
+        tuple(tren_idler) + (
+            min(s[3] for s in seferler) - timedelta(days=2),
+            max(s[4] for s in seferler)
+        ),
+        fetch=True
+    )
+    for row in satirlar:
+        mevcut.setdefault(row['tren_id'], []).append((row['sefer_id'], row['kalkis_zamani'], row['varis_zamani']))
+
+    cakismalar = cakismalari_bul(seferler, mevcut)
+    if cakismalar:
+        raise TakvimHatasi(
+            f'{len(cakismalar)} seferde tren çakışması var', status=409, detay=cakismalar[:MAX_CAKISMA_RAPORU]
+        )
+    if onizleme:
+        return len(seferler)
+
+    return database.execute_many(
+        """
+        INSERT INTO Sefer
+        (tren_id, kalkis_istasyon_id, varis_istasyon_id, kalkis_zamani, varis_zamani, durum)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """,
+        seferler,
+        parti_boyutu=PARTI_BOYUTU
+    )
@@ -0,0 +1,189 @@
+"""
+Şifre hash'leme ve doğrulama (scrypt).
+
+scrypt bilerek yavaş ve bellek yoğundur; istek thread'inde çalışırsa GIL'i
+tutmasa da worker'ın CPU'sunu diğer isteklerle paylaşır. Bu yüzden hash /
+doğrulama her worker'ın kendi sınırlı süreç havuzunda (SIFRE_ISCI süreç)
+yapılır. Aynı anda en fazla SIFRE_KUYRUK iş kabul edilir; havuz doluysa
+SIFRE_BEKLEME saniye beklenir, yer açılmazsa SifreHavuzuDolu fırlatılır
+(handler'lar 503 + Retry-After döner).
+
+Kayıt biçimi: scrypt$N$r$p$tuz$hash (tuz ve hash base64). scrypt$ ile
+başlamayan kayıtlar eski düz metin şifrelerdir; başarılı girişte yeni
+biçimle yeniden hash'lenir. Maliyet (SIFRE_SCRYPT_N / _R / _P) artırılınca
+eski maliyetli kayıtlar da girişte güncellenir.
+
+Bu modül havuz süreçlerinde de import edilir; standart kütüphane dışında
+bir şey import etmemelidir.
+"""
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+ONEK = 'scrypt'
+TUZ_BOYUTU = 16
+HASH_BOYUTU = 32
+
+
+class SifreHavuzuDolu(Exception):
+    """Şifre havuzunda SIFRE_BEKLEME süresi içinde yer açılmadı"""
+
+
+def _maliyet():
+    return (
+        int(os.getenv('SIFRE_SCRYPT_N', str(2 ** 14))),
+        int(os.getenv('SIFRE_SCRYPT_R', '8')),
+        int(os.getenv('SIFRE_SCRYPT_P', '1'))
+    )
+
+
+def _scrypt(sifre, tuz, n, r, p):
+    return hashlib.scrypt(
+        sifre.encode('utf-8'), salt=tuz, n=n, r=r, p=p,
+        maxmem=128 * r * (n + p + 2) + 1024 * 1024, dklen=HASH_BOYUTU
+    )
+
+
+def hash_uret(sifre, n, r, p):
+    """Yeni tuzla kayıt üretir (havuz sürecinde ya da doğrudan çağrılabilir)"""
+    tuz = secrets.token_bytes(TUZ_BOYUTU)
+    return '$'.join((
+        ONEK, str(n), str(r), str(p),
+        base64.b64encode(tuz).decode('ascii'),
+        base64.b64encode(_scrypt(sifre, tuz, n, r, p)).decode('ascii')
+    ))
+
+
+def _scrypt_kaydi_mi(kayit):
+    return (kayit or '').startswith(ONEK + '$')
+
+
+def _coz(kayit):
+    """scrypt kaydını (n, r, p, tuz, hash) olarak çözer; bozuk kayıtta None"""
+    parcalar = (kayit or '').split('$')
+    if len(parcalar) != 6 or parcalar[0] != ONEK:
+        return None
+    try:
+        n, r, p = int(parcalar[1]), int(parcalar[2]), int(parcalar[3])
+        tuz, beklenen = base64.b64decode(parcalar[4], validate=True), base64.b64decode(parcalar[5], validate=True)
+    except ValueError:
+        return None
+    # hashlib.scrypt'in reddedeceği parametreler havuz sürecinde hata vermesin
+    if n < 2 or n & (n - 1) or r < 1 or p < 1 or not tuz or not beklenen:
+        return None
+    return n, r, p, tuz, beklenen
+
+
+def hash_dogrula(sifre, kayit):
+    """scrypt kaydını doğrular (havuz sürecinde çalışır)"""
+    n, r, p, tuz, beklenen = _coz(kayit)
+    return hmac.compare_digest(_scrypt(sifre, tuz, n, r, p), beklenen)
+
+
+class SifreHavuzu:
+    def __init__(self, isci=None, kuyruk=None, bekleme=None):
+        self.isci = isci or int(os.getenv('SIFRE_ISCI', str(max(1, (os.cpu_count() or 2) // 2))))
+        self.kuyruk = kuyruk or int(os.getenv('SIFRE_KUYRUK', str(self.isci * 4)))
+        self.bekleme = float(os.getenv('SIFRE_BEKLEME', '0.5')) if bekleme is None else bekleme
+        self.maliyet = _maliyet()
+        # Kullanıcı bulunamadığında doğrulanan kayıt (ilk kullanımda üretilir)
+        self._sahte_kayit = None
+        self._sifirla()
+        # Havuz süreçleri fork'tan önce başlatıldıysa çocuk süreç onları
+        # kullanamaz; her worker kendi havuzunu ilk istekte kurar
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._sifirla)
+
+    def _sifirla(self):
+        self._havuz = None
+        self._kilit = threading.Lock()
+        self._yer = threading.BoundedSemaphore(self.kuyruk)
+        self._bekleyen = 0
+        self.reddedilen = 0
+
+    def _havuzu_al(self):
+        with self._kilit:
+            if self._havuz is None:
+                # Çok thread'li worker'dan fork güvenli değil; süreçler spawn ile başlar
+                self._havuz = ProcessPoolExecutor(
+                    max_workers=self.isci, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._havuz
+
+    def _calistir(self, fonksiyon, *args):
+        if not self._yer.acquire(timeout=self.bekleme):
+            with self._kilit:
+                self.reddedilen += 1
+            raise SifreHavuzuDolu('Şifre işlemleri yoğun, lütfen tekrar deneyin')
+        with self._kilit:
+            self._bekleyen += 1
+        try:
+            havuz = self._havuzu_al()
+            try:
+                return havuz.submit(fonksiyon, *args).result()
+            except BrokenProcessPool:
+                # Ölen havuz süreci sonraki isteklerde yeni havuzla değiştirilir
+                with self._kilit:
+                    if self._havuz is havuz:
+                        self._havuz = None
+                raise
+        finally:
+            with self._kilit:
+                self._bekleyen -= 1
+            self._yer.release()
+
+    def hashle(self, sifre):
+        return self._calistir(hash_uret, sifre, *self.maliyet)
+
+    def dogrula(self, sifre, kayit):
+        """
+        Returns:
+            (gecerli, yeni_kayit): yeni_kayit, kayıt eski düz metin ya da eski
+            maliyetli olduğunda saklanacak yeni hash; gerekmiyorsa None
+        """
+        if _scrypt_kaydi_mi(kayit):
+            cozulmus = _coz(kayit)
+            if cozulmus is None:
+                self.sahte_dogrula(sifre)
+                return False, None
+            gecerli = self._calistir(hash_dogrula, sifre, kayit)
+            if not gecerli or cozulmus[:3] == self.maliyet:
+                return gecerli, None
+        else:
+            if not hmac.compare_digest(sifre.encode('utf-8'), (kayit or '').encode('utf-8')):
+                self.sahte_dogrula(sifre)
+                return False, None
+        try:
+            return True, self.hashle(sifre)
+        except SifreHavuzuDolu:
+            # Giriş yine başarılı; yeniden hash'leme bir sonraki girişe kalır
+            return True, None
+
+    def sahte_dogrula(self, sifre):
+        """
+        Gerçek bir doğrulama kadar süre harcar. Kullanıcı bulunamadığında
+        (ya da kayıt düz metin / bozuk olduğunda) çağrılır; yanıt süresinden
+        kullanıcı adının var olup olmadığı anlaşılmaz.
+        """
+        if self._sahte_kayit is None:
+            self._sahte_kayit = self.hashle(secrets.token_urlsafe(16))
+        self._calistir(hash_dogrula, sifre, self._sahte_kayit)
+
+    def durum(self):
+        with self._kilit:
+            return {
+                'isci': self.isci,
+                'kuyruk': self.kuyruk,
+                'islemde': self._bekleyen,
+                'reddedilen': self.reddedilen,
+                'maliyet': dict(zip(('n', 'r', 'p'), self.maliyet))
+            }
+
+
+sifre_havuzu = SifreHavuzu()
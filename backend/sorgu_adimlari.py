@@ -0,0 +1,90 @@
+"""
+Sürücüden bağımsız transaction adımları.
+
+Rezervasyon / ödeme / iptal gibi çok adımlı işlemler, veritabanına kendisi
+bağlanmayan generator'lar olarak yazılır: her adımda bir Sorgu yield eder,
+karşılığında SorguSonucu alır. Aynı adımlar senkron Database
+(mysql-connector) ve AsyncDatabase (aiomysql) tarafından çalıştırılır;
+iş kuralları iki kez yazılmaz.
+
+    def adimlar(sefer_id):
+        sonuc = yield Sorgu("SELECT ... FOR UPDATE", (sefer_id,))
+        ...
+        return {...}
+
+    db.adimlari_calistir(lambda: adimlar(5))
+    await adb.adimlari_calistir(lambda: adimlar(5))
+
+Sorgu hatası generator'a geri fırlatılır; adım yakalayıp devam edebilir
+(ör. duplicate key sonrası başka PNR denemek).
+"""
+from collections import namedtuple
+
+from mysql.connector import errorcode
+
+Sorgu = namedtuple('Sorgu', ['sql', 'params', 'coklu'], defaults=((), False))
+Sorgu.__doc__ = "Tek sorgu (coklu=True ise params satır listesi, executemany)"
+
+SorguSonucu = namedtuple('SorguSonucu', ['satirlar', 'lastrowid', 'rowcount'])
+
+# Deadlock / lock wait timeout durumunda transaction baştan denenir
+TEKRAR_DENENECEK_HATALAR = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+MAX_TRANSACTION_DENEMESI = 3
+
+
+def hata_kodu(e):
+    """MySQL hata kodu (mysql-connector: e.errno, PyMySQL/aiomysql: e.args[0])"""
+    errno = getattr(e, 'errno', None)
+    if errno is None and e.args and isinstance(e.args[0], int):
+        errno = e.args[0]
+    return errno
+
+
+def tekrar_denenmeli_mi(e):
+    return hata_kodu(e) in TEKRAR_DENENECEK_HATALAR
+
+
+def _sonraki(uretec, sonuc, hata):
+    return uretec.throw(hata) if hata is not None else uretec.send(sonuc)
+
+
+def surdur(uretec, cursor, hata_tipi):
+    """Adımları senkron cursor ile sonuna kadar çalıştırır; generator'ın dönüş değerini döndürür"""
+    sonuc = hata = None
+    while True:
+        try:
+            sorgu = _sonraki(uretec, sonuc, hata)
+        except StopIteration as e:
+            return e.value
+        sonuc = hata = None
+        try:
+            if sorgu.coklu:
+                cursor.executemany(sorgu.sql, sorgu.params)
+                satirlar = []
+            else:
+                cursor.execute(sorgu.sql, sorgu.params)
+                satirlar = cursor.fetchall() if cursor.description else []
+            sonuc = SorguSonucu(satirlar, cursor.lastrowid, cursor.rowcount)
+        except hata_tipi as e:
+            hata = e
+
+
+async def asurdur(uretec, cursor, hata_tipi):
+    """surdur'un asyncio cursor'ı (aiomysql) ile çalışan karşılığı"""
+    sonuc = hata = None
+    while True:
+        try:
+            sorgu = _sonraki(uretec, sonuc, hata)
+        except StopIteration as e:
+            return e.value
+        sonuc = hata = None
+        try:
+            if sorgu.coklu:
+                await cursor.executemany(sorgu.sql, sorgu.params)
+                satirlar = []
+            else:
+                await cursor.execute(sorgu.sql, sorgu.params or None)
+                satirlar = list(await cursor.fetchall()) if cursor.description else []
+            sonuc = SorguSonucu(satirlar, cursor.lastrowid, cursor.rowcount)
+        except hata_tipi as e:
+            hata = e
@@ -0,0 +1,147 @@
+"""
+Sorgu ölçümü: her veritabanı çağrısının süresi, satır sayısı ve bağlantı
+bekleme süresi.
+
+- Sorgular parmak izine (sabitleri atılmış, boşlukları sadeleştirilmiş SQL)
+  göre toplanır: sorgu_istatistikleri.ozet()
+- DB_YAVAS_SORGU_MS (varsayılan 200) aşan sorgular 'tren-rezervasyon.yavas_sorgu'
+  logger'ına yazılır (0 = kapalı)
+- İstek boyunca yapılan çağrı sayısı ve toplam DB süresi istek_olcumu_*
+  fonksiyonlarıyla toplanır; app.py bunu route adıyla birlikte loglar.
+  ContextVar kullanıldığı için thread'li (Flask) ve asyncio modunda aynı çalışır.
+"""
+import contextvars
+import logging
+import os
+import re
+import threading
+from functools import lru_cache
+
+yavas_sorgu_logger = logging.getLogger('tren-rezervasyon.yavas_sorgu')
+
+YAVAS_SORGU_MS = float(os.getenv('DB_YAVAS_SORGU_MS', '200'))
+# Bellek sınırı: bu kadar farklı parmak izinden sonrası '(diger)' altında toplanır
+MAX_PARMAK_IZI = 500
+
+_YORUM = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_METIN = re.compile(r"'(?:[^'\\]|\\.)*'")
+_SAYI = re.compile(r'\b\d+(?:\.\d+)?\b')
+_YER_TUTUCU = re.compile(r'%s|%\(\w+\)s')
+_IN_LISTESI = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_BOSLUK = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def parmak_izi(query):
+    """
+    Sorgunun parametresiz biçimi: sabitler ve parametreler ?, IN (?, ?, ...)
+    listeleri (...) olur. Aynı sorgunun farklı parametreli çağrıları tek satırda toplanır.
+    """
+    sql = _YORUM.sub(' ', query)
+    sql = _METIN.sub('?', sql)
+    sql = _YER_TUTUCU.sub('?', sql)
+    sql = _SAYI.sub('?', sql)
+    sql = _IN_LISTESI.sub('(...)', sql)
+    return _BOSLUK.sub(' ', sql).strip()
+
+
+class SorguIstatistikleri:
+    """Parmak izi bazında çağrı sayısı, toplam / en uzun süre ve satır sayısı"""
+
+    def __init__(self):
+        self._kur()
+
+    def _kur(self):
+        self._kilit = threading.Lock()
+        self._sorgular = {}
+
+    def ekle(self, iz, sure, satir, bekleme):
+        with self._kilit:
+            kayit = self._sorgular.get(iz)
+            if kayit is None:
+                if len(self._sorgular) >= MAX_PARMAK_IZI:
+                    iz = '(diger)'
+                    kayit = self._sorgular.get(iz)
+                if kayit is None:
+                    kayit = self._sorgular[iz] = {
+                        'sayi': 0, 'toplam_ms': 0.0, 'max_ms': 0.0, 'satir': 0, 'bekleme_ms': 0.0
+                    }
+            kayit['sayi'] += 1
+            kayit['toplam_ms'] += sure * 1000
+            kayit['max_ms'] = max(kayit['max_ms'], sure * 1000)
+            kayit['satir'] += satir or 0
+            kayit['bekleme_ms'] += bekleme * 1000
+
+    def ozet(self, limit=20):
+        """Toplam süreye göre en pahalı sorgular"""
+        with self._kilit:
+            kayitlar = [dict(v, sorgu=k) for k, v in self._sorgular.items()]
+        kayitlar.sort(key=lambda k: k['toplam_ms'], reverse=True)
+        for kayit in kayitlar:
+            kayit['ortalama_ms'] = round(kayit['toplam_ms'] / kayit['sayi'], 3)
+            kayit['toplam_ms'] = round(kayit['toplam_ms'], 3)
+            kayit['max_ms'] = round(kayit['max_ms'], 3)
+            kayit['bekleme_ms'] = round(kayit['bekleme_ms'], 3)
+        return kayitlar[:limit]
+
+    def sifirla(self):
+        with self._kilit:
+            self._sorgular.clear()
+
+
+sorgu_istatistikleri = SorguIstatistikleri()
+# fork sonrası çocuk süreç ebeveynin kilidini / sayılarını devralmasın
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=sorgu_istatistikleri._kur)
+
+
+class IstekOlcumu:
+    __slots__ = ('sorgu_sayisi', 'db_suresi', 'bekleme_suresi', 'yavas_sorgu')
+
+    def __init__(self):
+        self.sorgu_sayisi = 0
+        self.db_suresi = 0.0
+        self.bekleme_suresi = 0.0
+        self.yavas_sorgu = 0
+
+
+_istek_olcumu = contextvars.ContextVar('istek_olcumu', default=None)
+
+
+def istek_olcumu_baslat():
+    olcum = IstekOlcumu()
+    _istek_olcumu.set(olcum)
+    return olcum
+
+
+def istek_olcumu_bitir():
+    """Açık ölçümü kapatır ve döndürür (yoksa None)"""
+    olcum = _istek_olcumu.get()
+    _istek_olcumu.set(None)
+    return olcum
+
+
+def kaydet(query, sure, satir=None, bekleme=0.0):
+    """
+    Tek veritabanı çağrısını kaydeder.
+
+    Args:
+        sure: sorgunun süresi (saniye, bağlantı bekleme hariç)
+        satir: okunan / etkilenen satır sayısı
+        bekleme: havuzdan bağlantı alırken beklenen süre (saniye)
+    """
+    iz = parmak_izi(query)
+    sorgu_istatistikleri.ekle(iz, sure, satir, bekleme)
+
+    olcum = _istek_olcumu.get()
+    yavas = YAVAS_SORGU_MS > 0 and sure * 1000 >= YAVAS_SORGU_MS
+    if olcum is not None:
+        olcum.sorgu_sayisi += 1
+        olcum.db_suresi += sure
+        olcum.bekleme_suresi += bekleme
+        olcum.yavas_sorgu += yavas
+    if yavas:
+        yavas_sorgu_logger.warning(
+            "Yavaş sorgu: %.1f ms, %s satır, bağlantı bekleme %.1f ms | %s",
+            sure * 1000, satir if satir is not None else '-', bekleme * 1000, iz
+        )
@@ -15,7 +15,7 @@ Write-Host 'Activating virtual environment...' -ForegroundColor Cyan
 
 Write-Host 'Python version:' (python -c "import sys; print(sys.version)")
 Write-Host 'Checking required packages...' -ForegroundColor Cyan
-$packages = @('Flask==3.0.0','Flask-CORS==4.0.0','mysql-connector-python==8.2.0','python-dotenv==1.0.0','Werkzeug==3.0.1')
+$packages = @('Flask==3.0.0','Flask-CORS==4.0.0','mysql-connector-python==8.2.0','python-dotenv==1.0.0','Werkzeug==3.0.1','waitress==2.1.2')
 
 foreach ($p in $packages) {
     $name = $p.Split('==')[0]
@@ -26,5 +26,5 @@ foreach ($p in $packages) {
     }
 }
 
-Write-Host 'Starting Flask app (keep this window open)...' -ForegroundColor Green
-python .\app.py
+Write-Host 'Starting API server (keep this window open)...' -ForegroundColor Green
+python .\sunucu.py
@@ -0,0 +1,155 @@
+"""
+Üretim sunucusu başlatıcısı (app.run yerine).
+
+Linux/macOS'ta gunicorn ile pre-fork çok süreçli çalışır: ana süreç
+WEB_WORKERS kadar worker açar, her worker WEB_THREADS thread ile istek
+karşılar. Her worker kendi bağlantı havuzunu fork'tan sonra ilk istekte
+kurar (bkz. Database._surec_durumunu_kur).
+
+    python sunucu.py
+    kill -HUP <ana süreç pid>    # kesintisiz yeniden yükleme: yeni worker'lar
+                                 # açılır, eskiler işlerini bitirip kapanır
+    kill -TERM <ana süreç pid>   # işlerini bitirip kapan
+
+Windows'ta fork olmadığı için waitress ile tek süreç / çok thread çalışır.
+
+WEB_MODU=asgi verilirse worker'lar uvicorn ile asyncio modunda çalışır
+(bkz. asgi.py); WEB_THREADS bu modda kullanılmaz.
+
+Ortam değişkenleri:
+    HOST, PORT             dinlenecek adres (varsayılan 0.0.0.0:5000)
+    WEB_WORKERS            worker süreç sayısı (varsayılan: CPU çekirdek sayısı)
+    WEB_THREADS            worker başına thread sayısı (varsayılan 4)
+    WEB_TIMEOUT            cevap vermeyen worker'ın yeniden başlatılma süresi (sn)
+    WEB_GRACEFUL_TIMEOUT   yeniden yükleme / kapanışta bekleme süresi (sn)
+    WEB_MAX_REQUESTS       worker bu kadar istekten sonra yenilenir (0 = kapalı)
+    WEB_MODU               wsgi (varsayılan) | asgi
+    WEB_PRELOAD            1 ise uygulama fork'tan önce ana süreçte yüklenir
+                           (daha az bellek; ancak HUP kodu yeniden yüklemez)
+"""
+import glob
+import logging
+import os
+import sys
+import tempfile
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("tren-rezervasyon")
+
+
+def _int_env(ad, varsayilan):
+    return int(os.getenv(ad, str(varsayilan)))
+
+
+def asgi_modu():
+    return os.getenv('WEB_MODU', 'wsgi').lower() == 'asgi'
+
+
+def metrik_dizini_hazirla():
+    """
+    /metrics tüm worker'ların toplamını döndürebilsin diye Prometheus
+    çok süreç dizini ayarlanır; önceki çalıştırmadan kalan dosyalar silinir.
+    """
+    dizin = os.environ.setdefault(
+        'PROMETHEUS_MULTIPROC_DIR',
+        os.path.join(tempfile.gettempdir(), f"tren-metrik-{os.getenv('PORT', '5000')}")
+    )
+    os.makedirs(dizin, exist_ok=True)
+    for dosya in glob.glob(os.path.join(dizin, '*.db')):
+        os.remove(dosya)
+
+
+def ayarlar():
+    # .env varsayılanlardan önce okunmalı (load_dotenv var olanı ezmez)
+    load_dotenv()
+    workers = 1 if sys.platform == 'win32' else _int_env('WEB_WORKERS', os.cpu_count() or 1)
+    threads = _int_env('WEB_THREADS', 4)
+    # Havuz worker başına kurulur; her thread'in bir bağlantısı olsun
+    if 'DB_POOL_SIZE' not in os.environ:
+        os.environ['DB_POOL_SIZE'] = str(min(max(threads, 1), 32))
+    # Koltuk bitmap'leri süreç içidir; diğer worker'ların satışları en geç bu
+    # kadar saniye sonra görünür
+    if workers > 1:
+        os.environ.setdefault('KOLTUK_HARITASI_TTL', '5')
+        metrik_dizini_hazirla()
+    return {
+        'bind': f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}",
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'uvicorn.workers.UvicornWorker' if asgi_modu() else 'gthread',
+        'timeout': _int_env('WEB_TIMEOUT', 30),
+        'graceful_timeout': _int_env('WEB_GRACEFUL_TIMEOUT', 30),
+        'max_requests': _int_env('WEB_MAX_REQUESTS', 0),
+        'max_requests_jitter': _int_env('WEB_MAX_REQUESTS', 0) // 10,
+        'preload_app': os.getenv('WEB_PRELOAD', '0') == '1',
+        'accesslog': '-',
+        'loglevel': os.getenv('LOG_LEVEL', 'INFO').lower(),
+    }
+
+
+def _post_fork(server, worker):
+    server.log.info("Worker başlatıldı (pid=%s)", worker.pid)
+
+
+def _child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def gunicorn_ile_calistir(secenekler):
+    from gunicorn.app.base import BaseApplication
+
+    class TrenSunucusu(BaseApplication):
+        def load_config(self):
+            for anahtar, deger in secenekler.items():
+                self.cfg.set(anahtar, deger)
+            self.cfg.set('post_fork', _post_fork)
+            self.cfg.set('child_exit', _child_exit)
+
+        def load(self):
+            if asgi_modu():
+                from asgi import app as asgi_app
+                return asgi_app
+            from app import create_app
+            return create_app()
+
+    TrenSunucusu().run()
+
+
+def uvicorn_ile_calistir(secenekler):
+    import uvicorn
+
+    host, port = secenekler['bind'].rsplit(':', 1)
+    uvicorn.run('asgi:app', host=host, port=int(port), workers=secenekler['workers'])
+
+
+def waitress_ile_calistir(secenekler):
+    from waitress import serve
+    from app import create_app
+
+    host, port = secenekler['bind'].rsplit(':', 1)
+    logger.info("waitress ile tek süreç başlatılıyor (threads=%s)", secenekler['threads'])
+    serve(create_app(), host=host, port=int(port), threads=secenekler['threads'])
+
+
+def main():
+    secenekler = ayarlar()
+    print(
+        f"TREN REZERVASYON SİSTEMİ API - {secenekler['bind']} "
+        f"(mod={'asgi' if asgi_modu() else 'wsgi'}, workers={secenekler['workers']}, "
+        f"threads={secenekler['threads']})",
+        flush=True
+    )
+    if sys.platform == 'win32':
+        if asgi_modu():
+            uvicorn_ile_calistir(secenekler)
+        else:
+            waitress_ile_calistir(secenekler)
+    else:
+        gunicorn_ile_calistir(secenekler)
+
+
+if __name__ == '__main__':
+    main()
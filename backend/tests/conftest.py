@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Backend modülleri düz (paketsiz) import edilir
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
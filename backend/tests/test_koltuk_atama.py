@@ -0,0 +1,62 @@
+import pytest
+
+from koltuk_atama import AtamaHatasi, blok_sec, bos_araliklar, tercih_coz
+
+
+def _araliklar(kapasite, dolu):
+    return bos_araliklar(kapasite, dolu.__contains__)
+
+
+def test_bos_araliklar():
+    assert _araliklar(10, {1, 2, 5}) == [(3, 2), (6, 5)]
+    assert _araliklar(4, set()) == [(1, 4)]
+    assert _araliklar(3, {1, 2, 3}) == []
+    assert _araliklar(5, {3}) == [(1, 2), (4, 2)]
+
+
+def test_sigan_en_kisa_aralik_secilir():
+    # 3 kişilik grup 10'luk bloğu bölmez, 3'lük boşluğa oturur
+    araliklar = [(1, 10), (15, 3), (20, 5)]
+    assert blok_sec(araliklar, 3) == [15, 16, 17]
+
+
+def test_bolge_esitlikte_ve_aralik_icinde_uc_secer():
+    araliklar = [(1, 4), (50, 4)]
+    assert blok_sec(araliklar, 2) == [1, 2]
+    assert blok_sec(araliklar, 2, bolge='on') == [1, 2]
+    assert blok_sec(araliklar, 2, bolge='arka') == [52, 53]
+
+
+def test_sigmiyorsa_en_az_parcaya_bolunur():
+    araliklar = [(1, 2), (5, 3), (10, 1)]
+    assert blok_sec(araliklar, 5) == [1, 2, 5, 6, 7]
+
+
+def test_bitisik_istenirse_bolunmez():
+    assert blok_sec([(1, 2), (5, 3)], 4, bitisik=True) is None
+    assert blok_sec([(1, 2), (5, 4)], 4, bitisik=True) == [5, 6, 7, 8]
+
+
+def test_yeterli_bos_koltuk_yoksa_none():
+    assert blok_sec([(1, 2), (5, 1)], 4) is None
+    assert blok_sec([], 1) is None
+
+
+def test_secilen_koltuklar_bos_ve_farkli():
+    dolu = {2, 3, 7, 11, 12, 13, 20}
+    araliklar = _araliklar(24, dolu)
+    for adet in range(1, 18):
+        for bolge in (None, 'on', 'arka'):
+            koltuklar = blok_sec(araliklar, adet, bolge)
+            assert len(set(koltuklar)) == adet
+            assert not dolu & set(koltuklar)
+            assert all(1 <= k <= 24 for k in koltuklar)
+
+
+def test_tercih_coz():
+    assert tercih_coz(None) == (None, False)
+    assert tercih_coz({'bolge': 'arka', 'bitisik': True}) == ('arka', True)
+    with pytest.raises(AtamaHatasi):
+        tercih_coz({'bolge': 'orta'})
+    with pytest.raises(AtamaHatasi):
+        tercih_coz(['on'])
@@ -0,0 +1,72 @@
+import itertools
+
+from pnr import ALFABE, MIN_HANE, TABAN, PnrAyirici, pnr_gecerli_mi, pnr_kodla
+
+
+def test_alti_karakter_ve_gecerli():
+    for numara in (0, 1, 12345, TABAN ** MIN_HANE - 1):
+        pnr = pnr_kodla(numara)
+        assert len(pnr) == MIN_HANE + 1
+        assert set(pnr) <= set(ALFABE)
+        assert pnr_gecerli_mi(pnr)
+
+
+def test_ardisik_numaralar_cakismaz():
+    kodlar = {pnr_kodla(n) for n in range(200000)}
+    assert len(kodlar) == 200000
+
+
+def test_hane_sinirinda_birebir():
+    # 5 hanenin son numaraları ile 6 hanenin ilkleri: uzunluk artar, çakışma olmaz
+    sinir = TABAN ** MIN_HANE
+    aralik = range(sinir - 1000, sinir + 1000)
+    kodlar = [pnr_kodla(n) for n in aralik]
+    assert len(set(kodlar)) == len(kodlar)
+    assert {len(k) for k in kodlar[:1000]} == {MIN_HANE + 1}
+    assert {len(k) for k in kodlar[1000:]} == {MIN_HANE + 2}
+
+
+def test_tum_bes_haneli_uzayda_birebir():
+    # Karıştırma 36^5 üzerinde permütasyon: örneklenen dağınık numaralar
+    # farklı gövdeler üretir
+    numaralar = range(0, TABAN ** MIN_HANE, 997)
+    govdeler = {pnr_kodla(n)[:-1] for n in numaralar}
+    assert len(govdeler) == len(numaralar)
+
+
+def test_tek_karakter_hatasi_yakalanir():
+    pnr = pnr_kodla(424242)
+    for i, c in itertools.product(range(len(pnr)), ALFABE):
+        if pnr[i] != c:
+            assert not pnr_gecerli_mi(pnr[:i] + c + pnr[i + 1:])
+
+
+class _SayacDb:
+    """PnrSayac UPDATE'ini taklit eder: her çağrı son_deger'i blok kadar artırır"""
+
+    def __init__(self):
+        self.son_deger = 0
+        self.cagri = 0
+
+    def execute_query(self, query, params, ayri_baglanti=False):
+        assert ayri_baglanti
+        self.cagri += 1
+        self.son_deger += params[0]
+        return 1
+
+    def get_last_insert_id(self):
+        return self.son_deger
+
+
+def test_sonraki_hazirladan_sonra_veritabanina_gitmez():
+    db = _SayacDb()
+    ayirici = PnrAyirici(db, blok_boyutu=10)
+    kodlar = []
+    for _ in range(25):
+        ayirici.hazirla()
+        cagri = db.cagri
+        kodlar.append(ayirici.sonraki())
+        assert db.cagri == cagri
+    assert len(set(kodlar)) == 25
+    # hazirla yarım bloğun altına düşmeden yenisini alır; sonraki biri kullanır
+    assert ayirici._kalan() >= 10 // 2 - 1
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from sefer_takvimi import cakismalari_bul
+
+
+def _s(saat, dakika=0):
+    return datetime(2030, 1, 7, saat, dakika)
+
+
+def _sefer(tren_id, kalkis, varis):
+    return (tren_id, 1, 2, kalkis, varis, 'satisa_acik')
+
+
+def test_cakisma_yoksa_bos_liste():
+    seferler = [_sefer(1, _s(8), _s(10)), _sefer(1, _s(12), _s(14))]
+    mevcut = {1: [(7, _s(10), _s(12))]}
+    assert cakismalari_bul(seferler, mevcut) == []
+
+
+def test_uc_uca_degen_seferler_cakismaz():
+    seferler = [_sefer(1, _s(8), _s(10)), _sefer(1, _s(10), _s(12))]
+    assert cakismalari_bul(seferler, {1: [(7, _s(12), _s(13))]}) == []
+
+
+def test_toplu_icindeki_cakisma():
+    seferler = [_sefer(1, _s(8), _s(11)), _sefer(1, _s(10), _s(12))]
+    cakismalar = cakismalari_bul(seferler, {})
+    assert [c['kalkis_zamani'] for c in cakismalar] == ['2030-01-07 10:00']
+    assert 'toplu içinde' in cakismalar[0]['cakisan']
+
+
+def test_mevcut_seferle_cakisma():
+    seferler = [_sefer(1, _s(9), _s(11))]
+    cakismalar = cakismalari_bul(seferler, {1: [(7, _s(10), _s(12))]})
+    assert len(cakismalar) == 1
+    assert cakismalar[0]['cakisan'].startswith('sefer 7 ')
+
+
+def test_uzun_mevcut_seferin_icindeki_bitmis_sefer_raporlanmaz():
+    # 5 numaralı sefer yeni seferi kapsar; 6 numaralı sefer ondan sonra
+    # kalkar ama yeni seferin kalkışından önce biter
+    mevcut = {1: [(5, _s(8), _s(20)), (6, _s(9), _s(10))]}
+    cakismalar = cakismalari_bul([_sefer(1, _s(11), _s(12))], mevcut)
+    assert [c['cakisan'].split()[1] for c in cakismalar] == ['5']
+
+
+def test_farkli_trenler_birbirini_etkilemez():
+    seferler = [_sefer(1, _s(9), _s(11)), _sefer(2, _s(9), _s(11))]
+    assert cakismalari_bul(seferler, {3: [(7, _s(8), _s(12))]}) == []
@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from yolculuk_planlayici import Etiket, YolculukPlanlayici, _Tablo
+
+GUN = (datetime.now() + timedelta(days=3)).replace(hour=0, minute=0, second=0, microsecond=0)
+A, B, C, D = 1, 2, 3, 4
+
+
+def _saat(saat, dakika=0):
+    return GUN + timedelta(hours=saat, minutes=dakika)
+
+
+class _SeferDb:
+    """Planlayıcının sorgularını bellekteki Sefer satırlarından yanıtlar"""
+
+    def __init__(self):
+        self.seferler = {}
+
+    def ekle(self, sefer_id, nereden, nereye, kalkis, varis, bos=100, durum='satisa_acik'):
+        self.seferler[sefer_id] = {
+            'sefer_id': sefer_id, 'kalkis_istasyon_id': nereden, 'varis_istasyon_id': nereye,
+            'kalkis_zamani': kalkis, 'varis_zamani': varis, 'durum': durum,
+            'tren_kodu': f'T{sefer_id}', 'bos_koltuk_sayisi': bos,
+        }
+
+    def execute_query(self, query, params=None, fetch=False, ayri_baglanti=False):
+        if 'FROM Istasyon' in query:
+            return [{'istasyon_id': i, 'ad': f'Istasyon {i}', 'sehir': f'Sehir {i}'} for i in (A, B, C, D)]
+        if 'sefer_id IN' in query:
+            return [dict(self.seferler[i]) for i in params if i in self.seferler]
+        if 'sefer_id = %s' in query:
+            return [dict(self.seferler[params[0]])] if params[0] in self.seferler else []
+        return [
+            dict(s) for s in self.seferler.values()
+            if s['durum'] == 'satisa_acik' and s['kalkis_zamani'] >= params[0]
+        ]
+
+
+@pytest.fixture
+def db():
+    return _SeferDb()
+
+
+def _planla(db, nereden=A, nereye=C, **kwargs):
+    kwargs.setdefault('min_aktarma_dk', 15)
+    planlayici = YolculukPlanlayici(db, ttl=0)
+    return planlayici.planla({nereden}, {nereye}, GUN, GUN + timedelta(days=1), **kwargs)
+
+
+def _seferler(yolculuklar):
+    return [[b['sefer_id'] for b in y['bacaklar']] for y in yolculuklar]
+
+
+def test_aktarmali_yolculuk_ve_min_aktarma(db):
+    db.ekle(1, A, B, _saat(8), _saat(10))
+    db.ekle(2, B, C, _saat(10, 10), _saat(12))   # 10 dk: aktarmaya yetişilmez
+    db.ekle(3, B, C, _saat(10, 30), _saat(13))
+    assert _seferler(_planla(db)) == [[1, 3]]
+    assert _seferler(_planla(db, min_aktarma_dk=5)) == [[1, 2]]
+
+
+def test_baskin_yolculuklar_elenir(db):
+    db.ekle(1, A, C, _saat(8), _saat(14))        # direkt, aktarmasız
+    db.ekle(2, A, B, _saat(7), _saat(8))         # 3 ile aynı varış, daha erken kalkış
+    db.ekle(3, A, B, _saat(9), _saat(10))
+    db.ekle(4, B, C, _saat(11), _saat(13))
+    yolculuklar = _planla(db)
+    assert _seferler(yolculuklar) == [[1], [3, 4]]
+    assert [y['aktarma_sayisi'] for y in yolculuklar] == [0, 1]
+
+
+def test_max_aktarma_siniri(db):
+    db.ekle(1, A, B, _saat(8), _saat(9))
+    db.ekle(2, B, D, _saat(10), _saat(11))
+    db.ekle(3, D, C, _saat(12), _saat(13))
+    assert _seferler(_planla(db)) == [[1, 2, 3]]
+    assert _planla(db, max_bacak=2) == []
+
+
+def test_yetersiz_bos_koltuklu_sefer_kullanilmaz(db):
+    db.ekle(1, A, C, _saat(8), _saat(12), bos=1)
+    db.ekle(2, A, C, _saat(7), _saat(13), bos=5)
+    assert _seferler(_planla(db, yolcu=2)) == [[2]]
+
+
+def test_sefer_degisti_indeksi_yeniden_yuklemeden_gunceller(db):
+    db.ekle(1, A, B, _saat(8), _saat(9))
+    planlayici = YolculukPlanlayici(db, ttl=0)
+    tablo = planlayici.tablo()
+    assert planlayici.planla({A}, {C}, GUN, GUN + timedelta(days=1)) == []
+
+    db.ekle(2, B, C, _saat(10), _saat(11))
+    planlayici.sefer_degisti(2)
+    yolculuklar = planlayici.planla({A}, {C}, GUN, GUN + timedelta(days=1))
+    assert _seferler(yolculuklar) == [[1, 2]]
+    # Aynı yüklemenin güncellenmiş kopyası; eski görüntü değişmedi
+    assert planlayici.tablo() is not tablo
+    assert planlayici.tablo().yuklenme_zamani == tablo.yuklenme_zamani
+    assert 2 not in tablo.seferler
+
+    db.seferler[2]['kalkis_zamani'] = _saat(10, 30)
+    planlayici.sefer_degisti(2)
+    taze = _Tablo(
+        {s: planlayici.tablo().seferler[s] for s in (1, 2)}, {}, {}
+    )
+    assert planlayici.tablo().baglantilar == taze.baglantilar
+    assert planlayici.tablo().anahtarlar == taze.anahtarlar
+
+    db.seferler[2]['durum'] = 'iptal'
+    planlayici.sefer_degisti(2)
+    assert 2 not in planlayici.tablo().seferler
+    assert planlayici.planla({A}, {C}, GUN, GUN + timedelta(days=1)) == []
+
+
+def test_etiket_ekle_pareto_kumesini_korur():
+    kayit = ([], [])
+    ekle = YolculukPlanlayici._etiket_ekle
+    ekle(kayit, Etiket(100, 500, 1, 1, None))
+    ekle(kayit, Etiket(90, 600, 1, 2, None))      # daha erken kalkış, daha geç varış: elenir
+    assert [e.sefer_id for e in kayit[1]] == [1]
+    ekle(kayit, Etiket(50, 400, 1, 3, None))      # daha erken varış: eklenir
+    assert [e.sefer_id for e in kayit[1]] == [3, 1]
+    ekle(kayit, Etiket(120, 400, 1, 4, None))     # 1 ve aynı varışlı 3'e baskın: ikisinin yerini alır
+    assert [e.sefer_id for e in kayit[1]] == [4]
+    ekle(kayit, Etiket(130, 700, 1, 5, None))     # daha geç kalkış, daha geç varış: eklenir
+    assert [e.sefer_id for e in kayit[1]] == [4, 5]
+    assert kayit[0] == [400, 700]
+
+
+def test_baskin_olmayanlar_bacak_sayisini_da_gozetir():
+    etiketler = [
+        Etiket(100, 500, 2, 1, None),
+        Etiket(100, 500, 1, 2, None),   # aynı saatler, daha az bacak: 1'e baskın
+        Etiket(90, 450, 3, 3, None),    # daha erken varış: kalır
+        Etiket(80, 500, 1, 4, None),    # 2'ye göre erken kalkış, aynı varış: elenir
+    ]
+    sonuc = YolculukPlanlayici._baskin_olmayanlar(etiketler)
+    assert sorted(e.sefer_id for e in sonuc) == [2, 3]
+
+
+def test_bos_koltuk_duzeltmesi_yeni_goruntuye_yazilir(db):
+    db.ekle(1, A, C, _saat(8), _saat(12), bos=5)
+    planlayici = YolculukPlanlayici(db, ttl=0)
+    tablo = planlayici.tablo()
+    db.seferler[1]['bos_koltuk_sayisi'] = 1
+    assert planlayici.planla({A}, {C}, GUN, GUN + timedelta(days=1), yolcu=2) == []
+    assert tablo.bos == {1: 5}
+    assert planlayici.tablo().bos == {1: 1}
+    # İndeksten çıkarılmış sefer düzeltmeyle geri eklenmez
+    planlayici.bos_guncelle({1: 3, 99: 7})
+    assert planlayici.tablo().bos == {1: 3}
@@ -0,0 +1,78 @@
+"""
+Rezervasyon.toplam_tutar alanının bakımı.
+
+Tutar, Bilet tetikleyicileri tarafından fark (delta) olarak güncellenir:
+bilet eklenince / silinince fiyatı eklenir / çıkarılır, yalnızca fiyatı ya
+da rezervasyonu değişen bilet için güncellenir. SUM(fiyat) yeniden
+çalıştırılmadığından Bilet tablosuyla tutarlılığı komut satırından kontrol
+edilebilir / yeniden kurulabilir:
+
+    python tutar.py            # sadece farkları raporla
+    python tutar.py --duzelt   # farklı olan tutarları Bilet'ten yeniden hesapla
+"""
+import argparse
+import sys
+
+from database import db
+
+FARK_SORGUSU = """
+    SELECT r.rezervasyon_id, r.pnr, r.toplam_tutar AS tutar, COALESCE(b.toplam, 0) AS gercek
+    FROM Rezervasyon r
+    LEFT JOIN (
+        SELECT rezervasyon_id, SUM(fiyat) AS toplam
+        FROM Bilet
+        GROUP BY rezervasyon_id
+    ) b ON b.rezervasyon_id = r.rezervasyon_id
+    WHERE r.toplam_tutar != COALESCE(b.toplam, 0)
+    ORDER BY r.rezervasyon_id
+"""
+
+
+def dogrula(database=db):
+    """Tutarı Bilet tablosuyla uyuşmayan rezervasyonları döndürür"""
+    return database.execute_query(FARK_SORGUSU, fetch=True)
+
+
+def yeniden_olustur(database=db):
+    """
+    Uyuşmayan tutarları Bilet tablosundan yeniden hesaplar; düzeltilen satır
+    sayısını döndürür. Satış trafiği yokken çalıştırılması önerilir.
+    """
+    return database.execute_query(
+        """
+        UPDATE Rezervasyon r
+        LEFT JOIN (
+            SELECT rezervasyon_id, SUM(fiyat) AS toplam
+            FROM Bilet
+            GROUP BY rezervasyon_id
+        ) b ON b.rezervasyon_id = r.rezervasyon_id
+        SET r.toplam_tutar = COALESCE(b.toplam, 0)
+        WHERE r.toplam_tutar != COALESCE(b.toplam, 0)
+        """
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rezervasyon tutarlarını Bilet tablosuyla karşılaştır')
+    parser.add_argument('--duzelt', action='store_true', help='Farklı olan tutarları yeniden hesapla')
+    args = parser.parse_args(argv)
+
+    farklar = dogrula()
+    for fark in farklar:
+        print(f"Rezervasyon {fark['rezervasyon_id']} ({fark['pnr']}): tutar={fark['tutar']} gerçek={fark['gercek']}")
+
+    if not farklar:
+        print("Tüm rezervasyon tutarları tutarlı.")
+        return 0
+
+    if args.duzelt:
+        duzeltilen = yeniden_olustur()
+        print(f"{duzeltilen} rezervasyon tutarı düzeltildi.")
+        return 0
+
+    print(f"{len(farklar)} rezervasyonda tutarsızlık var (düzeltmek için --duzelt).")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,372 @@
+"""
+Aktarmalı yolculuk planlama (Connection Scan).
+
+Satışa açık, kalkışı gelecekte olan seferler süreç içinde kalkış zamanına
+göre sıralı bir bağlantı listesinde tutulur. Sorgu, gün penceresindeki
+bağlantıları bir kez tarar ve her istasyon için (ilk kalkış, varış, bacak
+sayısı) bakımından baskın olmayan etiketleri tutar:
+
+  - bir sefere binilebilmesi için önceki bacağın varışı ile kalkış arasında
+    en az PLANLAYICI_MIN_AKTARMA_DK, en fazla PLANLAYICI_MAX_BEKLEME_SAAT olmalı,
+  - boş koltuğu yolcu sayısından az olan seferler atlanır,
+  - yolculuk en fazla max_bacak seferden oluşur.
+
+Aynı bacak sayısındaki etiketler varışa göre sıralı tutulduğu için (daha geç
+varan etiketin ilk kalkışı da daha geçtir) bir sefere binebilecek en iyi
+etiket ikili aramayla bulunur.
+
+İndeks ilk sorguda yüklenir; PLANLAYICI_TTL saniyede bir (diğer worker'ların
+yazmaları için) yeniden kurulur. Bu süreçte eklenen / durumu değişen /
+silinen seferler sefer_degisti ile tek tek güncellenir. Boş koltuk sayıları
+indekste yaklaşıktır: sonuçtaki seferler döndürülmeden önce veritabanından
+kontrol edilir, dolmuş sefer indekste düzeltilip plan tekrarlanır.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+from datetime import datetime
+
+from database import db
+
+MIN_AKTARMA_DK = int(os.getenv('PLANLAYICI_MIN_AKTARMA_DK', '15'))
+MAX_BEKLEME_SAAT = int(os.getenv('PLANLAYICI_MAX_BEKLEME_SAAT', '12'))
+MAX_BACAK = int(os.getenv('PLANLAYICI_MAX_BACAK', '4'))
+# İlk kalkıştan son varışa en uzun yolculuk (tarama penceresinin sonu)
+MAX_SURE_SAAT = int(os.getenv('PLANLAYICI_MAX_SURE_SAAT', '48'))
+# Dolmuş sefer bulunursa plan en fazla bu kadar tekrarlanır
+MAX_PLAN_DENEMESI = 3
+
+_SIFIR = datetime(2000, 1, 1)
+
+SEFER_SORGUSU = """
+    SELECT s.sefer_id, s.kalkis_istasyon_id, s.varis_istasyon_id, s.kalkis_zamani, s.varis_zamani,
+           s.durum, t.kod AS tren_kodu, t.koltuk_sayisi - s.dolu_koltuk_sayisi AS bos_koltuk_sayisi
+    FROM Sefer s
+    JOIN Tren t ON s.tren_id = t.tren_id
+"""
+
+BOS_KOLTUK_SORGUSU = """
+    SELECT s.sefer_id, s.durum, t.koltuk_sayisi - s.dolu_koltuk_sayisi AS bos_koltuk_sayisi
+    FROM Sefer s
+    JOIN Tren t ON s.tren_id = t.tren_id
+    WHERE s.sefer_id IN ({yer})
+"""
+
+Sefer = namedtuple('Sefer', ['sefer_id', 'kalkis_istasyon_id', 'varis_istasyon_id',
+                             'kalkis_zamani', 'varis_zamani', 'tren_kodu'])
+
+# kalkis: yolculuğun ilk kalkışı, varis: bu etiketin istasyona varışı (saniye)
+Etiket = namedtuple('Etiket', ['kalkis', 'varis', 'bacak', 'sefer_id', 'onceki'])
+
+
+def _saniye(zaman):
+    return int((zaman - _SIFIR).total_seconds())
+
+
+class _Tablo:
+    """Bir yüklemenin değişmez görüntüsü; güncellemeler yeni liste üretir (copy-on-write)"""
+
+    __slots__ = ('baglantilar', 'anahtarlar', 'seferler', 'bos', 'istasyonlar', 'yuklenme_zamani')
+
+    def __init__(self, seferler, bos, istasyonlar):
+        self.seferler = seferler
+        self.bos = bos
+        self.istasyonlar = istasyonlar
+        self.baglantilar = sorted(self._baglanti(s) for s in seferler.values())
+        self.anahtarlar = [b[:2] for b in self.baglantilar]
+        self.yuklenme_zamani = time.monotonic()
+
+    def turet(self, seferler, bos, baglantilar):
+        """Aynı yüklemeden (istasyonlar, yüklenme zamanı) yeni görüntü"""
+        yeni = _Tablo.__new__(_Tablo)
+        yeni.seferler = seferler
+        yeni.bos = bos
+        yeni.istasyonlar = self.istasyonlar
+        yeni.baglantilar = baglantilar
+        yeni.anahtarlar = [b[:2] for b in baglantilar]
+        yeni.yuklenme_zamani = self.yuklenme_zamani
+        return yeni
+
+    @staticmethod
+    def _baglanti(sefer):
+        return (
+            _saniye(sefer.kalkis_zamani), sefer.sefer_id, sefer.kalkis_istasyon_id,
+            sefer.varis_istasyon_id, _saniye(sefer.varis_zamani)
+        )
+
+
+class YolculukPlanlayici:
+    """
+    Sefer tablosunun süreç içi bağlantı indeksi ve planlama sorgusu.
+
+    Sorgular indeksin o anki görüntüsünü kilitsiz okur; sefer_degisti yeni
+    bağlantı listesi üretip görüntüyü değiştirir.
+    """
+
+    def __init__(self, database, ttl=None):
+        self.db = database
+        self.ttl = float(os.getenv('PLANLAYICI_TTL', '300')) if ttl is None else ttl
+        self._sifirla()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._sifirla)
+
+    def _sifirla(self):
+        self._tablo = None
+        self._kilit = threading.Lock()
+        self._yeniden_yukle = False
+
+    def _sefer(self, satir):
+        return Sefer(
+            satir['sefer_id'], satir['kalkis_istasyon_id'], satir['varis_istasyon_id'],
+            satir['kalkis_zamani'], satir['varis_zamani'], satir['tren_kodu']
+        )
+
+    def _yukle(self):
+        # İş biriminin eski snapshot'ı yerine güncel veriden yüklenir
+        satirlar = self.db.execute_query(
+            SEFER_SORGUSU + " WHERE s.durum = 'satisa_acik' AND s.kalkis_zamani >= %s",
+            (datetime.now(),),
+            fetch=True,
+            ayri_baglanti=True
+        )
+        istasyonlar = self.db.execute_query(
+            "SELECT istasyon_id, ad, sehir FROM Istasyon", fetch=True, ayri_baglanti=True
+        )
+        return _Tablo(
+            {s['sefer_id']: self._sefer(s) for s in satirlar},
+            {s['sefer_id']: s['bos_koltuk_sayisi'] for s in satirlar},
+            {i['istasyon_id']: i for i in istasyonlar}
+        )
+
+    def _eskidi_mi(self, tablo):
+        return tablo is None or self._yeniden_yukle or (
+            self.ttl > 0 and time.monotonic() - tablo.yuklenme_zamani > self.ttl
+        )
+
+    def tablo(self):
+        """Güncel indeks görüntüsü (gerekirse yükler)"""
+        tablo = self._tablo
+        if not self._eskidi_mi(tablo):
+            return tablo
+        with self._kilit:
+            tablo = self._tablo
+            if self._eskidi_mi(tablo):
+                self._yeniden_yukle = False
+                tablo = self._tablo = self._yukle()
+            return tablo
+
+    def gecersiz_kil(self):
+        """Tüm indeksi bir sonraki sorguda yeniden kur (toplu değişiklikler için)"""
+        self._yeniden_yukle = True
+
+    def sefer_degisti(self, sefer_id):
+        """
+        Tek seferi veritabanından okuyup indekse ekler, günceller ya da
+        (silindiyse / satışa kapandıysa / kalkışı geçtiyse) çıkarır.
+        """
+        with self._kilit:
+            tablo = self._tablo
+            if tablo is None:
+                return
+            satirlar = self.db.execute_query(
+                SEFER_SORGUSU + " WHERE s.sefer_id = %s", (sefer_id,), fetch=True, ayri_baglanti=True
+            )
+            seferler = dict(tablo.seferler)
+            bos = dict(tablo.bos)
+            baglantilar = list(tablo.baglantilar)
+            eski = seferler.pop(sefer_id, None)
+            bos.pop(sefer_id, None)
+            if eski is not None:
+                i = bisect_left(baglantilar, _Tablo._baglanti(eski))
+                del baglantilar[i]
+            satir = satirlar[0] if satirlar else None
+            if satir and satir['durum'] == 'satisa_acik' and satir['kalkis_zamani'] >= datetime.now():
+                sefer = seferler[sefer_id] = self._sefer(satir)
+                bos[sefer_id] = satir['bos_koltuk_sayisi']
+                insort(baglantilar, _Tablo._baglanti(sefer))
+                if sefer.kalkis_istasyon_id not in tablo.istasyonlar or \
+                        sefer.varis_istasyon_id not in tablo.istasyonlar:
+                    self._yeniden_yukle = True
+
+            self._tablo = tablo.turet(seferler, bos, baglantilar)
+
+    def bos_guncelle(self, guncel):
+        """
+        {sefer_id: boş koltuk} düzeltmelerini indeksin yeni kopyasına yazar.
+        İndekste artık olmayan seferler (bu arada çıkarılmış) eklenmez.
+        """
+        with self._kilit:
+            tablo = self._tablo
+            if tablo is None:
+                return
+            bos = dict(tablo.bos)
+            bos.update((s, b) for s, b in guncel.items() if s in tablo.seferler)
+            self._tablo = tablo.turet(tablo.seferler, bos, tablo.baglantilar)
+
+    def _tara(self, tablo, kalkis_ids, varis_ids, baslangic, bitis, yolcu, max_bacak, min_aktarma):
+        """Connection Scan; hedefe varan baskın olmayan etiketleri döndürür"""
+        max_bekleme = MAX_BEKLEME_SAAT * 3600
+        ufuk = bitis + MAX_SURE_SAAT * 3600
+        baglantilar = tablo.baglantilar
+        bos = tablo.bos
+        # (istasyon, bacak) -> ([varis, ...], [Etiket, ...]) varışa göre sıralı
+        etiketler = {}
+        hedefe_varan = []
+
+        for i in range(bisect_left(tablo.anahtarlar, (baslangic,)), len(baglantilar)):
+            kalkis, sefer_id, nereden, nereye, varis = baglantilar[i]
+            if kalkis >= ufuk:
+                break
+            if bos.get(sefer_id, 0) < yolcu:
+                continue
+
+            adaylar = []
+            if nereden in kalkis_ids:
+                if kalkis >= bitis:
+                    continue
+                adaylar.append(Etiket(kalkis, varis, 1, sefer_id, None))
+            else:
+                for bacak in range(1, max_bacak):
+                    kayit = etiketler.get((nereden, bacak))
+                    if kayit is None:
+                        continue
+                    # Aktarmaya yetişen en geç varış = ilk kalkışı en geç olan etiket
+                    j = bisect_right(kayit[0], kalkis - min_aktarma) - 1
+                    if j < 0:
+                        continue
+                    onceki = kayit[1][j]
+                    if kalkis - onceki.varis <= max_bekleme:
+                        adaylar.append(Etiket(onceki.kalkis, varis, bacak + 1, sefer_id, onceki))
+
+            for etiket in adaylar:
+                if nereye in varis_ids:
+                    hedefe_varan.append(etiket)
+                elif etiket.bacak < max_bacak and nereye not in kalkis_ids:
+                    self._etiket_ekle(etiketler.setdefault((nereye, etiket.bacak), ([], [])), etiket)
+        return hedefe_varan
+
+    @staticmethod
+    def _etiket_ekle(kayit, etiket):
+        """Aynı bacak sayısında (kalkış büyük, varış küçük) Pareto kümesine ekler"""
+        varislar, liste = kayit
+        j = bisect_right(varislar, etiket.varis)
+        if j > 0 and liste[j - 1].kalkis >= etiket.kalkis:
+            return
+        # Aynı varışlı, daha erken kalkan etiketler de kümeden çıkar
+        i, k = bisect_left(varislar, etiket.varis), j
+        while k < len(liste) and liste[k].kalkis <= etiket.kalkis:
+            k += 1
+        varislar[i:k] = [etiket.varis]
+        liste[i:k] = [etiket]
+
+    @staticmethod
+    def _baskin_olmayanlar(etiketler):
+        sonuc = []
+        for etiket in sorted(etiketler, key=lambda e: (-e.kalkis, e.varis, e.bacak)):
+            if any(s.varis <= etiket.varis and s.bacak <= etiket.bacak for s in sonuc):
+                continue
+            sonuc.append(etiket)
+        sonuc.reverse()
+        return sonuc
+
+    def _yolculuk(self, tablo, etiket):
+        bacaklar = []
+        while etiket is not None:
+            sefer = tablo.seferler[etiket.sefer_id]
+            kalkis = tablo.istasyonlar.get(sefer.kalkis_istasyon_id, {})
+            varis = tablo.istasyonlar.get(sefer.varis_istasyon_id, {})
+            bacaklar.append({
+                'sefer_id': sefer.sefer_id,
+                'tren_kodu': sefer.tren_kodu,
+                'kalkis_istasyon': kalkis.get('ad'),
+                'kalkis_sehir': kalkis.get('sehir'),
+                'varis_istasyon': varis.get('ad'),
+                'varis_sehir': varis.get('sehir'),
+                'kalkis_zamani': sefer.kalkis_zamani,
+                'varis_zamani': sefer.varis_zamani,
+                'bos_koltuk_sayisi': tablo.bos.get(sefer.sefer_id, 0),
+            })
+            etiket = etiket.onceki
+        bacaklar.reverse()
+        kalkis_zamani = bacaklar[0]['kalkis_zamani']
+        varis_zamani = bacaklar[-1]['varis_zamani']
+        return {
+            'kalkis_zamani': kalkis_zamani,
+            'varis_zamani': varis_zamani,
+            'sure_dk': int((varis_zamani - kalkis_zamani).total_seconds() // 60),
+            'aktarma_sayisi': len(bacaklar) - 1,
+            'bacaklar': bacaklar,
+        }
+
+    def _dolu_seferleri_duzelt(self, yolculuklar, yolcu):
+        """
+        Sonuçtaki seferlerin boş koltuğunu veritabanından okur, indeksi
+        düzeltir; yetersiz koltuklu ya da satışa kapanmış sefer varsa True.
+        """
+        sefer_ids = sorted({b['sefer_id'] for y in yolculuklar for b in y['bacaklar']})
+        if not sefer_ids:
+            return False
+        satirlar = self.db.execute_query(
+            BOS_KOLTUK_SORGUSU.format(yer=', '.join(['%s'] * len(sefer_ids))),
+            tuple(sefer_ids),
+            fetch=True
+        )
+        guncel = {
+            s['sefer_id']: s['bos_koltuk_sayisi'] if s['durum'] == 'satisa_acik' else 0
+            for s in satirlar
+        }
+        bos = {sefer_id: guncel.get(sefer_id, 0) for sefer_id in sefer_ids}
+        self.bos_guncelle(bos)
+        eksik = any(b < yolcu for b in bos.values())
+        for yolculuk in yolculuklar:
+            for bacak in yolculuk['bacaklar']:
+                bacak['bos_koltuk_sayisi'] = guncel.get(bacak['sefer_id'], 0)
+        return eksik
+
+    def planla(self, kalkis_ids, varis_ids, gun_baslangic, gun_bitis, yolcu=1,
+               max_bacak=None, min_aktarma_dk=None, limit=20):
+        """
+        gun_baslangic <= ilk kalkış < gun_bitis olan, kalkis_ids'deki bir
+        istasyondan varis_ids'deki bir istasyona giden yolculuklar.
+
+        Returns:
+            ilk kalkışa göre sıralı, (daha geç kalkış, daha erken varış, daha az
+            aktarma) bakımından birbirine baskın olmayan yolculuklar
+        """
+        kalkis_ids, varis_ids = set(kalkis_ids), set(varis_ids)
+        if not kalkis_ids or not varis_ids or kalkis_ids & varis_ids:
+            return []
+        max_bacak = max(1, min(max_bacak or MAX_BACAK, MAX_BACAK))
+        min_aktarma = (MIN_AKTARMA_DK if min_aktarma_dk is None else min_aktarma_dk) * 60
+        baslangic = max(_saniye(gun_baslangic), _saniye(datetime.now()))
+        bitis = _saniye(gun_bitis)
+
+        yolculuklar = []
+        for _ in range(MAX_PLAN_DENEMESI):
+            tablo = self.tablo()
+            etiketler = self._tara(
+                tablo, kalkis_ids, varis_ids, baslangic, bitis, yolcu, max_bacak, min_aktarma
+            )
+            yolculuklar = [self._yolculuk(tablo, e) for e in self._baskin_olmayanlar(etiketler)[:limit]]
+            if not self._dolu_seferleri_duzelt(yolculuklar, yolcu):
+                return yolculuklar
+        # Denemeler bitti: yetersiz koltuklu yolculukları çıkar
+        return [
+            y for y in yolculuklar
+            if all(b['bos_koltuk_sayisi'] >= yolcu for b in y['bacaklar'])
+        ]
+
+    def durum(self):
+        tablo = self._tablo
+        if tablo is None:
+            return {'yuklu': False}
+        return {
+            'yuklu': True,
+            'sefer_sayisi': len(tablo.baglantilar),
+            'yas_sn': round(time.monotonic() - tablo.yuklenme_zamani, 1),
+        }
+
+
+yolculuk_planlayici = YolculukPlanlayici(db)
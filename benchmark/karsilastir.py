@@ -0,0 +1,56 @@
+"""
+İki yük testi sonucunu (yuk_testi.py çıktısı) karşılaştırır.
+
+    python karsilastir.py sonuclar/onceki.json sonuclar/sonraki.json
+
+İşlem bazında p50/p95/p99 ve throughput değişimini yüzde olarak yazar.
+"""
+import argparse
+import json
+import sys
+
+ALANLAR = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput')
+
+
+def yukle(yol):
+    with open(yol, encoding='utf-8') as dosya:
+        return json.load(dosya)
+
+
+def degisim(onceki, sonraki):
+    if not onceki:
+        return '-'
+    return f"{(sonraki - onceki) / onceki * 100:+.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='İki yük testi sonucunu karşılaştır')
+    parser.add_argument('onceki')
+    parser.add_argument('sonraki')
+    args = parser.parse_args(argv)
+
+    onceki, sonraki = yukle(args.onceki), yukle(args.sonraki)
+    print(f"{onceki.get('etiket') or args.onceki} ({onceki.get('git')}) -> "
+          f"{sonraki.get('etiket') or args.sonraki} ({sonraki.get('git')})")
+    if onceki.get('parametreler') != sonraki.get('parametreler') or onceki.get('veri') != sonraki.get('veri'):
+        print("UYARI: parametreler veya veri boyutu farklı, sonuçlar doğrudan karşılaştırılamayabilir")
+
+    print(f"{'islem':<12}" + ''.join(f"{alan:>24}" for alan in ALANLAR))
+    islemler = sorted(set(onceki['sonuc']['islemler']) | set(sonraki['sonuc']['islemler']))
+    for islem in islemler:
+        a = onceki['sonuc']['islemler'].get(islem, {})
+        b = sonraki['sonuc']['islemler'].get(islem, {})
+        satir = f"{islem:<12}"
+        for alan in ALANLAR:
+            satir += f"{a.get(alan, '-')!s:>9} -> {b.get(alan, '-')!s:>7} {degisim(a.get(alan), b.get(alan, 0)):>6}"
+        print(satir)
+
+    ra, rb = onceki['sonuc']['rezervasyon'], sonraki['sonuc']['rezervasyon']
+    print(f"toplam throughput: {onceki['sonuc']['throughput']} -> {sonraki['sonuc']['throughput']} "
+          f"({degisim(onceki['sonuc']['throughput'], sonraki['sonuc']['throughput'])})")
+    print(f"çakışma oranı: {ra['cakisma_orani']} -> {rb['cakisma_orani']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
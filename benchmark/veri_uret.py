@@ -0,0 +1,317 @@
+"""
+Yük testi için ölçekli sentetik veri üretir.
+
+Şema database/schema.sql'dir; --sema verilirse veritabanı mysql istemcisiyle
+sıfırdan kurulur (mevcut veri SİLİNİR, yalnızca yerel MySQL'de çalışır).
+Verilmezse üretilen kayıtlar mevcut verinin üzerine eklenir. Bağlantı
+bilgileri backend/.env'den okunur.
+
+    python veri_uret.py --sema --istasyon 200 --tren 300 --sefer 20000 \\
+        --kullanici 5000 --bilet 500000
+
+Aynı --tohum ile aynı veri üretilir. Yük testinin kullanacağı sefer,
+şehir/tarih ve kullanıcı listesi --manifest dosyasına (varsayılan veri.json)
+yazılır.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(KOK, 'backend'))
+
+from database import db  # noqa: E402
+from doluluk import yeniden_olustur  # noqa: E402
+from pnr import pnr_kodla  # noqa: E402
+from sifre import hash_uret, sifre_havuzu  # noqa: E402
+
+SIFRE = '123456'
+YEREL_HOSTLAR = ('localhost', '127.0.0.1', '::1')
+
+SEHIRLER = [
+    'Ankara', 'İstanbul', 'Eskişehir', 'İzmir', 'Konya', 'Bursa', 'Adana', 'Gaziantep',
+    'Samsun', 'Antalya', 'Trabzon', 'Kayseri', 'Sivas', 'Erzurum', 'Malatya', 'Diyarbakır',
+    'Kars', 'Edirne', 'Balıkesir', 'Manisa', 'Denizli', 'Afyonkarahisar', 'Kütahya', 'Karaman',
+    'Mersin', 'Elazığ', 'Van', 'Tatvan', 'Zonguldak', 'Karabük', 'Sakarya', 'Kocaeli',
+    'Bilecik', 'Uşak', 'Aydın', 'Niğde', 'Yozgat', 'Kırıkkale', 'Çankırı', 'Amasya',
+]
+ADLAR = ['Ahmet', 'Ayşe', 'Mehmet', 'Fatma', 'Emre', 'Zeynep', 'Veli', 'Melis', 'Burak',
+         'Deniz', 'Özge', 'Can', 'Elif', 'Murat', 'Selin', 'Kaan', 'Gül', 'İrem', 'Onur', 'Şule']
+SOYADLAR = ['Yılmaz', 'Kara', 'Arslan', 'Güneş', 'Aksoy', 'Kaya', 'Demir', 'Şahin', 'Çetin',
+            'Yalçın', 'Öztürk', 'Aydın', 'Doğan', 'Kılıç', 'Koç', 'Kurt', 'Polat', 'Erdem']
+
+# Rezervasyon durum dağılımı: (durum, bilet durumu, oran)
+REZERVASYON_DURUMLARI = (('odendi', 'kesildi', 0.6), ('olusturuldu', 'rezerve', 0.3), ('iptal', 'iade', 0.1))
+
+
+def semayi_kur():
+    """database/schema.sql'i mysql istemcisiyle çalıştırır (DELIMITER içerdiği için)"""
+    if db.host not in YEREL_HOSTLAR:
+        raise SystemExit(f"--sema yalnızca yerel MySQL'de kullanılabilir (DB_HOST={db.host})")
+    with open(os.path.join(KOK, 'database', 'schema.sql'), 'rb') as sema:
+        subprocess.run(
+            ['mysql', '-h', db.host, '-P', str(db.port), '-u', db.user, '--default-character-set=utf8mb4'],
+            stdin=sema, check=True, env=dict(os.environ, MYSQL_PWD=db.password)
+        )
+    print("Şema kuruldu: database/schema.sql")
+
+
+def son_id(tablo, kolon):
+    return db.execute_query(f"SELECT COALESCE(MAX({kolon}), 0) AS son FROM {tablo}", fetch=True)[0]['son']
+
+
+def toplu_ekle(sql, satirlar, parti, tetikleyicisiz=False):
+    """
+    Satırları parti parti, her parti ayrı transaction'da ekler.
+    tetikleyicisiz=True: Bilet INSERT tetikleyicileri çalışmaz (bkz. migration 007)
+    """
+    for i in range(0, len(satirlar), parti):
+        with db.transaction() as cursor:
+            if tetikleyicisiz:
+                cursor.execute("SET @toplu_ice_aktarim = 1")
+            try:
+                cursor.executemany(sql, satirlar[i:i + parti])
+            finally:
+                if tetikleyicisiz:
+                    cursor.execute("SET @toplu_ice_aktarim = NULL")
+
+
+class Uretici:
+    def __init__(self, args):
+        self.args = args
+        self.rnd = random.Random(args.tohum)
+        self.baslangic = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+
+    def istasyonlar(self):
+        ilk = son_id('Istasyon', 'istasyon_id') + 1
+        sehirler = SEHIRLER[:max(2, min(len(SEHIRLER), self.args.sehir))]
+        satirlar = []
+        for i in range(self.args.istasyon):
+            sehir = sehirler[i % len(sehirler)]
+            satirlar.append((ilk + i, f"{sehir} Garı {i // len(sehirler) + 1}", sehir))
+        toplu_ekle("INSERT INTO Istasyon (istasyon_id, ad, sehir) VALUES (%s, %s, %s)", satirlar, self.args.parti)
+        self.istasyon_sehri = {istasyon_id: sehir for istasyon_id, _, sehir in satirlar}
+
+    def trenler(self):
+        ilk = son_id('Tren', 'tren_id') + 1
+        satirlar = [
+            (ilk + i, f"BT{ilk + i:06d}", self.rnd.choice((55, 60, 72, 80, 90, 100, 120)))
+            for i in range(self.args.tren)
+        ]
+        toplu_ekle("INSERT INTO Tren (tren_id, kod, koltuk_sayisi) VALUES (%s, %s, %s)", satirlar, self.args.parti)
+        self.kapasite = {tren_id: koltuk for tren_id, _, koltuk in satirlar}
+
+    def seferler(self):
+        """Her tren kendi takvimini izler: aynı trenin seferleri çakışmaz"""
+        ilk = son_id('Sefer', 'sefer_id') + 1
+        istasyon_idler = list(self.istasyon_sehri)
+        tren_idler = list(self.kapasite)
+        bos_zaman = {tren_id: self.baslangic for tren_id in tren_idler}
+        satirlar = []
+        self.sefer_bilgisi = {}
+        for i in range(self.args.sefer):
+            tren_id = tren_idler[i % len(tren_idler)]
+            kalkis_ist, varis_ist = self.rnd.sample(istasyon_idler, 2)
+            kalkis = bos_zaman[tren_id] + timedelta(minutes=self.rnd.randrange(0, 12 * 60, 15))
+            varis = kalkis + timedelta(minutes=self.rnd.randrange(60, 8 * 60, 15))
+            bos_zaman[tren_id] = varis + timedelta(hours=1)
+            durum = 'satisa_acik' if self.rnd.random() < 0.9 else 'planli'
+            sefer_id = ilk + i
+            satirlar.append((sefer_id, tren_id, kalkis_ist, varis_ist, kalkis, varis, durum))
+            self.sefer_bilgisi[sefer_id] = {
+                'kapasite': self.kapasite[tren_id],
+                'kalkis_sehir': self.istasyon_sehri[kalkis_ist],
+                'varis_sehir': self.istasyon_sehri[varis_ist],
+                'tarih': kalkis.strftime('%Y-%m-%d'),
+                'satista': durum == 'satisa_acik',
+                'fiyat': Decimal(self.rnd.randrange(150, 900, 10)),
+            }
+        toplu_ekle(
+            """INSERT INTO Sefer
+               (sefer_id, tren_id, kalkis_istasyon_id, varis_istasyon_id, kalkis_zamani, varis_zamani, durum)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+            satirlar, self.args.parti
+        )
+
+    def kullanicilar(self):
+        ilk = son_id('Kullanici', 'kullanici_id') + 1
+        # Tek hash tüm kullanıcılar için yeterli; girişler gerçek doğrulama maliyetini öder
+        sifre_hash = hash_uret(SIFRE, *sifre_havuzu.maliyet)
+        satirlar = [(ilk, 'bench_admin', f'bench_admin.{ilk}@bench.local', sifre_hash, 'Bench Admin', None, 'admin')]
+        for i in range(1, self.args.kullanici + 1):
+            satirlar.append((
+                ilk + i, f'bench_{ilk + i}', f'bench_{ilk + i}@bench.local', sifre_hash,
+                f"{self.rnd.choice(ADLAR)} {self.rnd.choice(SOYADLAR)}", None, 'kullanici'
+            ))
+        toplu_ekle(
+            """INSERT INTO Kullanici (kullanici_id, kullanici_adi, eposta, sifre_hash, ad_soyad, telefon, rol)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)
+               ON DUPLICATE KEY UPDATE sifre_hash = VALUES(sifre_hash)""",
+            satirlar, self.args.parti
+        )
+        self.admin = satirlar[0][1]
+        self.kullanici_idler = [s[0] for s in satirlar[1:]]
+        self.kullanici_adlari = [s[1] for s in satirlar[1:]]
+
+    def yolcular(self):
+        ilk = son_id('Yolcu', 'yolcu_id') + 1
+        adet = self.args.yolcu or max(1, self.args.bilet // 2)
+        satirlar = [
+            (ilk + i, f"{self.rnd.choice(ADLAR)} {self.rnd.choice(SOYADLAR)}",
+             f'yolcu_{ilk + i}@bench.local', f'0555{self.rnd.randrange(10 ** 7):07d}')
+            for i in range(adet)
+        ]
+        toplu_ekle("INSERT INTO Yolcu (yolcu_id, ad_soyad, eposta, telefon) VALUES (%s, %s, %s, %s)",
+                   satirlar, self.args.parti)
+        self.yolcu_idler = [s[0] for s in satirlar]
+
+    def rezervasyonlar(self):
+        """
+        Rezervasyon başına 1-4 bilet, hepsi aynı seferde. Koltuklar sefer
+        başına tekrar etmez; seferler en fazla --max-doluluk oranında dolar.
+        """
+        rez_ilk = son_id('Rezervasyon', 'rezervasyon_id') + 1
+        bilet_ilk = son_id('Bilet', 'bilet_id') + 1
+        pnr_baslangic = db.execute_query(
+            "SELECT son_deger FROM PnrSayac WHERE ad = 'pnr'", fetch=True
+        )[0]['son_deger']
+
+        satista = [sid for sid, s in self.sefer_bilgisi.items() if s['satista']]
+        dolu = {}
+        rezervasyonlar, biletler, odemeler = [], [], []
+        durumlar = [d[:2] for d in REZERVASYON_DURUMLARI]
+        agirliklar = [d[2] for d in REZERVASYON_DURUMLARI]
+        uretilen = 0
+        while uretilen < self.args.bilet and satista:
+            sefer_id = self.rnd.choice(satista)
+            bilgi = self.sefer_bilgisi[sefer_id]
+            alinan = dolu.setdefault(sefer_id, set())
+            kalan = int(bilgi['kapasite'] * self.args.max_doluluk) - len(alinan)
+            if kalan <= 0:
+                satista.remove(sefer_id)
+                continue
+            adet = min(self.rnd.randint(1, 4), kalan, self.args.bilet - uretilen)
+            bos = [k for k in range(1, bilgi['kapasite'] + 1) if k not in alinan]
+            koltuklar = self.rnd.sample(bos, adet)
+            alinan.update(koltuklar)
+
+            rez_id = rez_ilk + len(rezervasyonlar)
+            rez_durum, bilet_durum = self.rnd.choices(durumlar, agirliklar)[0]
+            toplam = bilgi['fiyat'] * adet
+            rezervasyonlar.append((
+                rez_id, pnr_kodla(pnr_baslangic + len(rezervasyonlar) + 1),
+                self.rnd.choice(self.kullanici_idler), toplam, rez_durum
+            ))
+            for koltuk in koltuklar:
+                biletler.append((
+                    bilet_ilk + uretilen, rez_id, sefer_id, self.rnd.choice(self.yolcu_idler),
+                    koltuk, bilgi['fiyat'], bilet_durum
+                ))
+                uretilen += 1
+            if rez_durum == 'odendi':
+                odemeler.append((rez_id, self.rnd.choice(('kart', 'nakit')), toplam))
+            if bilet_durum == 'iade':
+                # İade edilen koltuk yeniden satılabilir
+                alinan.difference_update(koltuklar)
+
+        toplu_ekle(
+            """INSERT INTO Rezervasyon (rezervasyon_id, pnr, kullanici_id, toplam_tutar, durum)
+               VALUES (%s, %s, %s, %s, %s)""",
+            rezervasyonlar, self.args.parti
+        )
+        # toplam_tutar rezervasyonla birlikte yazıldı; tetikleyiciler tekrar eklemesin
+        toplu_ekle(
+            """INSERT INTO Bilet (bilet_id, rezervasyon_id, sefer_id, yolcu_id, koltuk_no, fiyat, durum)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+            biletler, self.args.parti, tetikleyicisiz=True
+        )
+        toplu_ekle(
+            "INSERT INTO Odeme (rezervasyon_id, yontem, tutar, durum) VALUES (%s, %s, %s, 'basarili')",
+            odemeler, self.args.parti
+        )
+        # Bu PNR'ler uygulamanın ayıracağı bloklarla çakışmasın
+        db.execute_query(
+            "UPDATE PnrSayac SET son_deger = GREATEST(son_deger, %s) WHERE ad = 'pnr'",
+            (pnr_baslangic + len(rezervasyonlar),)
+        )
+        self.rezervasyon_sayisi = len(rezervasyonlar)
+        self.bilet_sayisi = uretilen
+
+    def manifest(self):
+        satista = [sid for sid, s in self.sefer_bilgisi.items() if s['satista']]
+        ornek = self.rnd.sample(satista, min(len(satista), self.args.manifest_sefer))
+        aramalar = sorted({
+            (self.sefer_bilgisi[sid]['kalkis_sehir'], self.sefer_bilgisi[sid]['varis_sehir'],
+             self.sefer_bilgisi[sid]['tarih'])
+            for sid in ornek
+        })
+        tarihler = sorted(s['tarih'] for s in self.sefer_bilgisi.values())
+        return {
+            'olusturulma': datetime.now().isoformat(timespec='seconds'),
+            'tohum': self.args.tohum,
+            'sayilar': {
+                'istasyon': self.args.istasyon,
+                'tren': self.args.tren,
+                'sefer': self.args.sefer,
+                'kullanici': self.args.kullanici,
+                'yolcu': len(self.yolcu_idler),
+                'rezervasyon': self.rezervasyon_sayisi,
+                'bilet': self.bilet_sayisi,
+            },
+            'sifre': SIFRE,
+            'admin': self.admin,
+            'kullanicilar': self.kullanici_adlari[:self.args.manifest_kullanici],
+            'seferler': ornek,
+            'aramalar': [list(a) for a in aramalar],
+            'tarih_araligi': [tarihler[0], tarihler[-1]] if tarihler else None,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Yük testi için ölçekli sentetik veri üret')
+    parser.add_argument('--sema', action='store_true', help='Veritabanını schema.sql ile sıfırdan kur (veri silinir)')
+    parser.add_argument('--istasyon', type=int, default=100)
+    parser.add_argument('--sehir', type=int, default=40, help='Farklı şehir sayısı (en fazla 40)')
+    parser.add_argument('--tren', type=int, default=200)
+    parser.add_argument('--sefer', type=int, default=5000)
+    parser.add_argument('--kullanici', type=int, default=2000)
+    parser.add_argument('--yolcu', type=int, default=0, help='Varsayılan: bilet sayısının yarısı')
+    parser.add_argument('--bilet', type=int, default=100000)
+    parser.add_argument('--max-doluluk', type=float, default=0.7,
+                        help='Üretilen biletlerle bir seferin dolabileceği en yüksek oran')
+    parser.add_argument('--parti', type=int, default=5000, help='Transaction başına satır')
+    parser.add_argument('--tohum', type=int, default=42)
+    parser.add_argument('--manifest', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'veri.json'))
+    parser.add_argument('--manifest-sefer', type=int, default=2000)
+    parser.add_argument('--manifest-kullanici', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.istasyon < 2 or args.tren < 1 or args.kullanici < 1:
+        parser.error('En az 2 istasyon, 1 tren ve 1 kullanıcı gerekir')
+
+    if args.sema:
+        semayi_kur()
+
+    uretici = Uretici(args)
+    for adim in ('istasyonlar', 'trenler', 'seferler', 'kullanicilar', 'yolcular', 'rezervasyonlar'):
+        baslangic = time.perf_counter()
+        getattr(uretici, adim)()
+        print(f"{adim}: {time.perf_counter() - baslangic:.1f} sn")
+
+    duzeltilen = yeniden_olustur()
+    print(f"Doluluk sayaçları güncellendi ({duzeltilen} sefer)")
+
+    with open(args.manifest, 'w', encoding='utf-8') as dosya:
+        json.dump(uretici.manifest(), dosya, ensure_ascii=False, indent=2)
+    print(f"Manifest yazıldı: {args.manifest}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
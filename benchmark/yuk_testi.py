@@ -0,0 +1,364 @@
+"""
+API sıcak yolları için yük testi (yalnızca standart kütüphane).
+
+Her sanal kullanıcı ayrı bir thread'de kendi keep-alive bağlantısı ve oturum
+çereziyle çalışır; işlemler --karisim ağırlıklarıyla seçilir:
+
+    ara          GET  /api/seferler/ara
+    koltuk       GET  /api/seferler/<id>/koltuklar
+    rezervasyon  GET koltuklar + POST /api/rezervasyonlar (boş görünen koltuklarla)
+    otomatik     POST /api/rezervasyonlar/otomatik (koltukları sunucu seçer)
+    odeme        POST /api/odemeler (kullanıcının ödenmemiş rezervasyonu için)
+    iptal        POST /api/rezervasyonlar/<id>/iptal (kullanıcının ödenmiş ya da
+                 ödenmemiş rezervasyonu için)
+    rapor        GET  /api/raporlar/* (sefer-doluluk, gelir-ozeti, bilet-istatistik)
+
+Sonuç (işlem bazında p50/p95/p99, throughput, çakışma oranı) JSON olarak
+yazılır; karsilastir.py iki çalıştırmayı karşılaştırır.
+
+    python yuk_testi.py --url http://localhost:5000 --eszamanli 32 --sure 60 \\
+        --cikti sonuclar/wsgi-32.json
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+VARSAYILAN_KARISIM = 'ara=40,koltuk=25,rezervasyon=15,odeme=5,rapor=15'
+RAPORLAR = ('/api/raporlar/sefer-doluluk', '/api/raporlar/gelir-ozeti', '/api/raporlar/bilet-istatistik')
+YUZDELIKLER = (50, 95, 99)
+GIRIS_DENEMESI = 20
+
+
+class Istemci:
+    """Tek keep-alive HTTP bağlantısı + oturum çerezi"""
+
+    def __init__(self, url, zaman_asimi):
+        parca = urlsplit(url)
+        self.host = parca.hostname
+        self.port = parca.port or 80
+        self.zaman_asimi = zaman_asimi
+        self.cerezler = {}
+        self.baglanti = None
+
+    def istek(self, yontem, yol, govde=None):
+        """(status, json gövde ya da None, süre sn); ağ hatasında status 0"""
+        basliklar = {}
+        if self.cerezler:
+            basliklar['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cerezler.items())
+        veri = None
+        if govde is not None:
+            veri = json.dumps(govde).encode('utf-8')
+            basliklar['Content-Type'] = 'application/json'
+
+        baslangic = time.perf_counter()
+        try:
+            if self.baglanti is None:
+                self.baglanti = http.client.HTTPConnection(self.host, self.port, timeout=self.zaman_asimi)
+            self.baglanti.request(yontem, yol, body=veri, headers=basliklar)
+            yanit = self.baglanti.getresponse()
+            icerik = yanit.read()
+        except (OSError, http.client.HTTPException):
+            self.kapat()
+            return 0, None, time.perf_counter() - baslangic
+        sure = time.perf_counter() - baslangic
+
+        for baslik in yanit.headers.get_all('Set-Cookie') or ():
+            for ad, morsel in SimpleCookie(baslik).items():
+                self.cerezler[ad] = morsel.value
+        if yanit.getheader('Connection', '').lower() == 'close':
+            self.kapat()
+        try:
+            return yanit.status, json.loads(icerik) if icerik else None, sure
+        except ValueError:
+            return yanit.status, None, sure
+
+    def kapat(self):
+        if self.baglanti is not None:
+            self.baglanti.close()
+            self.baglanti = None
+
+
+class Sonuclar:
+    """Thread'lerden gelen ölçümler (işlem -> süre listesi, status sayıları)"""
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self.sureler = {}
+        self.durumlar = {}
+        self.rezervasyon = {'deneme': 0, 'basarili': 0, 'cakisma': 0}
+
+    def ekle(self, islem, status, sure):
+        with self._kilit:
+            self.sureler.setdefault(islem, []).append(sure)
+            kodlar = self.durumlar.setdefault(islem, {})
+            kodlar[status] = kodlar.get(status, 0) + 1
+
+    def rezervasyon_sonucu(self, status):
+        with self._kilit:
+            self.rezervasyon['deneme'] += 1
+            if status == 201:
+                self.rezervasyon['basarili'] += 1
+            elif status == 409:
+                self.rezervasyon['cakisma'] += 1
+
+
+def yuzdelik(sirali, p):
+    """En yakın sıra yöntemi (sirali boş olmamalı)"""
+    indeks = max(0, min(len(sirali) - 1, math.ceil(p / 100 * len(sirali)) - 1))
+    return sirali[indeks]
+
+
+def ozet(sonuclar, sure):
+    islemler = {}
+    toplam = 0
+    for islem, sureler in sorted(sonuclar.sureler.items()):
+        sirali = sorted(sureler)
+        kodlar = sonuclar.durumlar[islem]
+        hata = sum(adet for kod, adet in kodlar.items() if kod == 0 or kod >= 500)
+        toplam += len(sirali)
+        kayit = {
+            'adet': len(sirali),
+            'throughput': round(len(sirali) / sure, 2),
+            'hata': hata,
+            'durum_kodlari': {str(k): v for k, v in sorted(kodlar.items())},
+            'ortalama_ms': round(sum(sirali) / len(sirali) * 1000, 2),
+            'max_ms': round(sirali[-1] * 1000, 2),
+        }
+        for p in YUZDELIKLER:
+            kayit[f'p{p}_ms'] = round(yuzdelik(sirali, p) * 1000, 2)
+        islemler[islem] = kayit
+
+    rez = dict(sonuclar.rezervasyon)
+    rez['cakisma_orani'] = round(rez['cakisma'] / rez['deneme'], 4) if rez['deneme'] else 0.0
+    return {
+        'toplam_istek': toplam,
+        'throughput': round(toplam / sure, 2),
+        'islemler': islemler,
+        'rezervasyon': rez,
+    }
+
+
+def karisim_oku(metin):
+    agirliklar = {}
+    for parca in metin.split(','):
+        ad, _, deger = parca.partition('=')
+        ad = ad.strip()
+        if ad not in ('ara', 'koltuk', 'rezervasyon', 'otomatik', 'odeme', 'iptal', 'rapor'):
+            raise ValueError(f'Bilinmeyen işlem: {ad}')
+        agirliklar[ad] = float(deger)
+    return agirliklar
+
+
+class SanalKullanici(threading.Thread):
+    def __init__(self, no, args, manifest, sonuclar, olcum_baslangici, bitis):
+        super().__init__(daemon=True)
+        self.args = args
+        self.manifest = manifest
+        self.sonuclar = sonuclar
+        self.olcum_baslangici = olcum_baslangici
+        self.bitis = bitis
+        self.rnd = random.Random(args.tohum + no)
+        self.istemci = Istemci(args.url, args.zaman_asimi)
+        self.kullanici = manifest['kullanicilar'][no % len(manifest['kullanicilar'])]
+        seferler = manifest['seferler']
+        self.rezervasyon_seferleri = seferler[:args.sicak_sefer] if args.sicak_sefer else seferler
+        self.odenmemis = []
+        self.odenmis = []
+        self.islemler, self.agirliklar = zip(*args.karisim.items())
+
+    def kaydet(self, islem, status, sure):
+        if time.perf_counter() >= self.olcum_baslangici:
+            self.sonuclar.ekle(islem, status, sure)
+
+    def giris(self):
+        # Sanal kullanıcılar aynı anda giriş yapar; şifre havuzu doluyken 503 döner
+        for _ in range(GIRIS_DENEMESI):
+            status, _, _ = self.istemci.istek('POST', '/api/auth/login', {
+                'kullanici_adi': self.kullanici, 'sifre': self.manifest['sifre']
+            })
+            if status != 503:
+                break
+            time.sleep(self.rnd.uniform(0.5, 1.5))
+        if status != 200:
+            raise RuntimeError(f'{self.kullanici} giriş yapamadı (HTTP {status})')
+
+    def ara(self):
+        kalkis, varis, tarih = self.rnd.choice(self.manifest['aramalar'])
+        sorgu = urlencode({'kalkis_sehir': kalkis, 'varis_sehir': varis, 'tarih': tarih})
+        status, _, sure = self.istemci.istek('GET', f'/api/seferler/ara?{sorgu}')
+        self.kaydet('ara', status, sure)
+
+    def koltuk(self, sefer_id=None):
+        sefer_id = sefer_id or self.rnd.choice(self.manifest['seferler'])
+        status, veri, sure = self.istemci.istek('GET', f'/api/seferler/{sefer_id}/koltuklar')
+        self.kaydet('koltuk', status, sure)
+        return veri if status == 200 else None
+
+    def rezervasyon(self):
+        sefer_id = self.rnd.choice(self.rezervasyon_seferleri)
+        harita = self.koltuk(sefer_id)
+        if not harita:
+            return
+        bos = [k['koltuk_no'] for k in harita['koltuklar'] if k['durum'] == 'bos']
+        if not bos:
+            return
+        koltuklar = self.rnd.sample(bos, min(len(bos), self.rnd.randint(1, self.args.max_bilet)))
+        yolcular = [
+            {'ad_soyad': 'Yuk Testi', 'eposta': f'yuk_{self.kullanici}_{i}@bench.local'}
+            for i in range(len(koltuklar))
+        ]
+        biletler = [
+            {'sefer_id': sefer_id, 'koltuk_no': k, 'yolcu_index': i, 'fiyat': 250}
+            for i, k in enumerate(koltuklar)
+        ]
+        status, veri, sure = self.istemci.istek(
+            'POST', '/api/rezervasyonlar', {'yolcular': yolcular, 'biletler': biletler}
+        )
+        self.kaydet('rezervasyon', status, sure)
+        if time.perf_counter() >= self.olcum_baslangici:
+            self.sonuclar.rezervasyon_sonucu(status)
+        if status == 201:
+            self.odenmemis.append(veri['data'])
+
+    def otomatik(self):
+        sefer_id = self.rnd.choice(self.rezervasyon_seferleri)
+        yolcular = [
+            {'ad_soyad': 'Yuk Testi', 'eposta': f'yuk_{self.kullanici}_{i}@bench.local'}
+            for i in range(self.rnd.randint(1, self.args.max_bilet))
+        ]
+        status, veri, sure = self.istemci.istek('POST', '/api/rezervasyonlar/otomatik', {
+            'sefer_id': sefer_id, 'yolcular': yolcular, 'fiyat': 250,
+            'tercih': {'bitisik': self.rnd.random() < 0.5}
+        })
+        self.kaydet('otomatik', status, sure)
+        if time.perf_counter() >= self.olcum_baslangici:
+            self.sonuclar.rezervasyon_sonucu(status)
+        if status == 201:
+            self.odenmemis.append(veri['data'])
+
+    def odeme(self):
+        if not self.odenmemis:
+            return self.rezervasyon()
+        rez = self.odenmemis.pop(0)
+        status, _, sure = self.istemci.istek('POST', '/api/odemeler', {
+            'rezervasyon_id': rez['rezervasyon_id'], 'yontem': 'kart', 'tutar': rez['toplam_tutar']
+        })
+        self.kaydet('odeme', status, sure)
+        if status == 201:
+            self.odenmis.append(rez)
+
+    def iptal(self):
+        bekleyen = self.odenmis or self.odenmemis
+        if not bekleyen:
+            return self.rezervasyon()
+        rez = bekleyen.pop(self.rnd.randrange(len(bekleyen)))
+        status, _, sure = self.istemci.istek('POST', f"/api/rezervasyonlar/{rez['rezervasyon_id']}/iptal")
+        self.kaydet('iptal', status, sure)
+
+    def rapor(self):
+        yol = self.rnd.choice(RAPORLAR)
+        if yol.endswith('gelir-ozeti') and self.manifest.get('tarih_araligi'):
+            baslangic, bitis = self.manifest['tarih_araligi']
+            yol += '?' + urlencode({'baslangic_tarih': baslangic, 'bitis_tarih': bitis})
+        status, _, sure = self.istemci.istek('GET', yol)
+        self.kaydet('rapor', status, sure)
+
+    def run(self):
+        self.giris()
+        while time.perf_counter() < self.bitis:
+            islem = self.rnd.choices(self.islemler, self.agirliklar)[0]
+            getattr(self, islem)()
+        self.istemci.kapat()
+
+
+def git_surumu():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='API yük testi')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--veri', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'veri.json'),
+                        help='veri_uret.py manifest dosyası')
+    parser.add_argument('--eszamanli', type=int, default=16, help='Sanal kullanıcı (thread) sayısı')
+    parser.add_argument('--sure', type=float, default=60, help='Ölçüm süresi (sn)')
+    parser.add_argument('--isinma', type=float, default=5, help='Ölçülmeyen ısınma süresi (sn)')
+    parser.add_argument('--karisim', default=VARSAYILAN_KARISIM, help='İşlem ağırlıkları')
+    parser.add_argument('--sicak-sefer', type=int, default=0,
+                        help='Rezervasyonları ilk N sefere yığ (çakışma senaryosu, 0 = tüm seferler)')
+    parser.add_argument('--max-bilet', type=int, default=2, help='Rezervasyon başına en fazla bilet')
+    parser.add_argument('--zaman-asimi', type=float, default=30)
+    parser.add_argument('--tohum', type=int, default=1)
+    parser.add_argument('--etiket', default='', help='Çalıştırmayı tanımlayan serbest metin')
+    parser.add_argument('--cikti', help='Sonuç JSON dosyası (verilmezse stdout)')
+    args = parser.parse_args(argv)
+
+    try:
+        args.karisim = karisim_oku(args.karisim)
+    except ValueError as e:
+        parser.error(str(e))
+    with open(args.veri, encoding='utf-8') as dosya:
+        manifest = json.load(dosya)
+
+    sonuclar = Sonuclar()
+    simdi = time.perf_counter()
+    olcum_baslangici = simdi + args.isinma
+    bitis = olcum_baslangici + args.sure
+    kullanicilar = [
+        SanalKullanici(i, args, manifest, sonuclar, olcum_baslangici, bitis) for i in range(args.eszamanli)
+    ]
+    print(f"{args.eszamanli} sanal kullanıcı, {args.isinma:g} sn ısınma + {args.sure:g} sn ölçüm...",
+          file=sys.stderr)
+    for kullanici in kullanicilar:
+        kullanici.start()
+    for kullanici in kullanicilar:
+        kullanici.join()
+
+    rapor = {
+        'etiket': args.etiket,
+        'zaman': datetime.now().isoformat(timespec='seconds'),
+        'git': git_surumu(),
+        'python': platform.python_version(),
+        'parametreler': {
+            'url': args.url,
+            'eszamanli': args.eszamanli,
+            'sure': args.sure,
+            'isinma': args.isinma,
+            'karisim': args.karisim,
+            'sicak_sefer': args.sicak_sefer,
+            'max_bilet': args.max_bilet,
+            'tohum': args.tohum,
+        },
+        'veri': manifest.get('sayilar'),
+        'sonuc': ozet(sonuclar, args.sure),
+    }
+    metin = json.dumps(rapor, ensure_ascii=False, indent=2)
+    if args.cikti:
+        os.makedirs(os.path.dirname(os.path.abspath(args.cikti)), exist_ok=True)
+        with open(args.cikti, 'w', encoding='utf-8') as dosya:
+            dosya.write(metin)
+        print(f"Sonuç yazıldı: {args.cikti}", file=sys.stderr)
+    else:
+        print(metin)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
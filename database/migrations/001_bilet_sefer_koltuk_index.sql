@@ -0,0 +1,7 @@
+-- Rezervasyon sırasında koltuk çakışma kontrolü (sefer_id, koltuk_no) üzerinden
+-- tek sorguda yapılır; kilit altında geçen süreyi kısaltmak için bileşik index.
+USE tren_rezervasyon_db;
+
+ALTER TABLE Bilet
+    ADD INDEX idx_sefer_koltuk (sefer_id, koltuk_no),
+    DROP INDEX idx_sefer;
@@ -0,0 +1,6 @@
+-- /api/seferler/ara istasyon id'leri + yarı açık kalkış aralığı ile arar;
+-- bu bileşik index sayesinde sorgu sadece ilgili güzergahın satırlarını tarar.
+USE tren_rezervasyon_db;
+
+ALTER TABLE Sefer
+    ADD INDEX idx_sefer_guzergah (kalkis_istasyon_id, varis_istasyon_id, kalkis_zamani);
@@ -0,0 +1,33 @@
+-- Sefer başına satılan koltuk sayacı. vw_sefer_detay artık Bilet'i
+-- GROUP BY ile saymaz, bu sütunu okur.
+-- Tutarlılık kontrolü: backend/doluluk.py (--duzelt ile yeniden kurar)
+USE tren_rezervasyon_db;
+
+ALTER TABLE Sefer
+    ADD COLUMN dolu_koltuk_sayisi INT NOT NULL DEFAULT 0 AFTER durum,
+    ADD CHECK (dolu_koltuk_sayisi >= 0);
+
+UPDATE Sefer s
+SET s.dolu_koltuk_sayisi = (
+    SELECT COUNT(*) FROM Bilet b
+    WHERE b.sefer_id = s.sefer_id AND b.durum != 'iade'
+);
+
+CREATE OR REPLACE VIEW vw_sefer_detay AS
+SELECT 
+    s.sefer_id,
+    s.kalkis_zamani,
+    s.varis_zamani,
+    s.durum,
+    ik.ad AS kalkis_istasyon,
+    ik.sehir AS kalkis_sehir,
+    iv.ad AS varis_istasyon,
+    iv.sehir AS varis_sehir,
+    t.kod AS tren_kodu,
+    t.koltuk_sayisi,
+    s.dolu_koltuk_sayisi,
+    (t.koltuk_sayisi - s.dolu_koltuk_sayisi) AS bos_koltuk_sayisi
+FROM Sefer s
+JOIN Istasyon ik ON s.kalkis_istasyon_id = ik.istasyon_id
+JOIN Istasyon iv ON s.varis_istasyon_id = iv.istasyon_id
+JOIN Tren t ON s.tren_id = t.tren_id;
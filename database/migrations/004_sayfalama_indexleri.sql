@@ -0,0 +1,17 @@
+-- Keyset sayfalama: her liste endpoint'inin ORDER BY anahtarları index'ten
+-- okunur (InnoDB ikincil index'leri birincil anahtarı da içerir).
+USE tren_rezervasyon_db;
+
+ALTER TABLE Istasyon
+    ADD INDEX idx_sehir_ad (sehir, ad),
+    DROP INDEX idx_sehir;
+
+ALTER TABLE Yolcu
+    ADD INDEX idx_ad_soyad (ad_soyad);
+
+ALTER TABLE Rezervasyon
+    ADD INDEX idx_rez_kullanici_zaman (kullanici_id, olusturulma_zamani),
+    ADD INDEX idx_olusturulma (olusturulma_zamani);
+ALTER TABLE Rezervasyon
+    DROP INDEX idx_rez_kullanici,
+    RENAME INDEX idx_rez_kullanici_zaman TO idx_rez_kullanici;
@@ -0,0 +1,10 @@
+-- PNR sıra numarası sayacı. Her backend süreci buradan PNR_BLOK_BOYUTU
+-- adetlik blok ayırır (backend/pnr.py); PNR üretimi için sorgu atılmaz.
+USE tren_rezervasyon_db;
+
+CREATE TABLE IF NOT EXISTS PnrSayac (
+    ad VARCHAR(32) PRIMARY KEY,
+    son_deger BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_turkish_ci;
+
+INSERT IGNORE INTO PnrSayac (ad, son_deger) VALUES ('pnr', 0);
@@ -0,0 +1,7 @@
+-- Toplu sefer oluşturmada (POST /api/seferler/toplu) aynı trenin zaman
+-- çakışması tren_id + kalkış aralığı ile aranır. tren_id ile başladığı için
+-- yabancı anahtarın örtük index'inin yerini de alır.
+USE tren_rezervasyon_db;
+
+ALTER TABLE Sefer
+    ADD INDEX idx_sefer_tren_zaman (tren_id, kalkis_zamani);
@@ -0,0 +1,52 @@
+-- Toplu içe aktarım (backend/ice_aktar.py).
+-- IceAktarimDurumu: aktarım adı başına en son commit edilen girdi satırı;
+-- yarıda kalan aktarım kaldığı yerden devam eder.
+-- Bilet INSERT tetikleyicileri @toplu_ice_aktarim oturum değişkeni
+-- ayarlıyken çalışmaz; koltuk kapasitesi ve toplam tutar ice_aktar.py
+-- tarafından parti başına kontrol edilir / hesaplanır.
+USE tren_rezervasyon_db;
+
+CREATE TABLE IF NOT EXISTS IceAktarimDurumu (
+    ad VARCHAR(64) PRIMARY KEY,
+    tur VARCHAR(20) NOT NULL,
+    satir BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    guncellendi TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_turkish_ci;
+
+DROP TRIGGER IF EXISTS check_koltuk_no_before_insert;
+DROP TRIGGER IF EXISTS update_rezervasyon_tutar_after_insert;
+
+DELIMITER //
+CREATE TRIGGER check_koltuk_no_before_insert
+BEFORE INSERT ON Bilet
+FOR EACH ROW
+BEGIN
+    DECLARE max_koltuk INT;
+    IF @toplu_ice_aktarim IS NULL THEN
+        SELECT t.koltuk_sayisi INTO max_koltuk
+        FROM Sefer s
+        JOIN Tren t ON s.tren_id = t.tren_id
+        WHERE s.sefer_id = NEW.sefer_id;
+
+        IF NEW.koltuk_no > max_koltuk THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Koltuk numarası tren kapasitesini aşıyor!';
+        END IF;
+    END IF;
+END//
+
+CREATE TRIGGER update_rezervasyon_tutar_after_insert
+AFTER INSERT ON Bilet
+FOR EACH ROW
+BEGIN
+    IF @toplu_ice_aktarim IS NULL THEN
+        UPDATE Rezervasyon
+        SET toplam_tutar = (
+            SELECT COALESCE(SUM(fiyat), 0)
+            FROM Bilet
+            WHERE rezervasyon_id = NEW.rezervasyon_id
+        )
+        WHERE rezervasyon_id = NEW.rezervasyon_id;
+    END IF;
+END//
+DELIMITER ;
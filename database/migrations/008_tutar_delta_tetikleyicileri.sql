@@ -0,0 +1,71 @@
+-- Rezervasyon.toplam_tutar tetikleyicileri her Bilet satırı için
+-- SUM(fiyat) çalıştırmak yerine fark (delta) uygular; toplu iptal / ödeme
+-- UPDATE'lerinde fiyat değişmediği için Rezervasyon'a hiç dokunulmaz.
+-- Koltuk kapasitesi kontrolü de yalnızca koltuk / sefer değişince çalışır.
+-- Tutarlılık kontrolü: backend/tutar.py (--duzelt ile yeniden hesaplar)
+USE tren_rezervasyon_db;
+
+DROP TRIGGER IF EXISTS check_koltuk_no_before_update;
+DROP TRIGGER IF EXISTS update_rezervasyon_tutar_after_insert;
+DROP TRIGGER IF EXISTS update_rezervasyon_tutar_after_update;
+DROP TRIGGER IF EXISTS update_rezervasyon_tutar_after_delete;
+
+DELIMITER //
+CREATE TRIGGER check_koltuk_no_before_update
+BEFORE UPDATE ON Bilet
+FOR EACH ROW
+BEGIN
+    DECLARE max_koltuk INT;
+    IF NEW.koltuk_no != OLD.koltuk_no OR NEW.sefer_id != OLD.sefer_id THEN
+        SELECT t.koltuk_sayisi INTO max_koltuk
+        FROM Sefer s
+        JOIN Tren t ON s.tren_id = t.tren_id
+        WHERE s.sefer_id = NEW.sefer_id;
+
+        IF NEW.koltuk_no > max_koltuk THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Koltuk numarası tren kapasitesini aşıyor!';
+        END IF;
+    END IF;
+END//
+
+-- Rezervasyon.toplam_tutar = SUM(Bilet.fiyat); SUM yeniden çalıştırılmaz,
+-- değişen biletin fiyatı fark olarak uygulanır (tutarlılık: backend/tutar.py)
+CREATE TRIGGER update_rezervasyon_tutar_after_insert
+AFTER INSERT ON Bilet
+FOR EACH ROW
+BEGIN
+    IF @toplu_ice_aktarim IS NULL THEN
+        UPDATE Rezervasyon
+        SET toplam_tutar = toplam_tutar + NEW.fiyat
+        WHERE rezervasyon_id = NEW.rezervasyon_id;
+    END IF;
+END//
+
+CREATE TRIGGER update_rezervasyon_tutar_after_update
+AFTER UPDATE ON Bilet
+FOR EACH ROW
+BEGIN
+    IF NEW.rezervasyon_id != OLD.rezervasyon_id THEN
+        UPDATE Rezervasyon
+        SET toplam_tutar = toplam_tutar - OLD.fiyat
+        WHERE rezervasyon_id = OLD.rezervasyon_id;
+        UPDATE Rezervasyon
+        SET toplam_tutar = toplam_tutar + NEW.fiyat
+        WHERE rezervasyon_id = NEW.rezervasyon_id;
+    ELSEIF NEW.fiyat != OLD.fiyat THEN
+        UPDATE Rezervasyon
+        SET toplam_tutar = toplam_tutar + (NEW.fiyat - OLD.fiyat)
+        WHERE rezervasyon_id = NEW.rezervasyon_id;
+    END IF;
+END//
+
+CREATE TRIGGER update_rezervasyon_tutar_after_delete
+AFTER DELETE ON Bilet
+FOR EACH ROW
+BEGIN
+    UPDATE Rezervasyon
+    SET toplam_tutar = toplam_tutar - OLD.fiyat
+    WHERE rezervasyon_id = OLD.rezervasyon_id;
+END//
+DELIMITER ;
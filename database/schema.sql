@@ -8,7 +8,7 @@ CREATE TABLE Istasyon (
     ad VARCHAR(100) NOT NULL,
     sehir VARCHAR(100) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_sehir (sehir)
+    INDEX idx_sehir_ad (sehir, ad)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_turkish_ci;
 
 CREATE TABLE Tren (
@@ -27,13 +27,17 @@ CREATE TABLE Sefer (
     kalkis_zamani DATETIME NOT NULL,
     varis_zamani DATETIME NOT NULL,
     durum ENUM('planli', 'satisa_acik', 'iptal', 'tamamlandi') DEFAULT 'planli',
+    dolu_koltuk_sayisi INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (tren_id) REFERENCES Tren(tren_id) ON DELETE CASCADE,
     FOREIGN KEY (kalkis_istasyon_id) REFERENCES Istasyon(istasyon_id) ON DELETE RESTRICT,
     FOREIGN KEY (varis_istasyon_id) REFERENCES Istasyon(istasyon_id) ON DELETE RESTRICT,
     CHECK (kalkis_zamani < varis_zamani),
     CHECK (kalkis_istasyon_id != varis_istasyon_id),
+    CHECK (dolu_koltuk_sayisi >= 0),
     INDEX idx_kalkis_zamani (kalkis_zamani),
+    INDEX idx_sefer_guzergah (kalkis_istasyon_id, varis_istasyon_id, kalkis_zamani),
+    INDEX idx_sefer_tren_zaman (tren_id, kalkis_zamani),
     INDEX idx_durum (durum)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_turkish_ci;
 
@@ -61,7 +65,8 @@ CREATE TABLE Yolcu (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     CHECK (ad_soyad REGEXP '^[A-Za-zÇĞİÖŞÜçğıöşü ]+$'),
     CHECK (telefon IS NULL OR telefon = '' OR telefon REGEXP '^[0-9 ]+$'),
-    INDEX idx_eposta (eposta)
+    INDEX idx_eposta (eposta),
+    INDEX idx_ad_soyad (ad_soyad)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_turkish_ci;
 
 CREATE TABLE Rezervasyon (
@@ -75,7 +80,8 @@ CREATE TABLE Rezervasyon (
     FOREIGN KEY (kullanici_id) REFERENCES Kullanici(kullanici_id) ON DELETE CASCADE,
     INDEX idx_pnr (pnr),
     INDEX idx_durum (durum),
-    INDEX idx_rez_kullanici (kullanici_id)
+    INDEX idx_rez_kullanici (kullanici_id, olusturulma_zamani),
+    INDEX idx_olusturulma (olusturulma_zamani)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_turkish_ci;
 
 CREATE TABLE Bilet (
@@ -94,7 +100,7 @@ CREATE TABLE Bilet (
     CHECK (fiyat > 0),
     CHECK (koltuk_no > 0),
     INDEX idx_rezervasyon (rezervasyon_id),
-    INDEX idx_sefer (sefer_id)
+    INDEX idx_sefer_koltuk (sefer_id, koltuk_no)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_turkish_ci;
 
 CREATE TABLE Odeme (
@@ -109,63 +115,90 @@ CREATE TABLE Odeme (
     INDEX idx_durum (durum)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_turkish_ci;
 
+-- PNR sıra numarası sayacı (backend/pnr.py blok halinde ayırır)
+CREATE TABLE PnrSayac (
+    ad VARCHAR(32) PRIMARY KEY,
+    son_deger BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_turkish_ci;
+
+INSERT INTO PnrSayac (ad, son_deger) VALUES ('pnr', 0);
+
+-- Toplu içe aktarım ilerlemesi (backend/ice_aktar.py kaldığı yerden devam eder)
+CREATE TABLE IceAktarimDurumu (
+    ad VARCHAR(64) PRIMARY KEY,
+    tur VARCHAR(20) NOT NULL,
+    satir BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    guncellendi TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_turkish_ci;
+
 DELIMITER //
+-- @toplu_ice_aktarim ayarlıyken (backend/ice_aktar.py) INSERT tetikleyicileri atlanır
 CREATE TRIGGER check_koltuk_no_before_insert
 BEFORE INSERT ON Bilet
 FOR EACH ROW
 BEGIN
     DECLARE max_koltuk INT;
-    SELECT t.koltuk_sayisi INTO max_koltuk
-    FROM Sefer s
-    JOIN Tren t ON s.tren_id = t.tren_id
-    WHERE s.sefer_id = NEW.sefer_id;
-    
-    IF NEW.koltuk_no > max_koltuk THEN
-        SIGNAL SQLSTATE '45000'
-        SET MESSAGE_TEXT = 'Koltuk numarası tren kapasitesini aşıyor!';
+    IF @toplu_ice_aktarim IS NULL THEN
+        SELECT t.koltuk_sayisi INTO max_koltuk
+        FROM Sefer s
+        JOIN Tren t ON s.tren_id = t.tren_id
+        WHERE s.sefer_id = NEW.sefer_id;
+
+        IF NEW.koltuk_no > max_koltuk THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Koltuk numarası tren kapasitesini aşıyor!';
+        END IF;
     END IF;
 END//
 
+-- Koltuk / sefer değişmeyen güncellemelerde (durum, fiyat) kapasite tekrar okunmaz
 CREATE TRIGGER check_koltuk_no_before_update
 BEFORE UPDATE ON Bilet
 FOR EACH ROW
 BEGIN
     DECLARE max_koltuk INT;
-    SELECT t.koltuk_sayisi INTO max_koltuk
-    FROM Sefer s
-    JOIN Tren t ON s.tren_id = t.tren_id
-    WHERE s.sefer_id = NEW.sefer_id;
-    
-    IF NEW.koltuk_no > max_koltuk THEN
-        SIGNAL SQLSTATE '45000'
-        SET MESSAGE_TEXT = 'Koltuk numarası tren kapasitesini aşıyor!';
+    IF NEW.koltuk_no != OLD.koltuk_no OR NEW.sefer_id != OLD.sefer_id THEN
+        SELECT t.koltuk_sayisi INTO max_koltuk
+        FROM Sefer s
+        JOIN Tren t ON s.tren_id = t.tren_id
+        WHERE s.sefer_id = NEW.sefer_id;
+
+        IF NEW.koltuk_no > max_koltuk THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Koltuk numarası tren kapasitesini aşıyor!';
+        END IF;
     END IF;
 END//
 
+-- Rezervasyon.toplam_tutar = SUM(Bilet.fiyat); SUM yeniden çalıştırılmaz,
+-- değişen biletin fiyatı fark olarak uygulanır (tutarlılık: backend/tutar.py)
 CREATE TRIGGER update_rezervasyon_tutar_after_insert
 AFTER INSERT ON Bilet
 FOR EACH ROW
 BEGIN
-    UPDATE Rezervasyon
-    SET toplam_tutar = (
-        SELECT COALESCE(SUM(fiyat), 0)
-        FROM Bilet
-        WHERE rezervasyon_id = NEW.rezervasyon_id
-    )
-    WHERE rezervasyon_id = NEW.rezervasyon_id;
+    IF @toplu_ice_aktarim IS NULL THEN
+        UPDATE Rezervasyon
+        SET toplam_tutar = toplam_tutar + NEW.fiyat
+        WHERE rezervasyon_id = NEW.rezervasyon_id;
+    END IF;
 END//
 
 CREATE TRIGGER update_rezervasyon_tutar_after_update
 AFTER UPDATE ON Bilet
 FOR EACH ROW
 BEGIN
-    UPDATE Rezervasyon
-    SET toplam_tutar = (
-        SELECT COALESCE(SUM(fiyat), 0)
-        FROM Bilet
-        WHERE rezervasyon_id = NEW.rezervasyon_id
-    )
-    WHERE rezervasyon_id = NEW.rezervasyon_id;
+    IF NEW.rezervasyon_id != OLD.rezervasyon_id THEN
+        UPDATE Rezervasyon
+        SET toplam_tutar = toplam_tutar - OLD.fiyat
+        WHERE rezervasyon_id = OLD.rezervasyon_id;
+        UPDATE Rezervasyon
+        SET toplam_tutar = toplam_tutar + NEW.fiyat
+        WHERE rezervasyon_id = NEW.rezervasyon_id;
+    ELSEIF NEW.fiyat != OLD.fiyat THEN
+        UPDATE Rezervasyon
+        SET toplam_tutar = toplam_tutar + (NEW.fiyat - OLD.fiyat)
+        WHERE rezervasyon_id = NEW.rezervasyon_id;
+    END IF;
 END//
 
 CREATE TRIGGER update_rezervasyon_tutar_after_delete
@@ -173,16 +206,14 @@ AFTER DELETE ON Bilet
 FOR EACH ROW
 BEGIN
     UPDATE Rezervasyon
-    SET toplam_tutar = (
-        SELECT COALESCE(SUM(fiyat), 0)
-        FROM Bilet
-        WHERE rezervasyon_id = OLD.rezervasyon_id
-    )
+    SET toplam_tutar = toplam_tutar - OLD.fiyat
     WHERE rezervasyon_id = OLD.rezervasyon_id;
 END//
 
 DELIMITER ;
 
+-- Doluluk Bilet üzerinden sayılmaz; Sefer.dolu_koltuk_sayisi uygulama
+-- tarafından bilet ekleme/iade ile aynı transaction'da güncellenir.
 CREATE VIEW vw_sefer_detay AS
 SELECT 
     s.sefer_id,
@@ -195,15 +226,12 @@ SELECT
     iv.sehir AS varis_sehir,
     t.kod AS tren_kodu,
     t.koltuk_sayisi,
-    COUNT(b.bilet_id) AS dolu_koltuk_sayisi,
-    (t.koltuk_sayisi - COUNT(b.bilet_id)) AS bos_koltuk_sayisi
+    s.dolu_koltuk_sayisi,
+    (t.koltuk_sayisi - s.dolu_koltuk_sayisi) AS bos_koltuk_sayisi
 FROM Sefer s
 JOIN Istasyon ik ON s.kalkis_istasyon_id = ik.istasyon_id
 JOIN Istasyon iv ON s.varis_istasyon_id = iv.istasyon_id
-JOIN Tren t ON s.tren_id = t.tren_id
-LEFT JOIN Bilet b ON s.sefer_id = b.sefer_id AND b.durum != 'iade'
-GROUP BY s.sefer_id, s.kalkis_zamani, s.varis_zamani, s.durum,
-         ik.ad, ik.sehir, iv.ad, iv.sehir, t.kod, t.koltuk_sayisi;
+JOIN Tren t ON s.tren_id = t.tren_id;
 
 CREATE VIEW vw_rezervasyon_ozet AS
 SELECT 
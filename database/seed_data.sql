@@ -119,6 +119,13 @@ INSERT INTO Bilet (rezervasyon_id, sefer_id, yolcu_id, koltuk_no, fiyat, durum)
 (8, 15, 2, 41, 275.00, 'iade'),
 (10, 11, 1, 16, 200.00, 'kesildi');
 
+-- Sefer doluluk sayaçlarını yüklenen biletlerle eşitle
+UPDATE Sefer s
+SET s.dolu_koltuk_sayisi = (
+    SELECT COUNT(*) FROM Bilet b
+    WHERE b.sefer_id = s.sefer_id AND b.durum != 'iade'
+);
+
 -- Ödemeler (odendi veya iade senaryoları)
 INSERT INTO Odeme (rezervasyon_id, yontem, tutar, durum) VALUES
 (1, 'kart', 500.00, 'basarili'),